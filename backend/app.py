@@ -1,16 +1,20 @@
 # Import all the libraries we need for the app
+import time as _time
+# Import-to-ready timing starts here (see create_app / BOOT_TIMINGS)
+_IMPORT_STARTED = _time.perf_counter()
 import os
 import json
 import re
+import hashlib
 import secrets
-import smtplib
 from datetime import datetime, timedelta
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
+import queue
+import threading
 from concurrent.futures import ThreadPoolExecutor, as_completed
 
 # Flask handles our web server and routing
-from flask import Flask, render_template, request, redirect, url_for, session, flash, jsonify
+import click
+from flask import Flask, Response, g, render_template, request, redirect, url_for, session, flash, jsonify, send_file
 # SQLAlchemy helps us work with the database
 from flask_sqlalchemy import SQLAlchemy
 # Flask-Migrate helps us manage database schema changes (migrations)
@@ -18,18 +22,32 @@ from flask_migrate import Migrate
 # Werkzeug provides password hashing and file security
 from werkzeug.security import generate_password_hash, check_password_hash
 from werkzeug.utils import secure_filename
-# OpenAI API for AI-powered features like email drafting and lab matching
-from openai import OpenAI
 # Load environment variables from .env file (keeps API keys secret)
 from dotenv import load_dotenv
 
 # Load our environment variables (like API keys) from the .env file
 load_dotenv()
-# Set up the OpenAI client so we can use their AI models (optional for local dev)
+# Set up the OpenAI client so we can use their AI models (optional for local dev).
+# The SDK is imported on the first AI request, not at startup (see services/llm/client.py).
 _api_key = os.getenv("OPENAI_API_KEY")
-client = OpenAI(api_key=_api_key) if _api_key else None
 # We use gpt-4o-mini because it's cost-effective and still very capable
 GPT_MODEL = "gpt-4o-mini"
+# /bulk-email drafts run in parallel: at most this many OpenAI calls at once, each with this timeout (s)
+BULK_EMAIL_CONCURRENCY = int(os.getenv("BULK_EMAIL_CONCURRENCY", "4"))
+BULK_EMAIL_TIMEOUT = float(os.getenv("BULK_EMAIL_TIMEOUT", "60"))
+# Stream drafts to the browser (SSE) as tokens arrive; set EMAIL_STREAMING=false for whole-page rendering
+EMAIL_STREAMING = os.getenv("EMAIL_STREAMING", "true").lower() != "false"
+# EMAIL_JOBS=true writes /bulk-email drafts in a background job the results page polls, so no web
+# worker waits on OpenAI. The queue is an SQLite file on this host: single-host deployments with a
+# persistent disk only (another instance, or a redeploy on an ephemeral disk, loses the job).
+# JOB_WORKERS threads per process run jobs; with JOB_WORKERS=0 the web processes only enqueue and
+# `flask run-jobs` does the work.
+EMAIL_JOBS = os.getenv("EMAIL_JOBS", "false").lower() == "true"
+# AI lab matching: top candidates (v2 prefilter) sent to the LLM, packed into requests of about
+# AI_MATCH_BATCH_TOKENS prompt tokens, AI_MATCH_CONCURRENCY requests at once
+AI_MATCH_CANDIDATES = int(os.getenv("AI_MATCH_CANDIDATES", "200"))
+AI_MATCH_BATCH_TOKENS = int(os.getenv("AI_MATCH_BATCH_TOKENS", "3000"))
+AI_MATCH_CONCURRENCY = int(os.getenv("AI_MATCH_CONCURRENCY", "4"))
 
 APP_DIR = os.path.dirname(os.path.abspath(__file__))
 ROOT_DIR = os.path.dirname(APP_DIR)
@@ -39,22 +57,28 @@ import sys
 if ROOT_DIR not in sys.path:
     sys.path.insert(0, ROOT_DIR)
 
-# Import Matching Service (v2 by default: 7-parameter semantic-lite with MMR reranking)
-try:
-    matching_path = os.path.join(ROOT_DIR, "services", "matching")
-    if os.path.exists(matching_path):
-        if ROOT_DIR not in sys.path:
-            sys.path.insert(0, ROOT_DIR)
+from services.llm.client import LazyOpenAI  # noqa: E402
+
+client = LazyOpenAI(_api_key) if _api_key else None
+
+# Matching Service (v2 by default: 7-parameter semantic-lite with MMR reranking).
+# Imported on first use by get_matching_service, not at startup.
+HAS_MATCHING = os.path.exists(os.path.join(ROOT_DIR, "services", "matching"))
+
+
+def _matching_service_classes():
+    """(MatchingServiceV2, MatchingServiceV1), or (None, None) if they cannot be imported."""
+    global HAS_MATCHING
+    try:
         # v2 matching: 7-parameter semantic-lite with MMR reranking
         from services.matching.matching_v2 import MatchingServiceV2
         # Keep v1 import for fallback (set USE_MATCHING_V2=false to revert)
         from services.matching.simple_matching import MatchingService as MatchingServiceV1
-        HAS_MATCHING = True
-    else:
+    except ImportError as e:
         HAS_MATCHING = False
-except ImportError as e:
-    HAS_MATCHING = False
-    print(f"Warning: Could not import matching service: {e}")
+        print(f"Warning: Could not import matching service: {e}")
+        return None, None
+    return MatchingServiceV2, MatchingServiceV1
 
 # Feature flag: set USE_MATCHING_V2=false in .env to revert to v1
 USE_MATCHING_V2 = os.environ.get("USE_MATCHING_V2", "true").lower() != "false"
@@ -68,71 +92,96 @@ from services.matching.tag_match import (  # noqa: E402
     build_tag_match_dropdown_options,
     rank_professors_for_answers,
 )
+# Department -> category classifier, memoized per department string and shared with tag matching
+from services.faculty.classify import DEPARTMENT_CLASSIFIER  # noqa: E402
+
+# Same call signature as before (templates call {{ dept_field_key(pi.department) }})
+dept_field_key = DEPARTMENT_CLASSIFIER
+from services.faculty.serving import (  # noqa: E402
+    SERVING_MANIFEST_NAME,
+    load_serving_dataset,
+    read_serving_manifest,
+    source_matches,
+)
+from services.faculty.facets import FacetIndex  # noqa: E402
+from services.faculty.refresh import StaleWhileRevalidate  # noqa: E402
+from services.faculty.search_index import SubstringSearchIndex  # noqa: E402
+from services.faculty.fts import FTS_DB_NAME, open_fts_database  # noqa: E402
+from services.faculty.lru import LRUCache  # noqa: E402
+from services.users.saved_cache import SavedPICache  # noqa: E402
+from services.web.counters import BufferedCounter  # noqa: E402
+from services.web.readiness import WarmUp  # noqa: E402
+from services.web.metrics import MetricsRegistry, stats_gauges  # noqa: E402
+from services.web.profiler import SORT_KEYS as PROFILE_SORT_KEYS, ProfileStore  # noqa: E402
+from services.web.rate_limit import RateLimiter  # noqa: E402
+from services.web.periodic import PeriodicTask  # noqa: E402
+from services.llm.response_cache import LLMResponseCache  # noqa: E402
+from services.mail.outbox import OutboxMessage, OutboxSender, SMTPConnection  # noqa: E402
+from services.jobs.queue import JobQueue  # noqa: E402
+from services.matching.llm_batching import estimate_tokens, map_with_retry, pack_by_budget  # noqa: E402
+from services.faculty.store import FacultyStore  # noqa: E402
+
+# Per-process request and span metrics, served on /metrics in Prometheus text format
+metrics = MetricsRegistry(prefix="riq_")
+http_latency = metrics.histogram("http_request_duration_seconds", "Request latency by endpoint.")
+http_requests = metrics.counter("http_requests_total", "Requests by endpoint, method and status.")
+http_in_flight = metrics.gauge("http_requests_in_flight", "Requests being handled, by endpoint.")
+span_latency = metrics.histogram(
+    "span_duration_seconds", "Time in internal operations (faculty load, filters, matching, OpenAI calls)."
+)
+openai_requests = metrics.counter("openai_requests_total", "OpenAI chat completions by outcome (ok, error, cached).")
+openai_tokens = metrics.counter("openai_tokens_total", "OpenAI tokens used, by kind (prompt, completion).")
+
+
+def _timed(span):
+    """Decorator: record each call's duration in span_duration_seconds{span=...}."""
+    from functools import wraps
+
+    def decorator(f):
+        @wraps(f)
+        def timed(*args, **kwargs):
+            with metrics.span(span_latency, span=span):
+                return f(*args, **kwargs)
+        return timed
+    return decorator
+
+
+def _record_openai_usage(usage):
+    if usage is not None:
+        openai_tokens.inc(getattr(usage, "prompt_tokens", 0) or 0, kind="prompt", model=GPT_MODEL)
+        openai_tokens.inc(getattr(usage, "completion_tokens", 0) or 0, kind="completion", model=GPT_MODEL)
 
-def _flatten_v2_for_matching(pi):
-    """Flatten a v2-schema PI dict to top-level keys for the matching service."""
-    if pi.get("schema_version") != "2.0":
-        return pi  # Already flat
-
-    aff = pi.get("affiliation", {})
-    contact = pi.get("contact", {})
-    metrics = pi.get("metrics", {})
-    research = pi.get("research", {})
-    pubs = pi.get("publications", {})
-    funding = pi.get("funding", {})
-    dq = pi.get("data_quality", {})
-
-    # Map email_confidence to quality format the matcher expects
-    email_conf = contact.get("email_confidence", "")
-    email_quality = "verified" if email_conf == "HIGH" else "uncertain"
-
-    flat = {
-        "id": pi.get("id", ""),
-        "name": pi.get("name", ""),
-        "school": aff.get("school", ""),
-        "institution": aff.get("school", ""),
-        "department": aff.get("department", ""),
-        "title": aff.get("title", ""),
-        "location": aff.get("location", ""),
-        "specific_location": aff.get("specific_location", ""),
-        "email": contact.get("email", ""),
-        "primary_email": contact.get("email", ""),
-        "primary_email_quality": email_quality,
-        "website": contact.get("website", ""),
-        "google_scholar": contact.get("google_scholar_url", ""),
-        "h_index": metrics.get("h_index", 0),
-        "research_areas": research.get("areas", ""),
-        "research_topics": research.get("topics", []),
-        "lab_techniques": research.get("techniques", []),
-        "pub_titles_recent": pubs.get("recent_papers", []),
-        "nsf_awards": funding.get("nsf_grants_count", 0),
-    }
-    return flat
+
+def _matching_service_for_store(store):
+    """v2 matching service for one faculty generation (rebuilt with the store on refresh)."""
+    def build():
+        MatchingServiceV2, _ = _matching_service_classes()
+        if MatchingServiceV2 is None:
+            return None
+        service = MatchingServiceV2(store.matching_records(), candidate_index=get_faculty_fts(store))
+        app.logger.info(f"Loaded matching service (v2) from faculty store: {len(store)} PIs")
+        return service
+    return store.derived("matching_service", build)
 
 
 def get_matching_service():
     """Get or initialize the matching service. Uses v2 by default (set USE_MATCHING_V2=false to revert)."""
     global _matching_service
+    if HAS_MATCHING and USE_MATCHING_V2:
+        store = get_faculty_store()
+        if len(store):
+            return _matching_service_for_store(store)
     if _matching_service is None and HAS_MATCHING:
+        MatchingServiceV2, MatchingServiceV1 = _matching_service_classes()
+        if MatchingServiceV2 is None:
+            return None
         # Select service class based on feature flag
         MatchingService = MatchingServiceV2 if USE_MATCHING_V2 else MatchingServiceV1
         version_str = "v2" if USE_MATCHING_V2 else "v1"
 
         _app_dir = ROOT_DIR
 
-        # Priority 1: v2 combined faculty data (same data as Browse Labs)
-        v2_path = os.path.join(_app_dir, "data", "v2", "all_faculty.json")
-        if os.path.exists(v2_path) and USE_MATCHING_V2:
-            try:
-                import json as _json
-                with open(v2_path, "r", encoding="utf-8") as f:
-                    v2_data = _json.load(f)
-                flat_list = [_flatten_v2_for_matching(pi) for pi in v2_data]
-                _matching_service = MatchingService(flat_list)
-                app.logger.info(f"Loaded matching service ({version_str}) from v2 data: {len(flat_list)} PIs")
-                return _matching_service
-            except Exception as e:
-                app.logger.error(f"Failed to load v2 faculty data for matching: {e}")
+        # Priority 1 (shared faculty store) is handled above; legacy sources below
 
         # Priority 2: NSF Active Awards (legacy)
         misc_dir = os.path.join(_app_dir, "data", "Misc jsons")
@@ -176,46 +225,6 @@ app = Flask(
 )
 
 
-def dept_field_key(department):
-    """Map a department name to a broad field key for CSS color coding."""
-    if not department:
-        return "default"
-    d = department.lower()
-    if any(k in d for k in ["computer", "computing", "informatics", "data science"]):
-        return "cs"
-    if any(k in d for k in ["engineer", "mechanical", "aerospace", "aeronautic", "nuclear", "biomedical eng", "biological eng"]):
-        return "engineering"
-    if any(k in d for k in ["biology", "biological", "biochem", "genetic", "molecular", "microbio", "agricultural"]):
-        return "biology"
-    if any(k in d for k in ["chemistry", "chemical"]):
-        return "chemistry"
-    if any(k in d for k in ["physics", "astro", "quantum"]):
-        return "physics"
-    if any(k in d for k in ["math", "statistic"]):
-        return "math"
-    if any(k in d for k in ["medicine", "medical", "health", "pharma", "nursing", "immuno"]):
-        return "medicine"
-    if any(k in d for k in ["neuro", "brain", "cognitive"]):
-        return "neuro"
-    if any(k in d for k in ["social", "politic", "sociology", "anthropo", "linguist", "psycho"]):
-        return "social"
-    if any(k in d for k in ["econom", "finance"]):
-        return "economics"
-    if any(k in d for k in ["material"]):
-        return "materials"
-    if any(k in d for k in ["earth", "planet", "geo", "ocean", "atmospher"]):
-        return "earth"
-    if any(k in d for k in ["business", "management", "account"]):
-        return "business"
-    if any(k in d for k in ["art", "music", "theater", "literature", "humanit", "history", "philosoph"]):
-        return "arts"
-    if any(k in d for k in ["environment", "ecology", "climate", "sustainab"]):
-        return "env"
-    if any(k in d for k in ["energy"]):
-        return "energy"
-    return "default"
-
-
 # Register as Jinja2 template global so templates can call {{ dept_field_key(pi.department) }}
 app.jinja_env.globals["dept_field_key"] = dept_field_key
 
@@ -284,6 +293,8 @@ class User(db.Model):
     # We never store passwords in plain text - only the hashed version
     password_hash = db.Column(db.String(255), nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    # Sessions remember the version they were authorized at; bumping it ends them (see _session_authorization)
+    auth_version = db.Column(db.Integer, default=1, nullable=False, server_default="1")
 
     # When a user sets their password, we hash it before storing
     # We use pbkdf2:sha256 because it works with Python 3.9 (scrypt needs Python 3.10+)
@@ -356,6 +367,56 @@ class SiteStats(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     total_page_views = db.Column(db.Integer, default=0)
 
+# PageViewCount: page views per tracked path (admin dashboard)
+class PageViewCount(db.Model):
+    path = db.Column(db.String(255), primary_key=True)
+    views = db.Column(db.Integer, default=0)
+
+# SchemaVersion: one row per applied schema migration (see SCHEMA_MIGRATIONS)
+class SchemaVersion(db.Model):
+    __tablename__ = "schema_version"
+    version = db.Column(db.Integer, primary_key=True)
+    description = db.Column(db.String(200))
+    applied_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+# EmailOutbox: queued outgoing email; outbox_sender delivers it in the background
+class EmailOutbox(db.Model):
+    __tablename__ = "email_outbox"
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(50))  # e.g. "password_reset"
+    to_email = db.Column(db.String(255), nullable=False)
+    subject = db.Column(db.String(255), nullable=False)
+    body = db.Column(db.Text, nullable=False)
+    # pending -> sending -> sent, or back to pending (retry) / failed after max attempts
+    status = db.Column(db.String(20), default="pending", nullable=False, index=True)
+    attempts = db.Column(db.Integer, default=0, nullable=False)
+    next_attempt_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    claim = db.Column(db.String(32))  # set by the worker that is sending it
+    claimed_at = db.Column(db.DateTime)
+    last_error = db.Column(db.String(500))
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    sent_at = db.Column(db.DateTime)
+
+# Admin summary tables: aggregates recomputed every ADMIN_SUMMARY_REFRESH_SECONDS
+# (refresh_admin_summary) so the admin dashboard reads a few small rows
+class AdminSummary(db.Model):
+    __tablename__ = "admin_summary"
+    id = db.Column(db.Integer, primary_key=True)  # always 1
+    total_users = db.Column(db.Integer, default=0, nullable=False)
+    total_saved = db.Column(db.Integer, default=0, nullable=False)
+    total_resumes = db.Column(db.Integer, default=0, nullable=False)
+    refreshed_at = db.Column(db.DateTime, nullable=False)
+
+class DailySignupCount(db.Model):
+    __tablename__ = "admin_daily_signups"
+    day = db.Column(db.String(10), primary_key=True)  # YYYY-MM-DD (UTC)
+    signups = db.Column(db.Integer, default=0, nullable=False)
+
+class PISaveCount(db.Model):
+    __tablename__ = "admin_pi_saves"
+    pi_id = db.Column(db.String(64), primary_key=True)
+    saves = db.Column(db.Integer, default=0, nullable=False, index=True)
+
 # Configuration for file uploads
 # Note: On hosted servers (Render/Railway), disk storage may be ephemeral
 # For production, consider using S3 or similar cloud storage for uploaded files
@@ -369,66 +430,105 @@ app.config["UPLOAD_FOLDER"] = UPLOAD_FOLDER
 os.makedirs(app.config["UPLOAD_FOLDER"], exist_ok=True)
 
 # Initialize database - this function creates tables and handles migrations
+def _add_missing_columns(inspector, table, columns):
+    """ALTER TABLE ... ADD COLUMN for each (name, type) the table lacks (no-op if there is no such table)."""
+    from sqlalchemy import text
+    if table not in inspector.get_table_names():
+        return
+    existing = {col["name"] for col in inspector.get_columns(table)}
+    # Quoted: "user" is a reserved word in PostgreSQL
+    quoted = db.engine.dialect.identifier_preparer.quote(table)
+    for col_name, col_type in columns:
+        if col_name not in existing:
+            with db.engine.begin() as conn:
+                conn.execute(text(f"ALTER TABLE {quoted} ADD COLUMN {col_name} {col_type}"))
+            print(f"Migration: Added {col_name} column to {table} table")
+
+
+def _migrate_baseline():
+    """Create missing tables and add the columns databases from before each model change lack."""
+    from sqlalchemy import inspect
+    db.create_all()
+    inspector = inspect(db.engine)
+    _add_missing_columns(inspector, "user", [("username", "VARCHAR(80)")])
+    _add_missing_columns(inspector, "user_profile", [
+        ("year_in_school", "VARCHAR(50)"),
+        # MVP: 5-question profile columns
+        ("research_field", "VARCHAR(200)"),
+        ("research_topics", "TEXT"),
+        ("academic_level", "VARCHAR(50)"),
+        ("work_style", "VARCHAR(50)"),
+        ("needs_funding", "BOOLEAN"),
+        ("institution", "VARCHAR(255)"),
+    ])
+    _add_missing_columns(inspector, "saved_pi", [("pi_email", "VARCHAR(255)")])
+
+
+def _migrate_user_auth_version():
+    from sqlalchemy import inspect
+    _add_missing_columns(inspect(db.engine), "user", [("auth_version", "INTEGER NOT NULL DEFAULT 1")])
+
+
+# Schema migrations in order: (version, description, function). Each runs once per
+# database and is recorded in schema_version. Functions must be safe to re-run (a
+# worker racing another one may repeat a step). New models or columns need a new
+# entry here, e.g. (3, "add foo table", db.create_all).
+SCHEMA_MIGRATIONS = [
+    (1, "baseline tables and legacy columns", _migrate_baseline),
+    (2, "email outbox table", db.create_all),
+    (3, "user.auth_version", _migrate_user_auth_version),
+    (4, "admin summary tables", db.create_all),
+]
+
+
+def _schema_version():
+    try:
+        return db.session.query(db.func.max(SchemaVersion.version)).scalar() or 0
+    except Exception:
+        # No schema_version table yet
+        db.session.rollback()
+        return 0
+
+
 def init_db():
-    """Initialize database and run migrations."""
+    """Initialize the database: apply pending SCHEMA_MIGRATIONS. Returns the versions applied.
+
+    An up-to-date database costs one query, so workers no longer inspect the
+    schema on every start. A failed migration raises: the models would not match
+    the schema, so the app must not start (the next start tries it again).
+    """
     with app.app_context():
-        db.create_all()
-        
-        # Run migrations for existing tables
-        try:
-            from sqlalchemy import inspect, text
-            inspector = inspect(db.engine)
-            
-            # Migration: Add username column to User table if it doesn't exist
-            if 'user' in inspector.get_table_names():
-                columns = [col['name'] for col in inspector.get_columns('user')]
-                
-                if 'username' not in columns:
-                    # Add username column using raw SQL
-                    # SQLite supports ADD COLUMN in ALTER TABLE
-                    with db.engine.begin() as conn:
-                        conn.execute(text("ALTER TABLE user ADD COLUMN username VARCHAR(80)"))
-                    print("Migration: Added username column to user table")
-            
-            # Migration: Add year_in_school column to user_profile table if it doesn't exist
-            if 'user_profile' in inspector.get_table_names():
-                columns = [col['name'] for col in inspector.get_columns('user_profile')]
-                
-                if 'year_in_school' not in columns:
-                    with db.engine.begin() as conn:
-                        conn.execute(text("ALTER TABLE user_profile ADD COLUMN year_in_school VARCHAR(50)"))
-                    print("Migration: Added year_in_school column to user_profile table")
-                
-                # MVP: Add 5-question profile columns if they don't exist
-                mvp_columns = [
-                    ("research_field", "VARCHAR(200)"),
-                    ("research_topics", "TEXT"),
-                    ("academic_level", "VARCHAR(50)"),
-                    ("work_style", "VARCHAR(50)"),
-                    ("needs_funding", "BOOLEAN"),
-                    ("institution", "VARCHAR(255)"),
-                ]
-                for col_name, col_type in mvp_columns:
-                    if col_name not in columns:
-                        with db.engine.begin() as conn:
-                            conn.execute(text(f"ALTER TABLE user_profile ADD COLUMN {col_name} {col_type}"))
-                        print(f"Migration: Added {col_name} column to user_profile table")
-
-            # Migration: Add pi_email to saved_pi if it doesn't exist
-            if "saved_pi" in inspector.get_table_names():
-                sp_columns = [col["name"] for col in inspector.get_columns("saved_pi")]
-                if "pi_email" not in sp_columns:
-                    with db.engine.begin() as conn:
-                        conn.execute(text("ALTER TABLE saved_pi ADD COLUMN pi_email VARCHAR(255)"))
-                    print("Migration: Added pi_email column to saved_pi table")
-                
-        except Exception as e:
-            # If table doesn't exist yet, create_all will handle it
-            # Or if migration fails, continue anyway
-            print(f"Migration check: {e}")
+        current = _schema_version()
+        if current >= SCHEMA_MIGRATIONS[-1][0]:
+            return []
+        SchemaVersion.__table__.create(db.engine, checkfirst=True)
+        applied = []
+        for version, description, migrate_fn in SCHEMA_MIGRATIONS:
+            if version <= current:
+                continue
+            try:
+                migrate_fn()
+            except Exception as e:
+                # Leave it (and later ones) pending
+                db.session.rollback()
+                raise RuntimeError(f"Migration {version} ({description}) failed: {e}") from e
+            db.session.add(SchemaVersion(version=version, description=description))
+            try:
+                db.session.commit()
+            except Exception:
+                # Another worker recorded it first
+                db.session.rollback()
+            applied.append(version)
+            print(f"Migration {version}: {description}")
+        return applied
+
+
+@app.cli.command("init-db")
+def init_db_command():
+    """Apply pending schema migrations (e.g. as a release/pre-deploy step)."""
+    applied = init_db()
+    print(f"Applied migrations: {applied}" if applied else "Schema is up to date.")
 
-# Initialize the database when the app starts
-init_db()
 
 # Set up paths to our data files
 DATA_DIR = os.path.join(ROOT_DIR, "data")
@@ -481,6 +581,11 @@ HARVARD_DEPT_DIR = os.path.join(DATA_DIR, "Harvard")
 
 # v2 combined faculty data (preferred, generated by scripts/migrate_to_v2_schema.py)
 V2_FACULTY_PATH = os.path.join(DATA_DIR, "v2", "all_faculty.json")
+# Pre-normalized serving dataset (generated by scripts/compile_serving_dataset.py)
+SERVING_DIR = os.path.join(DATA_DIR, "v2", "serving")
+# Optional SQLite FTS5 index (compile_serving_dataset.py --fts); set FACULTY_SEARCH_BACKEND=fts to use it
+FACULTY_FTS_PATH = os.path.join(SERVING_DIR, FTS_DB_NAME)
+FACULTY_SEARCH_BACKEND = os.environ.get("FACULTY_SEARCH_BACKEND", "memory").lower()
 
 # NSF Active Awards 2026 data - all schools with active NSF grants
 NSF_AWARDS_DIR = os.path.join(DATA_DIR, "NSF Active Awards 2026")
@@ -530,6 +635,52 @@ def is_user_authorized(user_email: str) -> bool:
     user_email_normalized = user_email.lower().strip()
     return user_email_normalized in ALLOWED_EMAILS
 
+# Logged-in sessions cache the authorization check (user exists, ALLOWED_USERS, admin) and
+# repeat it against the database every AUTH_REVALIDATE_SECONDS instead of on every request.
+AUTH_REVALIDATE_SECONDS = int(os.getenv("AUTH_REVALIDATE_SECONDS", "300"))
+
+_AUTH_FAILURES = {
+    "missing": "User not found. Please log in again.",
+    "denied": "Access denied. This site is restricted to authorized users only.",
+    "revoked": "Your session has ended. Please log in again.",
+}
+
+
+def _remember_login(user):
+    """Store the user (and the authorization decision) in the signed session cookie."""
+    session["user_id"] = user.id
+    session["username"] = user.username
+    session["is_admin"] = user.email.lower().strip() in ADMIN_EMAILS_SET
+    session["auth"] = [user.id, user.auth_version, int(_time.time())]
+
+
+def _end_session():
+    for key in ("user_id", "is_admin", "auth"):
+        session.pop(key, None)
+
+
+def _session_authorization():
+    """None if the logged-in session may use the site, else why not: "missing", "denied" or "revoked".
+
+    The decision is cached in the session and re-checked (one user lookup) once it
+    is AUTH_REVALIDATE_SECONDS old. A session authorized at an older auth_version
+    (e.g. before a password reset) is revoked then.
+    """
+    user_id = session.get("user_id")
+    cached = session.get("auth")
+    if cached and cached[0] == user_id and _time.time() - cached[2] < AUTH_REVALIDATE_SECONDS:
+        return None
+    user = User.query.get(user_id)
+    if not user:
+        return "missing"
+    if cached and cached[0] == user_id and cached[1] != user.auth_version:
+        return "revoked"
+    if ALLOWED_EMAILS is not None and not is_user_authorized(user.email):
+        return "denied"
+    _remember_login(user)
+    return None
+
+
 def require_authorized_user(f):
     """Decorator to require user to be logged in AND authorized."""
     from functools import wraps
@@ -541,16 +692,10 @@ def require_authorized_user(f):
             flash("Please log in to access this page.", "info")
             return redirect(url_for("login"))
         
-        user = User.query.get(user_id)
-        if not user:
-            session.pop("user_id", None)
-            flash("User not found. Please log in again.", "error")
-            return redirect(url_for("login"))
-        
-        # Check if user is authorized (if access control is enabled)
-        if ALLOWED_EMAILS is not None and not is_user_authorized(user.email):
-            session.pop("user_id", None)
-            flash("Access denied. This site is restricted to authorized users only.", "error")
+        failure = _session_authorization()
+        if failure:
+            _end_session()
+            flash(_AUTH_FAILURES[failure], "error")
             return redirect(url_for("login"))
         
         return f(*args, **kwargs)
@@ -565,21 +710,65 @@ def admin_required(f):
         if not user_id:
             flash("Please log in to access the admin area.", "info")
             return redirect(url_for("login"))
-        user = User.query.get(user_id)
-        if not user:
-            session.pop("user_id", None)
-            session.pop("is_admin", None)
+        failure = _session_authorization()
+        if failure:
+            _end_session()
+            flash(_AUTH_FAILURES[failure], "error")
             return redirect(url_for("login"))
-        if not ADMIN_EMAILS_SET or user.email.lower().strip() not in ADMIN_EMAILS_SET:
+        if not session.get("is_admin"):
             flash("Access denied. Admin only.", "error")
             return redirect(url_for("index"))
         return f(*args, **kwargs)
     return decorated_function
 
+# Token-bucket rate limits (requests per minute: login per IP, search and LLM calls per user).
+# Set RATE_LIMIT_PATH to an SQLite file on local disk so they hold across gunicorn workers
+# instead of applying per worker; a limit of 0 turns that limiter off.
+RATE_LIMIT_PATH = os.environ.get("RATE_LIMIT_PATH") or None
+login_limiter = RateLimiter(
+    int(os.environ.get("LOGIN_RATE_LIMIT", "10")), window=60, name="login", shared_path=RATE_LIMIT_PATH
+)
+search_limiter = RateLimiter(
+    int(os.environ.get("SEARCH_RATE_LIMIT", "120")), window=60, name="search", shared_path=RATE_LIMIT_PATH
+)
+llm_limiter = RateLimiter(
+    int(os.environ.get("LLM_RATE_LIMIT", "10")), window=60, name="llm", shared_path=RATE_LIMIT_PATH
+)
+
+
+def _rate_limit_key():
+    user_id = session.get("user_id")
+    return f"user:{user_id}" if user_id else f"ip:{request.remote_addr or 'unknown'}"
+
+
+def rate_limited(limiter, methods=None, exempt=None):
+    """Decorator: 429 once the user (or, logged out, the client IP) is over limiter's rate.
+
+    Only requests whose method is in `methods` count (all when None), and none
+    while exempt() is true. Form posts get a flash message and a redirect back
+    to the page; everything else JSON.
+    """
+    from functools import wraps
+
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            if (methods is None or request.method in methods) and not (exempt and exempt()):
+                allowed, retry_after = limiter.hit(_rate_limit_key())
+                if not allowed:
+                    wait = max(1, int(retry_after + 0.999))
+                    message = f"Too many requests. Try again in {wait} seconds."
+                    if request.method == "POST" and request.accept_mimetypes.best == "text/html":
+                        flash(message, "error")
+                        return redirect(request.url)
+                    return jsonify({"success": False, "error": message}), 429, {"Retry-After": str(wait)}
+            return f(*args, **kwargs)
+        return decorated_function
+    return decorator
+
 # Helper Functions - these do common tasks we need throughout the app
 
-import time as _time
-_faculty_cache = {"data": None, "loaded_at": None, "by_name": {}}
+_faculty_cache = {"store": None, "data": None, "loaded_at": None, "version": None}
 CACHE_TTL = 3600  # 1 hour
 
 # Research fields for onboarding autocomplete
@@ -773,322 +962,104 @@ ALL_SCHOOLS = [
     "Youngstown State University",
 ]
 
-import re as _re
-
-# US state abbreviations for location normalization
-_US_STATES = {
-    "al","ak","az","ar","ca","co","ct","de","fl","ga","hi","id","il","in","ia",
-    "ks","ky","la","me","md","ma","mi","mn","ms","mo","mt","ne","nv","nh","nj",
-    "nm","ny","nc","nd","oh","ok","or","pa","ri","sc","sd","tn","tx","ut","vt",
-    "va","wa","wv","wi","wy","dc","pr","vi",
-}
-
-def _normalize_location(loc):
-    """Normalize a location string to canonical 'City Name, ST' format."""
-    if not loc or not loc.strip():
-        return loc
-    loc = loc.strip()
-    # Split on comma
-    parts = [p.strip() for p in loc.split(",")]
-    if len(parts) == 2:
-        city, state = parts
-        state_clean = state.strip().upper()
-        # If state portion is a valid 2-letter abbreviation, normalize to Title Case city + uppercase state
-        if state_clean.lower() in _US_STATES or len(state_clean) == 2:
-            return city.strip().title() + ", " + state_clean
-        else:
-            return city.strip().title() + ", " + state.strip().title()
-    elif len(parts) > 2:
-        # Multi-part address — just title-case everything, keep last part uppercase if state
-        last = parts[-1].strip()
-        if last.lower() in _US_STATES or len(last) <= 2:
-            return ", ".join(p.strip().title() for p in parts[:-1]) + ", " + last.upper()
-        return ", ".join(p.strip().title() for p in parts)
-    else:
-        # Single part — just title-case it
-        if loc == loc.upper() and len(loc) > 2:
-            return loc.title()
-        return loc
-
-
-def normalize_faculty_entry(pi):
-    """Normalize a faculty entry to consistent format (handles v2, old, and NSF formats)."""
-    if not isinstance(pi, dict):
-        return None
-
-    # ── v2 schema: flatten nested structure for template compatibility ──
-    if pi.get("schema_version") == "2.0":
-        aff = pi.get("affiliation", {})
-        con = pi.get("contact", {})
-        met = pi.get("metrics", {})
-        res = pi.get("research", {})
-        fund = pi.get("funding", {})
-
-        techniques = res.get("techniques", [])
-        topics = res.get("topics", [])
-
-        flat = {
-            "id": pi.get("id", ""),
-            "name": pi.get("name", ""),
-            "school": aff.get("school", ""),
-            "department": aff.get("department", ""),
-            "title": aff.get("title", ""),
-            "location": aff.get("location", ""),
-            "specific_location": aff.get("specific_location", "") or aff.get("location", ""),
-            "email": con.get("email", ""),
-            "website": con.get("website", ""),
-            "google_scholar": con.get("google_scholar_url", ""),
-            "h_index": met.get("h_index"),
-            "research_areas": res.get("areas", ""),
-            "research_topics": topics[:5] if topics else [],
-            "lab_techniques": ", ".join(techniques) if techniques else "",
-            "nsf_awards": fund.get("nsf_awards", []),
-            "_v2_data": pi,
-        }
-        # Normalize locations
-        for loc_field in ("location", "specific_location"):
-            loc_val = flat.get(loc_field, "")
-            if loc_val:
-                flat[loc_field] = _normalize_location(loc_val)
-        return flat
-
-    # ── Legacy / NSF format handling ──
-    if "id" not in pi:
-        pi["id"] = pi.get("name", "")
-
-    # NSF data uses "institution"; normalize so "school" always exists
-    if "school" not in pi and pi.get("institution"):
-        pi["school"] = pi.get("institution", "")
-
-    # Normalize school names to canonical forms (used for display + logo lookup)
-    _SCHOOL_NAME_MAP = {
-        "massachusetts institute of technology": "MIT",
-        "harvard university": "Harvard University",
-        "harvard": "Harvard University",
-        "harvard medical school": "Harvard University",
-        "broad institute": "Harvard University",
-        "broad institute of mit and harvard": "Harvard University",
-        "boston university": "Boston University",
-        "bu": "Boston University",
-        "northeastern university": "Northeastern University",
-        "northeastern": "Northeastern University",
-        "tufts university": "Tufts University",
-        "tufts": "Tufts University",
-        "stanford university": "Stanford University",
-        "stanford": "Stanford University",
-        "yale university": "Yale University",
-        "yale": "Yale University",
-        "princeton university": "Princeton University",
-        "princeton": "Princeton University",
-    }
-    school_raw = (pi.get("school") or "").strip()
-    canonical = _SCHOOL_NAME_MAP.get(school_raw.lower())
-    if canonical:
-        pi["school"] = canonical
-
-    # Handle email as list (NSF format) or string (old format)
-    email = pi.get("email", "")
-    if isinstance(email, list):
-        pi["email"] = email[0] if email else ""
-
-    # Handle research_areas as list (NSF format) or string (old format)
-    research_areas = pi.get("research_areas", "")
-    if isinstance(research_areas, list):
-        pi["research_areas"] = ", ".join(str(r) for r in research_areas[:5])
-
-    # Handle lab_techniques as list (NSF format) or string (old format)
-    lab_techniques = pi.get("lab_techniques", "")
-    if isinstance(lab_techniques, list):
-        pi["lab_techniques"] = ", ".join(str(t) for t in lab_techniques)
-
-    # Set defaults for missing fields
-    pi.setdefault("school", "")
-    pi.setdefault("department", "")
-    pi.setdefault("location", "")
-    pi.setdefault("lab_techniques", "")
-    pi.setdefault("title", "")
-    pi.setdefault("research_areas", "")
-
-    # Normalize locations to canonical "City Name, ST" format
-    for loc_field in ("location", "specific_location"):
-        loc_val = pi.get(loc_field, "")
-        if loc_val:
-            pi[loc_field] = _normalize_location(loc_val)
-
-    # Normalize department name (strip whitespace, consistent casing)
-    dept = pi.get("department", "")
-    if dept:
-        pi["department"] = dept.strip()
-
-    # Normalize technique names (strip whitespace per technique)
-    techs = pi.get("lab_techniques", "")
-    if techs and isinstance(techs, str):
-        cleaned = ", ".join(t.strip() for t in techs.split(",") if t.strip())
-        pi["lab_techniques"] = cleaned
-
-    if not pi.get("research_areas") and pi.get("research_topics"):
-        topics = pi["research_topics"]
-        if isinstance(topics, list):
-            pi["research_areas"] = ", ".join(str(t) for t in topics[:5])
-
-    return pi
-
-
-def _is_valid_person_name(name: str) -> bool:
-    """Runtime guard: skip obvious non-person rows (headers, UI chrome, etc.)."""
-    if not name or not name.strip():
-        return False
-    name = name.strip()
-    # Must have at least first and last name
-    if " " not in name:
-        return False
-    # Too long to be a real name
-    if len(name) > 60:
-        return False
-    # Starts with institutional/non-person words
-    non_person_prefixes = [
-        "department",
-        "division",
-        "school",
-        "center",
-        "institute",
-        "program",
-        "office",
-        "faculty",
-        "administration",
-        "clinical",
-        "students",
-        "technology",
-        "principal",
-        "research",
-        "application",
-        "deadlines",
-        "about",
-        "contact",
-        "news",
-        "events",
-        "curriculum",
-        "admission",
-        "staff",
-        "committee",
-        "board",
-        "council",
-        "library",
-        "services",
-        "resources",
-        "the ",
-        "a ",
-        "an ",
-        "affiliated",
-        "emeritus",
-        "visiting",
-    ]
-    lower = name.lower()
-    if any(lower.startswith(p) for p in non_person_prefixes):
-        return False
-    # Contains junk substrings
-    if any(
-        s in lower
-        for s in [
-            "expand_more",
-            "expand_less",
-            "read more",
-            "learn more",
-            "view all",
-            "load more",
-            "show more",
-            "see all",
-            "click here",
-            "privacy",
-            "more about",
-            "database list",
-            "timeline & faq",
-            "policy award",
-            "follow us",
-            "health law",
-            "http",
-            ".edu",
-            ".com",
-            ".org",
-        ]
-    ):
-        return False
-    # Contains digits
-    if any(c.isdigit() for c in name):
-        return False
-    return True
-
-
-def load_faculty():
-    """Load faculty from Data/v2/all_faculty.json only, with caching."""
+def _set_faculty_store(store):
+    """Publish a FacultyStore generation through _faculty_cache (one reference swap)."""
     global _faculty_cache
-    now = _time.time()
-    if _faculty_cache["data"] is not None and _faculty_cache["loaded_at"] and (now - _faculty_cache["loaded_at"]) < CACHE_TTL:
-        return _faculty_cache["data"]
+    faculty = store.records
+    _faculty_cache = {
+        "store": store,
+        "data": faculty,
+        "loaded_at": store.loaded_at,
+        "version": store.version,
+    }
 
-    faculty = []
-    seen_name_school = set()
 
-    ENABLED_SCHOOLS = {
-        "harvard university", "mit", "massachusetts institute of technology",
-        "boston university", "northeastern university", "tufts university",
-        "stanford university", "yale university", "princeton university",
-    }
+def _build_faculty_store():
+    """Build a FacultyStore from the serving dataset if present, else Data/v2/all_faculty.json."""
+    # Preferred: pre-normalized artifact from scripts/compile_serving_dataset.py (no per-record work)
+    try:
+        serving = load_serving_dataset(SERVING_DIR, source_path=V2_FACULTY_PATH)
+        if serving is None and os.path.exists(os.path.join(SERVING_DIR, SERVING_MANIFEST_NAME)):
+            app.logger.warning(
+                f"Serving dataset in {SERVING_DIR} was not compiled from the current {V2_FACULTY_PATH}; "
+                "loading the v2 file (re-run scripts/compile_serving_dataset.py)"
+            )
+    except (OSError, ValueError) as e:
+        app.logger.error(f"Failed to load serving dataset from {SERVING_DIR}: {e}")
+        serving = None
+    if serving:
+        store = FacultyStore.from_serving(serving, source=SERVING_DIR)
+        app.logger.info(f"Loaded {len(store)} faculty from serving dataset (sha256 {(store.version or '')[:12]})")
+        return store
 
     if not os.path.exists(V2_FACULTY_PATH):
         app.logger.error(f"Required faculty data not found: {V2_FACULTY_PATH}")
-        _faculty_cache["data"] = []
-        _faculty_cache["loaded_at"] = now
-        _faculty_cache["by_name"] = {}
-        return []
+        return FacultyStore([])
 
     try:
         with open(V2_FACULTY_PATH, "r", encoding="utf-8") as f:
             v2_data = json.load(f)
     except (FileNotFoundError, json.JSONDecodeError) as e:
         app.logger.error(f"Failed to load v2 faculty data from {V2_FACULTY_PATH}: {e}")
-        _faculty_cache["data"] = []
-        _faculty_cache["loaded_at"] = now
-        _faculty_cache["by_name"] = {}
-        return []
+        return FacultyStore([])
 
     if not isinstance(v2_data, list):
         app.logger.error(f"Unexpected v2 faculty format in {V2_FACULTY_PATH}: expected list, got {type(v2_data)}")
-        _faculty_cache["data"] = []
-        _faculty_cache["loaded_at"] = now
-        _faculty_cache["by_name"] = {}
-        return []
+        return FacultyStore([])
 
-    for pi in v2_data:
-        normalized = normalize_faculty_entry(pi)
-        if not normalized:
-            continue
-        if not _is_valid_person_name(normalized.get("name", "")):
-            continue
-        school = normalized.get("school", "").lower()
-        if ENABLED_SCHOOLS is not None and school not in ENABLED_SCHOOLS:
-            continue
-        if normalized.get("department", "") == "Various":
-            continue
-        # Filter low-quality entries: no department, no research areas, no h_index
-        if (not normalized.get("department", "").strip()
-                and not normalized.get("research_areas", "").strip()
-                and normalized.get("h_index") is None):
-            continue
-        name_lower = normalized.get("name", "").lower()
-        if not name_lower:
-            continue
-        dedupe_key = (name_lower, school)
-        if dedupe_key in seen_name_school:
-            continue
-        faculty.append(normalized)
-        seen_name_school.add(dedupe_key)
+    store = FacultyStore.from_v2(v2_data, source=V2_FACULTY_PATH)
+    app.logger.info(f"Loaded {len(store)} faculty from v2 combined file")
+    return store
+
+
+def _faculty_store_unchanged(store):
+    """True if store was loaded from the serving artifact on disk and it still matches the v2 file."""
+    if store.source != SERVING_DIR or not store.version:
+        return False
+    try:
+        manifest = read_serving_manifest(SERVING_DIR)
+        return bool(manifest) and manifest.get("sha256") == store.version and (
+            not os.path.exists(V2_FACULTY_PATH) or source_matches(manifest, V2_FACULTY_PATH)
+        )
+    except (OSError, ValueError):
+        return False
+
+
+def _warm_faculty_store(store):
+    """Rebuild derived structures on a new generation before it is swapped in.
+
+    Whatever the current generation had built (matching service, tag-match
+    options, ...) is built again for the new one, so the first request after
+    a refresh does not pay for it.
+    """
+    previous = _faculty_generation.peek()
+    for key in (previous.derived_keys() if previous is not None else []):
+        builder = _FACULTY_DERIVED_BUILDERS.get(key)
+        if builder:
+            builder(store)
+
+
+# Current faculty generation: served stale while one background thread rebuilds after CACHE_TTL
+_faculty_generation = StaleWhileRevalidate(
+    build=_build_faculty_store,
+    ttl=CACHE_TTL,
+    warmers=[_warm_faculty_store],
+    on_swap=_set_faculty_store,
+    logger=app.logger,
+    name="faculty store",
+    unchanged=_faculty_store_unchanged,
+)
+
+
+def get_faculty_store():
+    """Return the shared FacultyStore (Browse, Search and Matching all read from it)."""
+    return _faculty_generation.get()
 
-    app.logger.info(f"Loaded {len(faculty)} faculty from v2 combined file")
-    _faculty_cache["data"] = faculty
-    _faculty_cache["loaded_at"] = now
-    _faculty_cache["by_name"] = {pi.get("name", "").lower(): pi for pi in faculty if pi.get("name")}
-    return faculty
+
+@_timed("load_faculty")
+def load_faculty():
+    """Load faculty records from the shared store (serving dataset or Data/v2/all_faculty.json), with caching."""
+    return get_faculty_store().records
 
 
 def _pi_display_priority(pi):
@@ -1103,86 +1074,82 @@ def _pi_display_priority(pi):
     return priority
 
 
+def get_facet_index(store=None):
+    """Browse Labs facet bitmaps for the current faculty generation (built once per generation)."""
+    store = store or get_faculty_store()
+    return store.derived(
+        "facet_index",
+        lambda: FacetIndex(store.records, DEPARTMENT_CLASSIFIER.category_for, _pi_display_priority),
+    )
+
+
+def get_search_index(store=None):
+    """PI typeahead index for the current faculty generation (built once per generation)."""
+    store = store or get_faculty_store()
+    return store.derived("search_index", lambda: SubstringSearchIndex(store.records))
+
+
+def get_faculty_fts(store=None):
+    """On-disk FTS5 index for the current generation, or None when disabled/missing/stale."""
+    if FACULTY_SEARCH_BACKEND != "fts":
+        return None
+    store = store or get_faculty_store()
+
+    def build():
+        fts = open_fts_database(FACULTY_FTS_PATH, store.version)
+        if fts is None:
+            app.logger.warning(f"FTS search index unavailable or stale at {FACULTY_FTS_PATH}; using in-memory search")
+        return fts
+    return store.derived("faculty_fts", build)
+
+
+@_timed("get_filter_choices")
 def get_filter_choices(selected_school="", selected_dept_category="",
                        selected_subfield="", selected_location=""):
     """Return context-aware filter choices with two-tier department system.
 
     Each dropdown only shows values that yield ≥1 PI given the other active
     filters.  For example, when school='MIT' the department dropdown only
-    lists categories that exist among MIT faculty.
+    lists categories that exist among MIT faculty.  Values and per-value
+    counts come from bitmap intersections in the facet index.
     """
-    all_faculty = _faculty_cache.get("data") or load_faculty()
-
-    def _matches(pi, skip=None):
-        """Return True if *pi* satisfies every active filter except *skip*."""
-        if skip != "school" and selected_school:
-            if (pi.get("school") or pi.get("institution") or "") != selected_school:
-                return False
-        if skip != "dept_category" and selected_dept_category:
-            pi_cat = dept_field_key(pi.get("department") or "")
-            if pi_cat != selected_dept_category:
-                return False
-        if skip != "subfield" and selected_subfield:
-            if (pi.get("department") or "") != selected_subfield:
-                return False
-        if skip != "location" and selected_location:
-            pi_loc = pi.get("specific_location") or pi.get("location") or ""
-            if selected_location not in pi_loc:
-                return False
-        return True
-
-    schools = set()
-    dept_categories = set()
-    subfields = set()
-    locations = set()
-
-    for pi in all_faculty:
-        if _matches(pi, skip="school"):
-            s = pi.get("school") or pi.get("institution") or ""
-            if s:
-                schools.add(s)
-
-        if _matches(pi, skip="dept_category"):
-            d = pi.get("department") or ""
-            if d and d != "Various":
-                cat = dept_field_key(d)
-                if cat != "default":
-                    dept_categories.add(cat)
-
-        # Subfields: only collect when a dept_category is selected
-        if selected_dept_category and _matches(pi, skip="subfield"):
-            d = pi.get("department") or ""
-            if d and d != "Various":
-                cat = dept_field_key(d)
-                if cat == selected_dept_category:
-                    subfields.add(d)
-
-        if _matches(pi, skip="location"):
-            loc = pi.get("specific_location") or pi.get("location") or ""
-            if loc:
-                locations.add(loc)
-
+    counts = get_facet_index().choices({
+        "school": selected_school,
+        "dept_category": selected_dept_category,
+        "subfield": selected_subfield,
+        "location": selected_location,
+    })
     return {
-        "schools": sorted(schools),
-        "dept_categories": sorted(dept_categories, key=lambda c: DEPT_CATEGORY_DISPLAY.get(c, c)),
-        "subfields": sorted(subfields),
-        "locations": sorted(locations),
+        "schools": sorted(counts["school"]),
+        "dept_categories": sorted(counts["dept_category"], key=lambda c: DEPT_CATEGORY_DISPLAY.get(c, c)),
+        "subfields": sorted(counts["subfield"]),
+        "locations": sorted(counts["location"]),
+        "counts": counts,
     }
 
 
 def get_faculty_by_id(pi_id: str):
-    """Find and return a specific PI by their ID or name, or None if not found."""
-    load_faculty()  # ensure cache
-    by_name = _faculty_cache.get("by_name", {})
-    if pi_id and by_name:
-        low = pi_id.lower()
-        if low in by_name:
-            return by_name[low]
-    all_faculty = _faculty_cache.get("data") or []
-    for pi in all_faculty:
-        if pi.get("id") == pi_id or pi.get("name") == pi_id:
-            return pi
-    return None
+    """Find and return a specific PI by their ID, name, name alternative or email, or None."""
+    return get_faculty_store().lookup().resolve(pi_id)
+
+
+def _load_saved_pi_ids(user_id):
+    rows = db.session.query(SavedPI.pi_id).filter_by(user_id=user_id).order_by(SavedPI.id).all()
+    return [row.pi_id for row in rows]
+
+
+# Saved pi_ids per user, invalidated on save/unsave. Set SAVED_PI_CACHE_PATH to an
+# SQLite file on local disk to share invalidations between gunicorn workers.
+saved_pi_cache = SavedPICache(
+    load=_load_saved_pi_ids,
+    ttl=int(os.environ.get("SAVED_PI_CACHE_TTL", "300")),
+    shared_path=os.environ.get("SAVED_PI_CACHE_PATH") or None,
+)
+
+
+def get_saved_pi_ids(user_id) -> frozenset:
+    """Saved pi_id values for a user (cached; see saved_pi_cache)."""
+    return saved_pi_cache.get(user_id)
 
 
 def filter_faculty(faculty_list: list, filters: dict) -> list:
@@ -1231,56 +1198,127 @@ def allowed_file(filename: str) -> bool:
 
 # Email Helper Functions - for sending password reset emails
 
+# SMTP settings (SMTP_SERVER is the older name of SMTP_HOST). For a local sink (MailHog,
+# aiosmtpd) set SMTP_AUTH=false and SMTP_STARTTLS=false; no credentials are needed then.
+SMTP_HOST = os.getenv("SMTP_HOST") or os.getenv("SMTP_SERVER") or "smtp.gmail.com"
+SMTP_PORT = int(os.getenv("SMTP_PORT", "587"))
+SMTP_USERNAME = os.getenv("SMTP_USERNAME", "")
+SMTP_PASSWORD = os.getenv("SMTP_PASSWORD", "")
+FROM_EMAIL = os.getenv("FROM_EMAIL") or SMTP_USERNAME or "noreply@localhost"
+SMTP_AUTH = os.getenv("SMTP_AUTH", "true").lower() != "false"
+SMTP_STARTTLS = os.getenv("SMTP_STARTTLS", "true").lower() != "false"
+SMTP_CONFIGURED = bool(SMTP_USERNAME and SMTP_PASSWORD) if SMTP_AUTH else bool(os.getenv("SMTP_HOST") or os.getenv("SMTP_SERVER"))
+# Outbox: seconds between polls for due retries, and attempts before a message is marked failed
+OUTBOX_POLL_SECONDS = float(os.getenv("OUTBOX_POLL_SECONDS", "15"))
+OUTBOX_MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS", "6"))
+# A message left "sending" this long (its worker died mid-send) is claimed again
+OUTBOX_STALE_CLAIM = timedelta(minutes=10)
+
+
+def _outbox_due(now):
+    return db.or_(
+        db.and_(EmailOutbox.status == "pending", EmailOutbox.next_attempt_at <= now),
+        db.and_(EmailOutbox.status == "sending", EmailOutbox.claimed_at < now - OUTBOX_STALE_CLAIM),
+    )
+
+
+def _claim_outbox(limit):
+    """Mark up to `limit` due messages as sending under a fresh claim token and return them.
+
+    The UPDATE re-checks the due condition, so two workers never claim the same row.
+    """
+    with app.app_context():
+        now = datetime.utcnow()
+        token = secrets.token_hex(8)
+        ids = [row.id for row in db.session.query(EmailOutbox.id).filter(_outbox_due(now)).order_by(EmailOutbox.id).limit(limit)]
+        if not ids:
+            return []
+        db.session.execute(
+            db.update(EmailOutbox)
+            .where(EmailOutbox.id.in_(ids), _outbox_due(now))
+            .values(status="sending", claim=token, claimed_at=now)
+        )
+        db.session.commit()
+        rows = EmailOutbox.query.filter_by(claim=token, status="sending").order_by(EmailOutbox.id).all()
+        return [OutboxMessage(r.id, r.to_email, r.subject, r.body, r.attempts or 0) for r in rows]
+
+
+def _record_outbox(message, status, error=None, retry_in=None):
+    """Store the outcome of one delivery attempt (see OutboxSender)."""
+    with app.app_context():
+        now = datetime.utcnow()
+        values = {"status": status, "attempts": message.attempts, "last_error": error, "claim": None}
+        if status == "sent":
+            values["sent_at"] = now
+        elif status == "pending":
+            values["next_attempt_at"] = now + timedelta(seconds=retry_in or 0)
+        db.session.execute(db.update(EmailOutbox).where(EmailOutbox.id == message.id).values(**values))
+        db.session.commit()
+
+
+outbox_sender = OutboxSender(
+    _claim_outbox,
+    _record_outbox,
+    SMTPConnection(
+        SMTP_HOST,
+        SMTP_PORT,
+        username=SMTP_USERNAME if SMTP_AUTH else "",
+        password=SMTP_PASSWORD,
+        from_addr=FROM_EMAIL,
+        starttls=SMTP_STARTTLS,
+    ),
+    interval=OUTBOX_POLL_SECONDS,
+    max_attempts=OUTBOX_MAX_ATTEMPTS,
+    logger=app.logger,
+    name="outbox",
+) if SMTP_CONFIGURED else None
+
+
+def enqueue_email(to_email: str, subject: str, body: str, kind: str = None) -> int:
+    """Queue an email for background delivery; returns the outbox id. Never touches SMTP."""
+    message = EmailOutbox(kind=kind, to_email=to_email, subject=subject, body=body)
+    db.session.add(message)
+    db.session.commit()
+    if outbox_sender is not None:
+        outbox_sender.notify()
+    return message.id
+
+
 def send_password_reset_email(user_email: str, reset_token: str, base_url: str = None) -> bool:
     """
-    Send a password reset email to the user.
-    This function uses SMTP to send emails. You'll need to configure SMTP settings in your .env file.
+    Queue a password reset email for the user (delivered by outbox_sender).
+    You'll need to configure SMTP settings in your .env file.
     
     Args:
         user_email: The email address to send the reset link to
         reset_token: The secure token for password reset
         base_url: The base URL of the application (for creating the reset link)
     
-    Returns True if email was sent successfully, False otherwise.
+    Returns True if the email was queued, False otherwise.
     """
-    try:
-        # Get the base URL - use the one provided or try to get it from Flask request context
-        if not base_url:
-            try:
-                base_url = request.url_root
-            except RuntimeError:
-                # If we're not in a request context, use localhost as default
-                base_url = "http://localhost:5001/"
-        
-        # Get email configuration from environment variables
-        # For development, you can use Gmail SMTP or another email service
-        smtp_server = os.getenv("SMTP_SERVER", "smtp.gmail.com")
-        smtp_port = int(os.getenv("SMTP_PORT", "587"))
-        smtp_username = os.getenv("SMTP_USERNAME", "")
-        smtp_password = os.getenv("SMTP_PASSWORD", "")
-        from_email = os.getenv("FROM_EMAIL", smtp_username)
-        
-        # Create the reset link
-        reset_link = f"{base_url}reset-password/{reset_token}"
-        
-        # If SMTP credentials aren't configured, we can't send emails
-        # In development, we'll just print the reset link instead
-        if not smtp_username or not smtp_password:
-            print(f"\n{'='*60}")
-            print("PASSWORD RESET EMAIL (SMTP not configured - showing link here):")
-            print(f"To: {user_email}")
-            print(f"Reset Link: {reset_link}")
-            print(f"{'='*60}\n")
-            return False  # Return False so the route can show the link on the page
-        
-        # Create the email message
-        msg = MIMEMultipart()
-        msg['From'] = from_email
-        msg['To'] = user_email
-        msg['Subject'] = "RIQ Lab Matcher - Password Reset Request"
-        
-        # Email body with the reset link
-        body = f"""
+    # Get the base URL - use the one provided or try to get it from Flask request context
+    if not base_url:
+        try:
+            base_url = request.url_root
+        except RuntimeError:
+            # If we're not in a request context, use localhost as default
+            base_url = "http://localhost:5001/"
+
+    # Create the reset link
+    reset_link = f"{base_url}reset-password/{reset_token}"
+
+    # If SMTP isn't configured, we can't send emails
+    # In development, we'll just print the reset link instead
+    if not SMTP_CONFIGURED:
+        print(f"\n{'='*60}")
+        print("PASSWORD RESET EMAIL (SMTP not configured - showing link here):")
+        print(f"To: {user_email}")
+        print(f"Reset Link: {reset_link}")
+        print(f"{'='*60}\n")
+        return False  # Return False so the route can show the link on the page
+
+    # Email body with the reset link
+    body = f"""
 Hello,
 
 You requested to reset your password for your RIQ Lab Matcher account.
@@ -1295,48 +1333,113 @@ If you didn't request this password reset, please ignore this email.
 Best regards,
 RIQ Lab Matcher Team
 """
-        
-        msg.attach(MIMEText(body, 'plain'))
-        
-        # Connect to SMTP server and send email
-        server = smtplib.SMTP(smtp_server, smtp_port)
-        server.starttls()  # Enable encryption
-        server.login(smtp_username, smtp_password)
-        server.send_message(msg)
-        server.quit()
-        
+    try:
+        enqueue_email(user_email, "RIQ Lab Matcher - Password Reset Request", body, kind="password_reset")
         return True
     except Exception as e:
-        # If email sending fails, log the error but don't break the flow
-        print(f"Error sending password reset email: {str(e)}")
+        # If queueing fails, log the error but don't break the flow
+        db.session.rollback()
+        print(f"Error queueing password reset email: {str(e)}")
         # In development, still show the link
-        print(f"\nPassword reset link: {request.url_root}reset-password/{reset_token}\n")
+        print(f"\nPassword reset link: {reset_link}\n")
         return False
 
 
-# This function processes a batch of faculty members in parallel for faster matching
-# Instead of checking all labs one by one, we split them into batches and process multiple batches at once
-def process_faculty_batch(faculty_batch, resume_info, batch_num, total_batches):
-    """Process a batch of faculty members and return match scores using AI."""
-    if not client:
-        return []
+def _make_llm_cache():
+    """LLM response cache in the instance folder (LLM_CACHE_TTL=0 turns it off)."""
+    ttl = float(os.environ.get("LLM_CACHE_TTL", str(7 * 86400)))
+    if ttl <= 0:
+        return None
+    path = os.environ.get("LLM_CACHE_PATH") or os.path.join(app.instance_path, "llm_cache.sqlite")
     try:
-        # Create concise summaries for this batch (optimized for speed)
-        # We use a more compact format to reduce token count and processing time
-        faculty_summaries = []
-        for pi in faculty_batch:
-            # More concise format to reduce token count and processing time
-            summary = f"{pi.get('name', '')} ({pi.get('id', '')}): {pi.get('research_areas', '')}"
-            if pi.get('lab_techniques'):
-                summary += f" | Techniques: {(pi.get('lab_techniques') or '')[:100]}"  # Truncate long technique lists
-            summary += f" | {pi.get('department', '')}, {pi.get('school', '')}"
-            faculty_summaries.append(summary)
-        
-        faculty_text = "\n".join(faculty_summaries)
-        
-        # Build the prompt we'll send to the AI - optimized for faster processing
-        # This tells the AI what we want it to do and how to score matches
-        prompt = f"""Match student resume with compatible labs. Return JSON array only.
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        return LLMResponseCache(
+            path,
+            ttl=ttl,
+            max_bytes=int(float(os.environ.get("LLM_CACHE_MAX_MB", "64")) * 1024 * 1024),
+        )
+    except Exception as e:
+        app.logger.warning(f"LLM response cache disabled: {e}")
+        return None
+
+
+# Identical prompts (same model, messages, temperature, max_tokens) reuse the stored
+# response; "regenerate" requests skip the lookup and replace it
+llm_cache = _make_llm_cache()
+
+
+def _make_job_queue():
+    """Background job queue in the instance folder (JOB_QUEUE_PATH), shared by the workers on this host."""
+    path = os.environ.get("JOB_QUEUE_PATH") or os.path.join(app.instance_path, "jobs.sqlite")
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    return JobQueue(path, workers=int(os.environ.get("JOB_WORKERS", "2")), logger=app.logger, name="jobs")
+
+
+job_queue = _make_job_queue()
+
+
+def _job_handler(kind):
+    """Register fn(job) with job_queue for `kind`; it runs inside an app context."""
+    from functools import wraps
+
+    def register(fn):
+        @wraps(fn)
+        def run(job):
+            with app.app_context():
+                return fn(job)
+        job_queue.handler(kind)(run)
+        return fn
+    return register
+
+
+def _cached_completion(messages, temperature, max_tokens=None, timeout=None, regenerate=False, cache=True):
+    """Text of a chat completion, served from llm_cache when the same prompt was answered before.
+
+    regenerate skips the lookup but stores the new answer; cache=False bypasses llm_cache entirely.
+    """
+    key = llm_cache.key(GPT_MODEL, messages, temperature, max_tokens) if llm_cache and cache else None
+    if key and not regenerate:
+        cached = llm_cache.get(key)
+        if cached is not None:
+            openai_requests.inc(outcome="cached")
+            return cached
+    kwargs = {"model": GPT_MODEL, "messages": messages, "temperature": temperature}
+    if max_tokens is not None:
+        kwargs["max_tokens"] = max_tokens
+    if timeout is not None:
+        kwargs["timeout"] = timeout
+    try:
+        with metrics.span(span_latency, span="openai_chat"):
+            completion = client.chat.completions.create(**kwargs)
+    except Exception:
+        openai_requests.inc(outcome="error")
+        raise
+    openai_requests.inc(outcome="ok")
+    _record_openai_usage(completion.usage)
+    text = completion.choices[0].message.content
+    if key and text:
+        llm_cache.put(key, text, model=GPT_MODEL, usage=completion.usage)
+    return text
+
+
+def _wants_regenerate():
+    """True when the form/query asks for a fresh draft instead of a cached one."""
+    return (request.values.get("regenerate") or "").lower() in ("1", "true", "yes", "on")
+
+
+def _match_summary(pi):
+    """One line per lab in the AI matching prompt (compact to keep the token count down)."""
+    summary = f"{pi.get('name', '')} ({pi.get('id', '')}): {pi.get('research_areas', '')}"
+    if pi.get('lab_techniques'):
+        summary += f" | Techniques: {(pi.get('lab_techniques') or '')[:100]}"  # Truncate long technique lists
+    summary += f" | {pi.get('department', '')}, {pi.get('school', '')}"
+    return summary
+
+
+def _match_batch_messages(faculty_text, resume_info, batch_num, total_batches):
+    # Build the prompt we'll send to the AI - optimized for faster processing
+    # This tells the AI what we want it to do and how to score matches
+    prompt = f"""Match student resume with compatible labs. Return JSON array only.
 
 STUDENT: {resume_info[:500]}
 
@@ -1348,61 +1451,287 @@ Scoring (40% research match, 25% skills, 15% level, 10% dept, 10% impact):
 
 Return JSON array: [{{"pi_id": "id", "score": 85, "reason": "brief reason"}}]
 Only include labs with score >= 50. Rank highest to lowest."""
+    return [
+        {"role": "system", "content": "You are a lab matching algorithm. Return only valid JSON arrays, no markdown."},
+        {"role": "user", "content": prompt}
+    ]
 
-        # Send the prompt to OpenAI and get back match scores
-        # We use a low temperature (0.2) to get more consistent, reliable results
-        # The OpenAI client handles timeouts internally, and we limit tokens for faster processing
-        completion = client.chat.completions.create(
-            model=GPT_MODEL,
-            messages=[
-                {"role": "system", "content": "You are a lab matching algorithm. Return only valid JSON arrays, no markdown."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.2,
-            max_tokens=2000,  # Limit response length for faster processing
-        )
-        
-        response_text = completion.choices[0].message.content
-        
-        # The AI might return JSON in different formats, so we try to extract it
-        # First, look for a JSON array in the response
-        json_match = re.search(r'\[.*\]', response_text, re.DOTALL)
-        if json_match:
+
+# The model answers with up to this many tokens per batch (about 30 per matched lab)
+AI_MATCH_MAX_TOKENS = 2000
+AI_MATCH_MAX_PER_BATCH = 50
+
+
+def _parse_match_response(response_text):
+    # The AI might return JSON in different formats, so we try to extract it
+    # First, look for a JSON array in the response
+    json_match = re.search(r'\[.*\]', response_text or "", re.DOTALL)
+    if json_match:
+        try:
+            return json.loads(json_match.group())
+        except json.JSONDecodeError:
+            # Sometimes the AI wraps it in an object, so try that too
             try:
-                matches_data = json.loads(json_match.group())
-                return matches_data
-            except json.JSONDecodeError:
-                # Sometimes the AI wraps it in an object, so try that too
-                try:
-                    full_json = json.loads(response_text)
-                    if 'matches' in full_json:
-                        return full_json['matches']
-                    elif isinstance(full_json, list):
-                        return full_json
-                    else:
-                        return []
-                except:
+                full_json = json.loads(response_text)
+                if 'matches' in full_json:
+                    return full_json['matches']
+                elif isinstance(full_json, list):
+                    return full_json
+                else:
                     return []
-        else:
-            return []
-            
-    except Exception as e:
-        # If something goes wrong, just return an empty list
-        # The caller will handle this gracefully
-        print(f"Error processing batch {batch_num + 1}: {str(e)}")
+            except:
+                return []
+    else:
         return []
 
 
-# Routes - these define what happens when users visit different pages
+def _score_faculty_batch(summaries, resume_info, batch_num, total_batches):
+    """LLM match scores for one batch of _match_summary lines. API errors propagate (for retries)."""
+    # We use a low temperature (0.2) to get more consistent, reliable results
+    response_text = _cached_completion(
+        _match_batch_messages("\n".join(summaries), resume_info, batch_num, total_batches),
+        temperature=0.2,
+        max_tokens=AI_MATCH_MAX_TOKENS,  # Limit response length for faster processing
+    )
+    return _parse_match_response(response_text)
 
-@app.context_processor
-def inject_admin():
-    """Make is_admin and current_year available in all templates."""
-    import datetime as _dt
-    return {"is_admin": session.get("is_admin", False), "current_year": _dt.datetime.now().year}
+
+# This function processes a batch of faculty members in parallel for faster matching
+# Instead of checking all labs one by one, we split them into batches and process multiple batches at once
+def process_faculty_batch(faculty_batch, resume_info, batch_num, total_batches):
+    """Process a batch of faculty members and return match scores using AI."""
+    if not client:
+        return []
+    try:
+        return _score_faculty_batch([_match_summary(pi) for pi in faculty_batch], resume_info, batch_num, total_batches)
+    except Exception as e:
+        # If something goes wrong, just return an empty list
+        # The caller will handle this gracefully
+        print(f"Error processing batch {batch_num + 1}: {str(e)}")
+        return []
+
+
+def _is_retryable_openai_error(e):
+    """Rate limits, timeouts, dropped connections and 5xx are worth another try; bad requests are not."""
+    import openai
+
+    return isinstance(e, (openai.RateLimitError, openai.APIConnectionError, openai.InternalServerError))
+
+
+@_timed("ai_match")
+def _ai_match_candidates(resume_info):
+    """The AI_MATCH_CANDIDATES labs most relevant to a resume, best first.
+
+    Keyword-ranked in every mode: USE_MATCHING_V2=false only switches the /matches
+    service, so the v2 prefilter for the current faculty generation is used here
+    regardless. Without the matching package, the typeahead index ranks the labs
+    by the resume's words.
+    """
+    store = get_faculty_store()
+    service = get_matching_service()
+    if not hasattr(service, "prefilter") and HAS_MATCHING and len(store):
+        service = _matching_service_for_store(store)
+    if service is not None and hasattr(service, "prefilter"):
+        return service.prefilter(resume_info, limit=AI_MATCH_CANDIDATES)
+    words = sorted({w for w in re.findall(r"[a-z0-9]+", resume_info.lower()) if len(w) >= 4})
+    positions = get_search_index(store).search_ids(" ".join(words), limit=AI_MATCH_CANDIDATES)
+    return [store.records[i] for i in positions]
+
+
+def ai_match_faculty(resume_info, top_k=20):
+    """LLM-scored lab matches for a resume: [{"pi", "score", "reason"}], best first.
+
+    Only the AI_MATCH_CANDIDATES labs the v2 matcher ranks highest are sent to the
+    model, packed into batches of about AI_MATCH_BATCH_TOKENS prompt tokens that
+    run AI_MATCH_CONCURRENCY at a time. Failed batches are retried with backoff,
+    then skipped.
+    """
+    if not client or not resume_info:
+        return []
+    started = _time.perf_counter()
+    candidates = _ai_match_candidates(resume_info)
+    if not candidates:
+        return []
+
+    summaries = [_match_summary(pi) for pi in candidates]
+    overhead = sum(estimate_tokens(m["content"]) for m in _match_batch_messages("", resume_info, 0, 1))
+    batches = pack_by_budget(
+        summaries,
+        estimate_tokens,
+        budget=max(1, AI_MATCH_BATCH_TOKENS - overhead),
+        max_items=AI_MATCH_MAX_PER_BATCH,
+    )
+    total = len(batches)
+    results = map_with_retry(
+        lambda item: _score_faculty_batch(item[1], resume_info, item[0], total),
+        list(enumerate(batches)),
+        max_workers=AI_MATCH_CONCURRENCY,
+        retries=3,
+        retryable=_is_retryable_openai_error,
+    )
+
+    lookup = get_faculty_store().lookup()
+    best = {}
+    for batch_num, (matches_data, error) in enumerate(results):
+        if error is not None:
+            app.logger.warning(f"AI matching batch {batch_num + 1}/{total} failed: {error}")
+            continue
+        for m in matches_data or []:
+            if not isinstance(m, dict):
+                continue
+            pi = lookup.resolve(str(m.get("pi_id") or ""))
+            try:
+                score = float(m.get("score") or 0)
+            except (TypeError, ValueError):
+                continue
+            if pi is None or score < 50:
+                continue
+            if pi["id"] not in best or score > best[pi["id"]]["score"]:
+                best[pi["id"]] = {"pi": pi, "score": score, "reason": m.get("reason", "")}
+    ranked = sorted(best.values(), key=lambda r: -r["score"])[:top_k]
+    app.logger.info(
+        f"AI matching: {len(candidates)} candidates in {total} batches "
+        f"(~{overhead * total + sum(map(estimate_tokens, summaries))} prompt tokens), "
+        f"{len(ranked)} matches in {_time.perf_counter() - started:.2f}s"
+    )
+    return ranked
+
+
+# Routes - these define what happens when users visit different pages
+
+@app.context_processor
+def inject_admin():
+    """Make is_admin and current_year available in all templates."""
+    import datetime as _dt
+    return {"is_admin": session.get("is_admin", False), "current_year": _dt.datetime.now().year}
+
+# Request metrics: registered before the other hooks so every request is counted
+@app.before_request
+def _start_request_metrics():
+    g.metrics_started = _time.perf_counter()
+    # Endpoint names, not paths, keep the label set small (unknown URLs are "unmatched")
+    g.metrics_endpoint = request.endpoint or "unmatched"
+    http_in_flight.inc(endpoint=g.metrics_endpoint)
+
+
+@app.after_request
+def _record_response_status(response):
+    g.metrics_status = response.status_code
+    return response
+
+
+@app.teardown_request
+def _finish_request_metrics(exc=None):
+    started = g.pop("metrics_started", None)
+    if started is None:
+        return
+    endpoint = g.pop("metrics_endpoint")
+    http_in_flight.dec(endpoint=endpoint)
+    # Streamed responses are timed until the response object is returned, not the last byte
+    http_latency.observe(_time.perf_counter() - started, endpoint=endpoint)
+    http_requests.inc(endpoint=endpoint, method=request.method, status=g.pop("metrics_status", 500))
+
+
+# Per-request profiling: an admin appends ?__profile=1 to any URL (see /admin/profiles)
+request_profiles = ProfileStore(
+    os.getenv("PROFILE_DIR") or os.path.join(app.instance_path, "profiles"),
+    keep=int(os.getenv("PROFILE_KEEP", "50")),
+)
+
+
+def _is_admin_user():
+    """Same check as admin_required, without the redirects."""
+    if not session.get("user_id") or not ADMIN_EMAILS_SET:
+        return False
+    return _session_authorization() is None and bool(session.get("is_admin"))
+
+
+@app.before_request
+def _start_request_profile():
+    if request.args.get("__profile") != "1" or not _is_admin_user():
+        return
+    profiler = request_profiles.start()
+    if profiler is None:
+        app.logger.warning(f"Not profiling {request.path}: another profiler is active")
+        return
+    g.profiler = profiler
+    g.profile_started = _time.perf_counter()
+
+
+def _save_request_profile(status):
+    profiler = g.pop("profiler", None)
+    if profiler is None:
+        return None
+    seconds = _time.perf_counter() - g.pop("profile_started")
+    try:
+        profile_id = request_profiles.save(
+            profiler,
+            method=request.method,
+            path=request.full_path.rstrip("?"),
+            endpoint=request.endpoint,
+            status=status,
+            seconds=round(seconds, 4),
+        )
+    except OSError as e:
+        app.logger.error(f"Could not save request profile: {e}")
+        return None
+    app.logger.info(f"Profiled {request.method} {request.path} ({seconds:.3f}s) as {profile_id}")
+    return profile_id
+
+
+@app.after_request
+def _finish_request_profile(response):
+    # Streamed bodies are produced after this point and are not part of the profile
+    profile_id = _save_request_profile(response.status_code)
+    if profile_id:
+        response.headers["X-Profile-Id"] = profile_id
+    return response
+
+
+@app.teardown_request
+def _discard_request_profile(exc=None):
+    # after_request is skipped when the view raises; keep the capture of the failure
+    _save_request_profile(500)
 
 # Track page views for admin dashboard (GET requests to main pages only)
 _PAGE_VIEW_PATHS = frozenset(["/", "/general", "/matches", "/login", "/signup", "/saved", "/account", "/onboarding", "/help", "/draft-email", "/bulk-email"])
+
+
+def _flush_page_views(counts):
+    """Add buffered per-path view counts to SiteStats and PageViewCount in one transaction."""
+    total = sum(counts.values())
+    with app.app_context():
+        try:
+            updated = db.session.execute(
+                db.update(SiteStats)
+                .where(SiteStats.id == 1)
+                .values(total_page_views=db.func.coalesce(SiteStats.total_page_views, 0) + total)
+            ).rowcount
+            if not updated:
+                db.session.add(SiteStats(id=1, total_page_views=total))
+            for path, n in counts.items():
+                updated = db.session.execute(
+                    db.update(PageViewCount)
+                    .where(PageViewCount.path == path)
+                    .values(views=db.func.coalesce(PageViewCount.views, 0) + n)
+                ).rowcount
+                if not updated:
+                    db.session.add(PageViewCount(path=path, views=n))
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+
+
+# Page views are counted in process and flushed every PAGE_VIEW_FLUSH_SECONDS (and at exit)
+page_view_counter = BufferedCounter(
+    _flush_page_views,
+    interval=float(os.environ.get("PAGE_VIEW_FLUSH_SECONDS", "5")),
+    logger=app.logger,
+    name="page views",
+)
+
+
 @app.before_request
 def _increment_page_views():
     if request.method != "GET":
@@ -1410,15 +1739,7 @@ def _increment_page_views():
     path = request.path.rstrip("/") or "/"
     if path not in _PAGE_VIEW_PATHS:
         return
-    try:
-        row = SiteStats.query.get(1)
-        if row is None:
-            row = SiteStats(id=1, total_page_views=0)
-            db.session.add(row)
-        row.total_page_views = (row.total_page_views or 0) + 1
-        db.session.commit()
-    except Exception:
-        pass  # Don't break the request if stats fail
+    page_view_counter.incr(path)
 
 @app.route("/test-gpt")
 @require_authorized_user
@@ -1510,60 +1831,54 @@ def index():
     return render_template("index.html")
 
 
+# Ranked /api/search-pis record positions, keyed by (data version, normalized query)
+_search_results_cache = LRUCache(max_entries=2048)
+
+
 @app.route("/api/search-pis")
 @require_authorized_user
+@rate_limited(search_limiter)
 def api_search_pis():
     """Server-side PI search across ALL faculty. Returns top 20 matches as JSON."""
-    query = request.args.get("q", "").strip().lower()
+    query = " ".join(request.args.get("q", "").lower().split())
     if not query or len(query) < 2:
         return jsonify([])
 
-    all_faculty = _faculty_cache.get("data") or load_faculty()
-    terms = query.split()
-
-    scored = []
-    for pi in all_faculty:
-        name = (pi.get("name") or "").lower()
-        institution = (pi.get("school") or "").lower()
-        department = (pi.get("department") or "").lower()
-        research = (pi.get("research_areas") or "").lower()
-        techniques = (pi.get("lab_techniques") or "").lower()
-
-        score = 0
-        for term in terms:
-            if term in name:
-                score += 5
-            if term in department:
-                score += 4
-            if term in research:
-                score += 3
-            if term in institution:
-                score += 2
-            if term in techniques:
-                score += 1
-
-        if score > 0:
-            scored.append((score, pi))
-
-    scored.sort(key=lambda x: -x[0])
-    top = scored[:20]
-
-    # Determine saved PIs for current user
-    user_id = session.get("user_id")
-    saved_ids = set()
-    if user_id:
-        saved_rows = SavedPI.query.filter_by(user_id=user_id).all()
-        saved_ids = {row.pi_id for row in saved_rows}
+    store = get_faculty_store()
+    cache_key = (store.data_version, query)
+    positions = _search_results_cache.get(cache_key)
+    if positions is None:
+        fts = get_faculty_fts(store)
+        positions = fts.search_pis(query, limit=20) if fts else None
+        if positions is None:
+            # Same weights as before (name 5, department 4, research 3, school 2, techniques 1)
+            positions = get_search_index(store).search_ids(query, limit=20)
+        positions = tuple(positions)
+        _search_results_cache.put(cache_key, positions)
+    top = [store.records[i] for i in positions]
+
+    # Per-user saved flags are an overlay on the shared ranking
+    saved_ids = get_saved_pi_ids(session.get("user_id"))
+    saved_in_top = [pi.get("id", "") for pi in top if pi.get("id", "") in saved_ids]
+
+    etag = hashlib.sha1(
+        "|".join([store.data_version, query, ",".join(saved_in_top)]).encode("utf-8")
+    ).hexdigest()
+    if request.if_none_match.contains(etag):
+        response = app.response_class(status=304)
+        response.set_etag(etag)
+        response.headers["Cache-Control"] = "private, no-cache"
+        return response
 
     results = []
-    for _score, pi in top:
+    for pi in top:
         pi_id = pi.get("id", "")
         results.append({
             "id": pi_id,
             "name": pi.get("name", ""),
             "school": pi.get("school", ""),
             "department": pi.get("department", ""),
-            "dept_field": dept_field_key(pi.get("department", "")),
+            "dept_field": DEPARTMENT_CLASSIFIER.category_for(pi),
             "email": pi.get("email", ""),
             "h_index": pi.get("h_index", ""),
             "location": pi.get("specific_location") or pi.get("location", ""),
@@ -1576,7 +1891,10 @@ def api_search_pis():
             "is_saved": pi_id in saved_ids,
         })
 
-    return jsonify(results)
+    response = jsonify(results)
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = "private, no-cache"
+    return response
 
 
 @app.route("/general")
@@ -1605,16 +1923,14 @@ def general():
 
     # If searching for a specific PI, set filters to show that PI's context
     if search_pi:
-        all_fac = _faculty_cache.get("data") or load_faculty()
-        for pi in all_fac:
-            if pi.get("id") == search_pi:
-                selected_school = pi.get("school", "")
-                dept = pi.get("department", "")
-                selected_dept_category = dept_field_key(dept)
-                if selected_dept_category == "default":
-                    selected_dept_category = ""
-                selected_subfield = dept
-                break
+        pi = get_faculty_store().lookup().get_by_id(search_pi)
+        if pi:
+            selected_school = pi.get("school", "")
+            dept = pi.get("department", "")
+            selected_dept_category = DEPARTMENT_CLASSIFIER.category_for(pi)
+            if selected_dept_category == "default":
+                selected_dept_category = ""
+            selected_subfield = dept
 
     choices = get_filter_choices(
         selected_school=selected_school,
@@ -1636,40 +1952,26 @@ def general():
     if selected_location and selected_location not in locations:
         selected_location = ""
 
-    all_faculty = load_faculty()
-    filtered = []
-    for pi in all_faculty:
-        pi_school = pi.get("school") or pi.get("institution") or ""
-        pi_dept = pi.get("department") or ""
-        if selected_school and pi_school != selected_school:
-            continue
-        if selected_dept_category:
-            pi_cat = dept_field_key(pi_dept)
-            if pi_cat != selected_dept_category:
-                continue
-        if selected_subfield and pi_dept != selected_subfield:
-            continue
-        if selected_location:
-            pi_location = pi.get("specific_location") or pi.get("location") or ""
-            if selected_location not in pi_location:
-                continue
-        filtered.append(pi)
-
-    # Prioritize PIs with email + website (rich data) first; NSF-only later
-    filtered.sort(key=_pi_display_priority, reverse=True)
-
+    # Filtered set comes from the facet bitmaps, already in display-priority order
+    # (PIs with email + website first; NSF-only later), so a page is just a slice
     per_page = 15
-    total_count = len(filtered)
+    facet_index = get_facet_index()
+    selected = {
+        "school": selected_school,
+        "dept_category": selected_dept_category,
+        "subfield": selected_subfield,
+        "location": selected_location,
+    }
+    total_count = facet_index.count(selected)
     total_pages = max(1, (total_count + per_page - 1) // per_page)
     page = min(page, total_pages)
     start = (page - 1) * per_page
-    faculty_list = filtered[start : start + per_page]
+    _, faculty_list = facet_index.page(selected, start, per_page)
 
     saved_pi_ids = set()
     user_id = session.get("user_id")
     if user_id:
-        saved_rows = SavedPI.query.filter_by(user_id=user_id).all()
-        saved_pi_ids = {row.pi_id for row in saved_rows}
+        saved_pi_ids = get_saved_pi_ids(user_id)
 
     def pagination_query(p):
         q = {}
@@ -1710,21 +2012,108 @@ def general():
     )
 
 
-# Cache dropdown option lists derived from faculty (invalidate when faculty count changes)
-_tag_match_ui_cache = {"n": 0, "options": None}
+def get_tag_match_ui_options(store=None):
+    """Build research/work dropdowns from live faculty data (memoized per faculty generation)."""
+    store = store or get_faculty_store()
+    return store.derived(
+        "tag_match_ui_options",
+        lambda: build_tag_match_dropdown_options(store.records, DEPARTMENT_CLASSIFIER, DEPT_CATEGORY_DISPLAY),
+    )
 
 
-def get_tag_match_ui_options():
-    """Build research/work dropdowns from live faculty data (fast, in-process cache)."""
-    global _tag_match_ui_cache
-    faculty = load_faculty()
-    n = len(faculty)
-    if _tag_match_ui_cache["options"] is not None and _tag_match_ui_cache["n"] == n:
-        return _tag_match_ui_cache["options"]
-    opts = build_tag_match_dropdown_options(faculty, dept_field_key, DEPT_CATEGORY_DISPLAY)
-    _tag_match_ui_cache["options"] = opts
-    _tag_match_ui_cache["n"] = n
-    return opts
+# Structures derived from a faculty generation, rebuilt by _warm_faculty_store on refresh
+_FACULTY_DERIVED_BUILDERS = {
+    "facet_index": get_facet_index,
+    "matching_service": _matching_service_for_store,
+    "search_index": get_search_index,
+    "faculty_fts": get_faculty_fts,
+    "tag_match_ui_options": get_tag_match_ui_options,
+    "pi_lookup": lambda store: store.lookup(),
+}
+
+
+def _warm_up_steps():
+    """(name, step) for everything the first /general, /matches or /api/search-pis would otherwise build."""
+    steps = [("faculty_store", get_faculty_store)]
+    for key, builder in _FACULTY_DERIVED_BUILDERS.items():
+        if key == "matching_service":
+            # Honors USE_MATCHING_V2 (and the legacy sources)
+            steps.append((key, get_matching_service))
+        else:
+            steps.append((key, lambda builder=builder: builder(get_faculty_store())))
+    if client:
+        # Import the OpenAI SDK now rather than on the first AI request
+        steps.append(("openai_client", lambda: client.chat))
+    return steps
+
+
+# Started by create_app; /healthz/ready answers 503 until every step has run
+warm_up = WarmUp(_warm_up_steps(), logger=app.logger, name="warm-up")
+
+
+@app.route("/healthz/ready")
+def healthz_ready():
+    """Readiness probe: 200 once warm-up has built every in-memory structure, else 503."""
+    warm_up.start()
+    status = warm_up.status()
+    status["boot"] = BOOT_TIMINGS
+    return jsonify(status), 200 if status["ready"] else 503
+
+
+@metrics.collector
+def _collect_cache_metrics():
+    """Stats the caches and background helpers already keep, as gauges at scrape time."""
+    store = _faculty_generation.peek()
+    yield "faculty_records", "gauge", "Records in the current faculty generation.", [({}, len(store) if store else 0)]
+    yield stats_gauges("faculty_refresh", "Faculty store refreshes (stale-while-revalidate).", _faculty_generation.stats)
+    yield stats_gauges(
+        "department_classifier",
+        "Department classifier memo hits and misses.",
+        {"hits": DEPARTMENT_CLASSIFIER.hits, "misses": DEPARTMENT_CLASSIFIER.misses},
+    )
+    yield stats_gauges("search_results_cache", "Ranked PI search results LRU.", _search_results_cache.stats())
+    yield stats_gauges("saved_pi_cache", "Per-user saved PI id cache.", saved_pi_cache.stats())
+    yield stats_gauges(
+        "page_view_counter",
+        "Buffered page view counter.",
+        {
+            "pending": sum(page_view_counter.pending().values()),
+            "flushes": page_view_counter.flush_count,
+            "flush_errors": page_view_counter.flush_errors,
+        },
+    )
+    for limiter in (login_limiter, search_limiter, llm_limiter):
+        yield stats_gauges(f"rate_limit_{limiter.name}", f"{limiter.name} rate limiter: requests allowed and refused (this worker).", limiter.stats())
+    yield stats_gauges("admin_summary_refresh", "Admin summary table refreshes by this worker.", admin_summary_refresher.stats())
+    yield stats_gauges("jobs", "Background jobs by status (this host) and this worker's outcomes.", job_queue.stats())
+    if outbox_sender is not None:
+        yield stats_gauges("outbox_sender", "Outbox deliveries by this worker and SMTP connections opened.", outbox_sender.stats())
+        by_status = db.session.query(EmailOutbox.status, db.func.count(EmailOutbox.id)).group_by(EmailOutbox.status).all()
+        yield "email_outbox", "gauge", "Outbox messages by status.", [({"status": status}, n) for status, n in by_status]
+    if llm_cache:
+        yield stats_gauges("llm_cache", "LLM response cache (per-worker counters, stored totals).", llm_cache.stats())
+    yield "warm_up_ready", "gauge", "1 once start-up warm-up has finished.", [({}, int(warm_up.ready))]
+    yield (
+        "warm_up_step_seconds",
+        "gauge",
+        "Build time of each warm-up step.",
+        [({"step": name}, entry["seconds"]) for name, entry in warm_up.status()["steps"].items()],
+    )
+    yield stats_gauges("boot_seconds", "Start-up timings (import, migrations, ready).", BOOT_TIMINGS)
+
+
+def _metrics_response():
+    return Response(metrics.render(), mimetype="text/plain; version=0.0.4")
+
+
+@app.route("/metrics")
+def metrics_endpoint():
+    """Prometheus metrics for this worker: admins, or Authorization: Bearer $METRICS_TOKEN (for scrapers)."""
+    token = os.getenv("METRICS_TOKEN")
+    supplied = request.headers.get("Authorization", "").encode()
+    if token and secrets.compare_digest(supplied, f"Bearer {token}".encode()):
+        return _metrics_response()
+    return admin_required(_metrics_response)()
 
 
 @app.route("/matches", methods=["GET", "POST"])
@@ -1734,8 +2123,7 @@ def matches():
     user_id = session.get("user_id")
     faculty = load_faculty()
     ui_options = get_tag_match_ui_options()
-    saved_rows = SavedPI.query.filter_by(user_id=user_id).all()
-    saved_pi_ids = set(sp.pi_id for sp in saved_rows)
+    saved_pi_ids = get_saved_pi_ids(user_id)
 
     results = None
     form_values = {
@@ -1770,16 +2158,17 @@ def matches():
         if not ok:
             flash("Please choose an option for every question.", "warning")
         else:
-            results = rank_professors_for_answers(
-                faculty,
-                research_area,
-                work_type,
-                involvement,
-                year,
-                dept_field_key,
-                DEPT_CATEGORY_DISPLAY,
-                top_k=5,
-            )
+            with metrics.span(span_latency, span="tag_match"):
+                results = rank_professors_for_answers(
+                    faculty,
+                    research_area,
+                    work_type,
+                    involvement,
+                    year,
+                    DEPARTMENT_CLASSIFIER,
+                    DEPT_CATEGORY_DISPLAY,
+                    top_k=5,
+                )
 
     return render_template(
         "my_matches.html",
@@ -1815,6 +2204,7 @@ def save_pi(pi_id=None):
         saved = SavedPI(user_id=user_id, pi_id=pi_id, pi_email=pi_email or None)
         db.session.add(saved)
         db.session.commit()
+        saved_pi_cache.invalidate(user_id)
         flash(f"Saved {pi_id}!", "success")
         saved_status = True
     else:
@@ -1872,22 +2262,16 @@ def saved_pis():
     if not user_id:
         return redirect(url_for("login"))
 
-    # Load all faculty data and create lookup dictionaries (by id and by name)
-    all_faculty = load_faculty()
-    pi_by_id = {pi["id"]: pi for pi in all_faculty}
-    pi_by_name = {pi.get("name", "").lower(): pi for pi in all_faculty if pi.get("name")}
+    lookup = get_faculty_store().lookup()
 
     # Get all the saved PI IDs for this user
-    saved_rows = SavedPI.query.filter_by(user_id=user_id).all()
+    saved_ids = saved_pi_cache.ordered(user_id)
     # Convert the saved IDs back into full PI data
     # Try lookup by id first, then by name (since matches page uses name as id)
     saved_pis_data = []
     seen_names = set()  # Avoid duplicates
-    for row in saved_rows:
-        pi = pi_by_id.get(row.pi_id)
-        if not pi:
-            # Try looking up by name (case-insensitive)
-            pi = pi_by_name.get(row.pi_id.lower())
+    for saved_id in saved_ids:
+        pi = lookup.resolve(saved_id)
         if pi and pi.get("name") not in seen_names:
             saved_pis_data.append(pi)
             seen_names.add(pi.get("name"))
@@ -1907,53 +2291,13 @@ def unsave_pi(pi_id):
     if saved:
         db.session.delete(saved)
         db.session.commit()
+        saved_pi_cache.invalidate(user_id)
 
     return redirect(url_for("saved_pis"))
 
-@app.route("/bulk-email", methods=["GET", "POST"])
-def bulk_email():
-    """Generate emails for multiple saved PIs at once."""
-    user_id = session.get("user_id")
-    if not user_id:
-        return redirect(url_for("login"))
-    
-    # Get user's saved PIs
-    all_faculty = load_faculty()
-    pi_by_id = {pi["id"]: pi for pi in all_faculty}
-    saved_rows = SavedPI.query.filter_by(user_id=user_id).all()
-    saved_pis_data = [pi_by_id.get(row.pi_id) for row in saved_rows if row.pi_id in pi_by_id]
-    
-    # Get user info
-    user = User.query.get(user_id)
-    user_resume = Resume.query.filter_by(user_id=user_id).order_by(Resume.uploaded_at.desc()).first()
-    
-    if request.method == "POST":
-        selected_pi_ids = request.form.getlist("pi_ids")
-        student_name = request.form.get("student_name", user.username).strip()
-        student_email = request.form.get("student_email", user.email).strip()
-        student_background = request.form.get("student_background", "").strip()
-        research_interest = request.form.get("research_interest", "").strip()
-        
-        if not selected_pi_ids:
-            flash("Please select at least one PI.", "error")
-            return redirect(url_for("bulk_email"))
-        if not client:
-            flash("Set OPENAI_API_KEY in .env to use email generation.", "warning")
-            return redirect(url_for("bulk_email"))
-        
-        generated_emails = []
-        for pi_id in selected_pi_ids:
-            pi = get_faculty_by_id(pi_id)
-            if not pi:
-                continue
-            
-            try:
-                # Use same enhanced prompt as single email
-                resume_context = ""
-                if user_resume and user_resume.resume_text:
-                    resume_context = f"\nStudent's Resume Summary: {user_resume.resume_text[:500]}"
-                
-                prompt = f"""Write a professional, personalized cold email to {pi.get('name', '')}, {pi.get('title', '')} at {pi.get('department', '')}, {pi.get('school', '')}.
+def _bulk_email_prompt(pi, student_name, student_email, student_background, research_interest, resume_context=""):
+    """Prompt for one PI's cold email in /bulk-email."""
+    return f"""Write a professional, personalized cold email to {pi.get('name', '')}, {pi.get('title', '')} at {pi.get('department', '')}, {pi.get('school', '')}.
 
 PI INFORMATION:
 - Name: {pi.get('name', '')}
@@ -1981,75 +2325,278 @@ Dear Dr. [Last Name],
 Best regards,
 {student_name}"""
 
-                completion = client.chat.completions.create(
-                    model=GPT_MODEL,
-                    messages=[
-                        {"role": "system", "content": "You are an expert at writing professional academic emails. Create personalized, specific emails that show genuine research interest."},
-                        {"role": "user", "content": prompt}
-                    ],
-                    temperature=0.7,
-                )
-                
-                email_draft = completion.choices[0].message.content
-                generated_emails.append({
-                    "pi": pi,
-                    "draft": email_draft,
-                    "pi_email": pi.get("email", "")
-                })
+
+def _bulk_email_messages(prompt):
+    return [
+        {"role": "system", "content": "You are an expert at writing professional academic emails. Create personalized, specific emails that show genuine research interest."},
+        {"role": "user", "content": prompt}
+    ]
+
+
+def _bulk_email_inputs(user_id, form, user=None):
+    """(pis, prompts) for a /bulk-email form submission, in selection order."""
+    student_name = form.get("student_name", user.username if user else "").strip()
+    student_email = form.get("student_email", user.email if user else "").strip()
+    student_background = form.get("student_background", "").strip()
+    research_interest = form.get("research_interest", "").strip()
+    resume_context = _resume_context(user_id)
+    pis = [pi for pi in (get_faculty_by_id(pi_id) for pi_id in form.getlist("pi_ids")) if pi]
+    prompts = [
+        _bulk_email_prompt(pi, student_name, student_email, student_background, research_interest, resume_context)
+        for pi in pis
+    ]
+    return pis, prompts
+
+
+def _generate_bulk_email_draft(prompt, regenerate=False):
+    """One /bulk-email completion (bounded by BULK_EMAIL_TIMEOUT)."""
+    return _cached_completion(
+        _bulk_email_messages(prompt), temperature=0.7, timeout=BULK_EMAIL_TIMEOUT, regenerate=regenerate
+    )
+
+
+def _stream_completion(messages, temperature, timeout, cancel=None, regenerate=False, cache=True):
+    """Yield text deltas of a streaming chat completion as they arrive.
+
+    A cached response is yielded in one piece; a streamed one is cached once it
+    has been read to the end (unless cache=False).
+    """
+    key = llm_cache.key(GPT_MODEL, messages, temperature, None) if llm_cache and cache else None
+    if key and not regenerate:
+        cached = llm_cache.get(key)
+        if cached is not None:
+            openai_requests.inc(outcome="cached")
+            yield cached
+            return
+    started = _time.perf_counter()
+    parts = []
+    usage = None
+    outcome = "error"
+    try:
+        stream = client.chat.completions.create(
+            model=GPT_MODEL,
+            messages=messages,
+            temperature=temperature,
+            timeout=timeout,
+            stream=True,
+            stream_options={"include_usage": True},
+        )
+        try:
+            for chunk in stream:
+                if cancel is not None and cancel.is_set():
+                    outcome = "cancelled"
+                    return
+                if getattr(chunk, "usage", None):
+                    usage = chunk.usage
+                if chunk.choices:
+                    delta = chunk.choices[0].delta.content
+                    if delta:
+                        parts.append(delta)
+                        yield delta
+            outcome = "ok"
+        finally:
+            stream.close()
+    finally:
+        # Whole stream, from request to last token (or until the reader went away)
+        span_latency.observe(_time.perf_counter() - started, span="openai_chat_stream")
+        openai_requests.inc(outcome=outcome)
+        _record_openai_usage(usage)
+    if key and parts:
+        llm_cache.put(key, "".join(parts), model=GPT_MODEL, usage=usage)
+
+
+SSE_KEEPALIVE_SECONDS = 15
+
+
+def _sse(event, data):
+    """One Server-Sent Events message."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def _sse_response(events):
+    return Response(
+        events,
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+def _bulk_email_events(prompts, regenerate=False):
+    """SSE stream of token/done/error events for every prompt, then "end".
+
+    Drafts stream concurrently (at most BULK_EMAIL_CONCURRENCY at once); every
+    event carries the prompt's index. If the client disconnects, the workers
+    stop reading their completions.
+    """
+    events = queue.Queue()
+    cancel = threading.Event()
+
+    def work(i, prompt):
+        parts = []
+        try:
+            for delta in _stream_completion(_bulk_email_messages(prompt), 0.7, BULK_EMAIL_TIMEOUT, cancel, regenerate):
+                parts.append(delta)
+                events.put(("token", {"index": i, "text": delta}))
+            events.put(("done", {"index": i, "draft": "".join(parts)}))
+        except Exception as e:
+            app.logger.warning(f"Streaming bulk email draft {i + 1}/{len(prompts)} failed: {e}")
+            events.put(("error", {"index": i, "error": str(e) or e.__class__.__name__}))
+
+    executor = ThreadPoolExecutor(max_workers=max(1, min(BULK_EMAIL_CONCURRENCY, len(prompts) or 1)))
+    for i, prompt in enumerate(prompts):
+        executor.submit(work, i, prompt)
+    remaining = len(prompts)
+    try:
+        while remaining:
+            try:
+                kind, data = events.get(timeout=SSE_KEEPALIVE_SECONDS)
+            except queue.Empty:
+                yield ": keepalive\n\n"
+                continue
+            if kind != "token":
+                remaining -= 1
+            yield _sse(kind, data)
+        yield _sse("end", {})
+    finally:
+        cancel.set()
+        executor.shutdown(wait=False)
+
+
+def _generate_drafts_concurrently(prompts, regenerate=False, on_result=None):
+    """Run _generate_bulk_email_draft over prompts, at most BULK_EMAIL_CONCURRENCY at a time.
+
+    Returns [(draft, error)] in input order; one failed PI does not affect the others.
+    on_result(i, draft, error) is called as each one finishes.
+    """
+    results = [(None, None)] * len(prompts)
+    if not prompts:
+        return results
+    with ThreadPoolExecutor(max_workers=max(1, min(BULK_EMAIL_CONCURRENCY, len(prompts)))) as executor:
+        futures = {
+            executor.submit(_generate_bulk_email_draft, prompt, regenerate): i for i, prompt in enumerate(prompts)
+        }
+        for future in as_completed(futures):
+            i = futures[future]
+            try:
+                results[i] = (future.result(), None)
             except Exception as e:
-                flash(f"Error generating email for {pi.get('name', 'PI')}: {str(e)}", "error")
-        
-        return render_template("bulk_email_results.html", emails=generated_emails)
-    
-    return render_template("bulk_email.html", saved_pis=saved_pis_data, user=user)
+                app.logger.warning(f"Bulk email draft {i + 1}/{len(prompts)} failed: {e}")
+                results[i] = (None, str(e) or e.__class__.__name__)
+            if on_result is not None:
+                on_result(i, *results[i])
+    return results
 
 
-@app.route("/draft-email", methods=["GET", "POST"])
-def draft_email():
-    """Generate a personalized email draft to send to a PI. This uses AI to write professional cold emails."""
+@_job_handler("bulk_email")
+def _bulk_email_job(job):
+    """Drafts for payload["prompts"]; the stored result fills in as each draft finishes."""
+    prompts = job.payload["prompts"]
+    drafts = [None] * len(prompts)
+    lock = threading.Lock()
+
+    def finished(i, draft, error):
+        with lock:
+            drafts[i] = {"draft": draft, "error": error}
+            job.update({"drafts": drafts})
+
+    _generate_drafts_concurrently(prompts, job.payload.get("regenerate", False), on_result=finished)
+    return {"drafts": drafts}
+
+
+@app.route("/bulk-email", methods=["GET", "POST"])
+# When drafts stream, this POST only renders the page and /bulk-email/stream is charged instead
+@rate_limited(llm_limiter, methods=("POST",), exempt=lambda: EMAIL_STREAMING and not EMAIL_JOBS)
+def bulk_email():
+    """Generate emails for multiple saved PIs at once."""
     user_id = session.get("user_id")
     if not user_id:
         return redirect(url_for("login"))
     
-    error = None
-    draft = None
-    # Get the PI ID from either the URL (if they clicked a link) or the form (if they submitted)
-    pi_id = request.args.get("pi_id") or (request.form.get("pi_id") if request.method == "POST" else None)
-    pi = None
+    # Get user's saved PIs
+    pi_by_id = get_faculty_store().lookup().by_id
+    saved_ids = saved_pi_cache.ordered(user_id)
+    saved_pis_data = [pi_by_id[pid] for pid in saved_ids if pid in pi_by_id]
     
-    if pi_id:
-        pi = get_faculty_by_id(pi_id)
+    # Get user info
+    user = User.query.get(user_id)
     
     if request.method == "POST":
-        pi_id = request.form.get("pi_id", "").strip()
-        student_name = request.form.get("student_name", "").strip()
-        student_email = request.form.get("student_email", "").strip()
+        selected_pi_ids = request.form.getlist("pi_ids")
+        student_name = request.form.get("student_name", user.username).strip()
+        student_email = request.form.get("student_email", user.email).strip()
         student_background = request.form.get("student_background", "").strip()
         research_interest = request.form.get("research_interest", "").strip()
         
-        if not pi_id:
-            error = "Please select a PI."
-        elif not student_name or not student_email:
-            error = "Please provide your name and email."
-        elif not client:
-            error = "Set OPENAI_API_KEY in .env to use email drafting."
-        else:
-            pi = get_faculty_by_id(pi_id)
-            if not pi:
-                error = "PI not found."
-            else:
-                try:
-                    # Get the user's resume to include context in the email
-                    user_resume = Resume.query.filter_by(user_id=user_id).order_by(Resume.uploaded_at.desc()).first()
-                    resume_context = ""
-                    if user_resume and user_resume.resume_text:
-                        # Only include the first 500 characters to keep the prompt manageable
-                        resume_context = f"\nStudent's Resume Summary: {user_resume.resume_text[:500]}"
-                    
-                    # Build a detailed prompt for the AI to generate a personalized email
-                    # We include all the PI's information and the student's background
-                    # The email should sound natural, human, and conversational - not robotic, overly formal, or edgy
-                    prompt = f"""Write a professional, personalized cold email to {pi.get('name', '')}, {pi.get('title', '')} at {pi.get('department', '')}, {pi.get('school', '')}. The email should sound natural, human, and conversational - not robotic, overly formal, or edgy.
+        if not selected_pi_ids:
+            flash("Please select at least one PI.", "error")
+            return redirect(url_for("bulk_email"))
+        if not client:
+            flash("Set OPENAI_API_KEY in .env to use email generation.", "warning")
+            return redirect(url_for("bulk_email"))
+        
+        regenerate = _wants_regenerate()
+        # Same fields again, for the results page's "Regenerate" button (and its stream)
+        resubmit = {
+            "pi_ids": selected_pi_ids,
+            "student_name": student_name,
+            "student_email": student_email,
+            "student_background": student_background,
+            "research_interest": research_interest,
+        }
+        if EMAIL_JOBS:
+            # Queue the drafts and render the page now; it polls /jobs/<id> and fills them in
+            pis, prompts = _bulk_email_inputs(user_id, request.form, user)
+            job_id = job_queue.submit("bulk_email", {"prompts": prompts, "regenerate": regenerate}, owner=user_id)
+            generated_emails = [
+                {"pi": pi, "draft": None, "error": None, "pi_email": pi.get("email", "")} for pi in pis
+            ]
+            return render_template(
+                "bulk_email_results.html",
+                emails=generated_emails,
+                job_url=url_for("job_status", job_id=job_id),
+                resubmit=resubmit,
+            )
+        if EMAIL_STREAMING:
+            # Render the page now; it streams each draft from /bulk-email/stream
+            pis = [pi for pi in (get_faculty_by_id(pi_id) for pi_id in selected_pi_ids) if pi]
+            generated_emails = [
+                {"pi": pi, "draft": None, "error": None, "pi_email": pi.get("email", "")} for pi in pis
+            ]
+            stream_form = dict(resubmit, regenerate="1" if regenerate else "")
+            return render_template(
+                "bulk_email_results.html", emails=generated_emails, stream_form=stream_form, resubmit=resubmit
+            )
+
+        pis, prompts = _bulk_email_inputs(user_id, request.form, user)
+        # One result per PI in selection order; failures carry an error instead of a draft
+        generated_emails = [
+            {"pi": pi, "draft": draft, "error": error, "pi_email": pi.get("email", "")}
+            for pi, (draft, error) in zip(pis, _generate_drafts_concurrently(prompts, regenerate))
+        ]
+        failed = sum(1 for e in generated_emails if e["error"])
+        if failed:
+            flash(f"{failed} of {len(generated_emails)} drafts could not be generated; see below.", "error")
+
+        return render_template("bulk_email_results.html", emails=generated_emails, resubmit=resubmit)
+    
+    return render_template("bulk_email.html", saved_pis=saved_pis_data, user=user)
+
+
+def _resume_context(user_id):
+    """Prompt snippet with the start of the user's latest resume text ("" if none)."""
+    user_resume = Resume.query.filter_by(user_id=user_id).order_by(Resume.uploaded_at.desc()).first()
+    if user_resume and user_resume.resume_text:
+        # Only include the first 500 characters to keep the prompt manageable
+        return f"\nStudent's Resume Summary: {user_resume.resume_text[:500]}"
+    return ""
+
+
+# Build a detailed prompt for the AI to generate a personalized email
+# We include all the PI's information and the student's background
+# The email should sound natural, human, and conversational - not robotic, overly formal, or edgy
+def _draft_email_prompt(pi, student_name, student_email, student_background, research_interest, resume_context=""):
+    """Prompt for /draft-email (single PI)."""
+    return f"""Write a professional, personalized cold email to {pi.get('name', '')}, {pi.get('title', '')} at {pi.get('department', '')}, {pi.get('school', '')}. The email should sound natural, human, and conversational - not robotic, overly formal, or edgy.
 
 PI INFORMATION:
 - Name: {pi.get('name', '')}
@@ -2107,15 +2654,238 @@ Thank you for your time and consideration,
 
 {student_name}"""
 
-                    completion = client.chat.completions.create(
-                        model=GPT_MODEL,
-                        messages=[
-                            {"role": "system", "content": "You are a helpful assistant that writes natural, human-sounding academic emails. Write as a real student would write to a professor - conversational, genuine, and authentic. Avoid corporate jargon, overly formal language, or robotic phrasing."},
-                            {"role": "user", "content": prompt}
-                        ],
-                        temperature=0.8,  # Slightly higher temperature for more natural variation
+
+DRAFT_EMAIL_TEMPERATURE = 0.8  # Slightly higher temperature for more natural variation
+# Single drafts have no "Regenerate" control, so resubmitting must give a new draft: they bypass llm_cache
+DRAFT_EMAIL_CACHE = False
+
+
+def _draft_email_messages(prompt):
+    return [
+        {"role": "system", "content": "You are a helpful assistant that writes natural, human-sounding academic emails. Write as a real student would write to a professor - conversational, genuine, and authentic. Avoid corporate jargon, overly formal language, or robotic phrasing."},
+        {"role": "user", "content": prompt}
+    ]
+
+
+@app.route("/bulk-email/stream", methods=["POST"])
+@rate_limited(llm_limiter, methods=("POST",))
+def bulk_email_stream():
+    """SSE: stream /bulk-email drafts token by token (same form fields as /bulk-email)."""
+    user_id = session.get("user_id")
+    if not user_id:
+        return jsonify({"success": False, "error": "Not logged in"}), 401
+    if not client:
+        return jsonify({"success": False, "error": "Set OPENAI_API_KEY in .env to use email generation."}), 400
+    user = User.query.get(user_id)
+    _pis, prompts = _bulk_email_inputs(user_id, request.form, user)
+    if not prompts:
+        return jsonify({"success": False, "error": "Please select at least one PI."}), 400
+    return _sse_response(_bulk_email_events(prompts, _wants_regenerate()))
+
+
+@app.route("/bulk-email/jobs", methods=["POST"])
+@rate_limited(llm_limiter, methods=("POST",))
+def bulk_email_job():
+    """Queue /bulk-email drafts as a background job (same form fields); poll the returned status_url."""
+    user_id = session.get("user_id")
+    if not user_id:
+        return jsonify({"success": False, "error": "Not logged in"}), 401
+    if not client:
+        return jsonify({"success": False, "error": "Set OPENAI_API_KEY in .env to use email generation."}), 400
+    pis, prompts = _bulk_email_inputs(user_id, request.form, User.query.get(user_id))
+    if not prompts:
+        return jsonify({"success": False, "error": "Please select at least one PI."}), 400
+    job_id = job_queue.submit("bulk_email", {"prompts": prompts, "regenerate": _wants_regenerate()}, owner=user_id)
+    return _job_accepted(job_id, pis=[{"id": pi["id"], "name": pi.get("name", "")} for pi in pis])
+
+
+def _draft_email_request(user_id, form):
+    """(pi, prompt, None) for a /draft-email form, or (None, None, (error, status))."""
+    pi_id = form.get("pi_id", "").strip()
+    student_name = form.get("student_name", "").strip()
+    student_email = form.get("student_email", "").strip()
+    if not pi_id:
+        return None, None, ("Please select a PI.", 400)
+    if not student_name or not student_email:
+        return None, None, ("Please provide your name and email.", 400)
+    if not client:
+        return None, None, ("Set OPENAI_API_KEY in .env to use email drafting.", 400)
+    pi = get_faculty_by_id(pi_id)
+    if not pi:
+        return None, None, ("PI not found.", 404)
+    prompt = _draft_email_prompt(
+        pi,
+        student_name,
+        student_email,
+        form.get("student_background", "").strip(),
+        form.get("research_interest", "").strip(),
+        _resume_context(user_id),
+    )
+    return pi, prompt, None
+
+
+@app.route("/draft-email/stream", methods=["POST"])
+@rate_limited(llm_limiter, methods=("POST",))
+def draft_email_stream():
+    """SSE: stream a /draft-email draft token by token (same form fields as /draft-email)."""
+    user_id = session.get("user_id")
+    if not user_id:
+        return jsonify({"success": False, "error": "Not logged in"}), 401
+    pi, prompt, failure = _draft_email_request(user_id, request.form)
+    if failure:
+        return jsonify({"success": False, "error": failure[0]}), failure[1]
+    regenerate = _wants_regenerate()
+
+    def events():
+        yield _sse("pi", {"id": pi["id"], "name": pi.get("name", ""), "email": pi.get("email", "")})
+        parts = []
+        try:
+            for delta in _stream_completion(
+                _draft_email_messages(prompt),
+                DRAFT_EMAIL_TEMPERATURE,
+                BULK_EMAIL_TIMEOUT,
+                regenerate=regenerate,
+                cache=DRAFT_EMAIL_CACHE,
+            ):
+                parts.append(delta)
+                yield _sse("token", {"text": delta})
+            yield _sse("done", {"draft": "".join(parts)})
+        except Exception as e:
+            yield _sse("error", {"error": f"Error generating email draft: {str(e)}"})
+
+    return _sse_response(events())
+
+
+@_job_handler("draft_email")
+def _draft_email_job(job):
+    draft = _cached_completion(
+        _draft_email_messages(job.payload["prompt"]),
+        temperature=DRAFT_EMAIL_TEMPERATURE,
+        timeout=BULK_EMAIL_TIMEOUT,
+        regenerate=job.payload.get("regenerate", False),
+        cache=DRAFT_EMAIL_CACHE,
+    )
+    return {"draft": draft}
+
+
+@app.route("/draft-email/jobs", methods=["POST"])
+@rate_limited(llm_limiter, methods=("POST",))
+def draft_email_job():
+    """Queue a /draft-email draft as a background job (same form fields); poll the returned status_url."""
+    user_id = session.get("user_id")
+    if not user_id:
+        return jsonify({"success": False, "error": "Not logged in"}), 401
+    pi, prompt, failure = _draft_email_request(user_id, request.form)
+    if failure:
+        return jsonify({"success": False, "error": failure[0]}), failure[1]
+    job_id = job_queue.submit("draft_email", {"prompt": prompt, "regenerate": _wants_regenerate()}, owner=user_id)
+    return _job_accepted(job_id, pi={"id": pi["id"], "name": pi.get("name", ""), "email": pi.get("email", "")})
+
+
+@_job_handler("ai_match")
+def _ai_match_job(job):
+    matches = ai_match_faculty(job.payload["resume_text"], top_k=job.payload.get("top_k", 20))
+    return {
+        "matches": [
+            {"pi_id": m["pi"]["id"], "name": m["pi"].get("name", ""), "school": m["pi"].get("school", ""),
+             "score": m["score"], "reason": m["reason"]}
+            for m in matches
+        ]
+    }
+
+
+@app.route("/ai-match/jobs", methods=["POST"])
+@rate_limited(llm_limiter, methods=("POST",))
+def ai_match_job():
+    """Queue AI lab matching against the user's latest resume; poll the returned status_url."""
+    user_id = session.get("user_id")
+    if not user_id:
+        return jsonify({"success": False, "error": "Not logged in"}), 401
+    if not client:
+        return jsonify({"success": False, "error": "Set OPENAI_API_KEY in .env to use AI matching."}), 400
+    resume = Resume.query.filter_by(user_id=user_id).order_by(Resume.uploaded_at.desc()).first()
+    if not resume or not resume.resume_text:
+        return jsonify({"success": False, "error": "Upload a resume first."}), 400
+    top_k = max(1, min(request.form.get("top_k", 20, type=int), 50))
+    job_id = job_queue.submit("ai_match", {"resume_text": resume.resume_text, "top_k": top_k}, owner=user_id)
+    return _job_accepted(job_id)
+
+
+def _job_accepted(job_id, **extra):
+    status_url = url_for("job_status", job_id=job_id)
+    return jsonify(dict(extra, success=True, job_id=job_id, status_url=status_url)), 202, {"Location": status_url}
+
+
+@app.route("/jobs/<job_id>")
+def job_status(job_id):
+    """JSON status of one of the user's background jobs: status, partial or final result, error."""
+    user_id = session.get("user_id")
+    if not user_id:
+        return jsonify({"success": False, "error": "Not logged in"}), 401
+    job = job_queue.get(job_id)
+    if job is None or job["owner"] != str(user_id):
+        return jsonify({"success": False, "error": "Job not found."}), 404
+    job.pop("owner")
+    return jsonify(dict(job, success=True)), 200, {"Cache-Control": "no-store"}
+
+
+@app.cli.command("run-jobs")
+@click.option("--workers", default=4, show_default=True, help="Job threads in this process.")
+def run_jobs_command(workers):
+    """Run background jobs until interrupted (for JOB_WORKERS=0 web processes)."""
+    print(f"Running jobs from {job_queue.path} with {workers} worker threads")
+    job_queue.run_forever(workers)
+
+
+@app.route("/draft-email", methods=["GET", "POST"])
+@rate_limited(llm_limiter, methods=("POST",))
+def draft_email():
+    """Generate a personalized email draft to send to a PI. This uses AI to write professional cold emails."""
+    user_id = session.get("user_id")
+    if not user_id:
+        return redirect(url_for("login"))
+    
+    error = None
+    draft = None
+    # Get the PI ID from either the URL (if they clicked a link) or the form (if they submitted)
+    pi_id = request.args.get("pi_id") or (request.form.get("pi_id") if request.method == "POST" else None)
+    pi = None
+    
+    if pi_id:
+        pi = get_faculty_by_id(pi_id)
+    
+    if request.method == "POST":
+        pi_id = request.form.get("pi_id", "").strip()
+        student_name = request.form.get("student_name", "").strip()
+        student_email = request.form.get("student_email", "").strip()
+        student_background = request.form.get("student_background", "").strip()
+        research_interest = request.form.get("research_interest", "").strip()
+        
+        if not pi_id:
+            error = "Please select a PI."
+        elif not student_name or not student_email:
+            error = "Please provide your name and email."
+        elif not client:
+            error = "Set OPENAI_API_KEY in .env to use email drafting."
+        else:
+            pi = get_faculty_by_id(pi_id)
+            if not pi:
+                error = "PI not found."
+            else:
+                try:
+                    # Get the user's resume to include context in the email
+                    resume_context = _resume_context(user_id)
+                    
+                    prompt = _draft_email_prompt(
+                        pi, student_name, student_email, student_background, research_interest, resume_context
+                    )
+
+                    draft = _cached_completion(
+                        _draft_email_messages(prompt),
+                        temperature=DRAFT_EMAIL_TEMPERATURE,
+                        regenerate=_wants_regenerate(),
+                        cache=DRAFT_EMAIL_CACHE,
                     )
-                    draft = completion.choices[0].message.content
                 except Exception as e:
                     error = f"Error generating email draft: {str(e)}"
     
@@ -2146,10 +2916,9 @@ Thank you for your time and consideration,
     # Get saved PIs for dropdown if no PI selected (only show saved PIs, not all faculty)
     saved_pis_data = None
     if not pi:
-        all_faculty = load_faculty()
-        pi_by_id = {pi["id"]: pi for pi in all_faculty}
-        saved_rows = SavedPI.query.filter_by(user_id=user_id).all()
-        saved_pis_data = [pi_by_id.get(row.pi_id) for row in saved_rows if row.pi_id in pi_by_id]
+        pi_by_id = get_faculty_store().lookup().by_id
+        saved_ids = saved_pi_cache.ordered(user_id)
+        saved_pis_data = [pi_by_id[pid] for pid in saved_ids if pid in pi_by_id]
         # Filter out None values in case some IDs weren't found
         saved_pis_data = [pi for pi in saved_pis_data if pi is not None]
     
@@ -2193,16 +2962,12 @@ def compare_labs():
         flash("Please select at least 2 labs to compare.", "info")
         return redirect(url_for("saved_pis"))
     
-    all_faculty = load_faculty()
-    pi_by_id = {pi["id"]: pi for pi in all_faculty}
-    pi_by_name = {pi.get("name", "").lower(): pi for pi in all_faculty if pi.get("name")}
+    lookup = get_faculty_store().lookup()
     
     # Look up labs by id first, then by name (for matches page compatibility)
     all_labs_to_compare = []
     for pi_id in pi_ids:
-        lab = pi_by_id.get(pi_id)
-        if not lab:
-            lab = pi_by_name.get(pi_id.lower())
+        lab = lookup.resolve(pi_id)
         if lab:
             all_labs_to_compare.append(lab)
     
@@ -2251,10 +3016,9 @@ def multi_email():
         return redirect(url_for("bulk_email") + "?selected=" + ",".join(selected_pi_ids))
     
     # Get saved PIs
-    all_faculty = load_faculty()
-    pi_by_id = {pi["id"]: pi for pi in all_faculty}
-    saved_rows = SavedPI.query.filter_by(user_id=user_id).all()
-    saved_pis_data = [pi_by_id.get(row.pi_id) for row in saved_rows if row.pi_id in pi_by_id]
+    pi_by_id = get_faculty_store().lookup().by_id
+    saved_ids = saved_pi_cache.ordered(user_id)
+    saved_pis_data = [pi_by_id[pid] for pid in saved_ids if pid in pi_by_id]
     
     return render_template("multi_email.html", saved_pis=saved_pis_data)
 
@@ -2284,10 +3048,9 @@ def export_report():
         return redirect(url_for("login"))
     
     # Get user's saved PIs or top matches
-    saved_rows = SavedPI.query.filter_by(user_id=user_id).all()
-    all_faculty = load_faculty()
-    pi_by_id = {pi["id"]: pi for pi in all_faculty}
-    saved_pis_data = [pi_by_id.get(row.pi_id) for row in saved_rows if row.pi_id in pi_by_id][:10]
+    saved_ids = saved_pi_cache.ordered(user_id)
+    pi_by_id = get_faculty_store().lookup().by_id
+    saved_pis_data = [pi_by_id[pid] for pid in saved_ids if pid in pi_by_id][:10]
     
     user = User.query.get(user_id)
     if not user:
@@ -2410,64 +3173,211 @@ def _admin_page_views_for_display(tracked: int):
     return display, None
 
 
+# refreshed_at of the placeholder summary row, before the first refresh
+ADMIN_SUMMARY_NEVER = datetime(1970, 1, 1)
+ADMIN_SUMMARY_REFRESH_SECONDS = float(os.environ.get("ADMIN_SUMMARY_REFRESH_SECONDS", "600"))
+
+
+def _ensure_admin_summary_row():
+    """Create the single admin_summary row if missing (the row every refresh locks)."""
+    from sqlalchemy.exc import IntegrityError
+
+    if AdminSummary.query.get(1) is not None:
+        return
+    try:
+        db.session.add(AdminSummary(id=1, total_users=0, total_saved=0, total_resumes=0, refreshed_at=ADMIN_SUMMARY_NEVER))
+        db.session.commit()
+    except IntegrityError:
+        # Another worker created it first
+        db.session.rollback()
+
+
+def refresh_admin_summary(max_age=0):
+    """Recompute the admin summary tables with grouped aggregates, replaced in one transaction.
+
+    The run first claims the admin_summary row with an UPDATE that only matches
+    if it was refreshed more than max_age seconds ago. The row lock is held to
+    the commit, so concurrent runs (one per worker) are serialized and the
+    later ones find it fresh and return False without touching the tables.
+    """
+    signup_day = db.func.date(User.created_at)
+    with app.app_context():
+        try:
+            _ensure_admin_summary_row()
+            now = datetime.utcnow()
+            claimed = db.session.execute(
+                db.update(AdminSummary)
+                .where(AdminSummary.id == 1, AdminSummary.refreshed_at <= now - timedelta(seconds=max_age))
+                .values(refreshed_at=now)
+            ).rowcount
+            if not claimed:
+                db.session.rollback()
+                return False
+            signups = (
+                db.session.query(signup_day, db.func.count(User.id))
+                .filter(User.created_at.isnot(None))
+                .group_by(signup_day)
+                .all()
+            )
+            saves = db.session.query(SavedPI.pi_id, db.func.count(SavedPI.id)).group_by(SavedPI.pi_id).all()
+            db.session.execute(
+                db.update(AdminSummary)
+                .where(AdminSummary.id == 1)
+                .values(
+                    total_users=db.session.query(db.func.count(User.id)).scalar() or 0,
+                    total_saved=sum(n for _, n in saves),
+                    total_resumes=db.session.query(db.func.count(Resume.id)).scalar() or 0,
+                )
+            )
+            DailySignupCount.query.delete()
+            PISaveCount.query.delete()
+            db.session.bulk_insert_mappings(DailySignupCount, [{"day": str(day), "signups": n} for day, n in signups])
+            db.session.bulk_insert_mappings(PISaveCount, [{"pi_id": pi_id, "saves": n} for pi_id, n in saves])
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+    return True
+
+
+# Each worker's timer fires on this interval, but a refresh is skipped when another worker
+# did one in the last half interval, so one worker does the work per cycle. Set
+# ADMIN_SUMMARY_REFRESH_SECONDS=0 and run `flask refresh-admin-summary` from cron instead
+# to keep it off the web processes entirely.
+admin_summary_refresher = PeriodicTask(
+    lambda: refresh_admin_summary(max_age=ADMIN_SUMMARY_REFRESH_SECONDS / 2),
+    interval=ADMIN_SUMMARY_REFRESH_SECONDS,
+    logger=app.logger,
+    name="admin summary",
+)
+
+
+@app.cli.command("refresh-admin-summary")
+def refresh_admin_summary_command():
+    """Recompute the admin dashboard summary tables now."""
+    refresh_admin_summary()
+    print("Admin summary refreshed.")
+
+
+ADMIN_USERS_PER_PAGE = 100
+
+
 @app.route("/admin")
 @admin_required
 def admin_dashboard():
-    """Admin dashboard: site stats and recent activity."""
+    """Admin dashboard: site stats (from the summary tables) and recent activity."""
     stats = SiteStats.query.get(1)
-    tracked_views = (stats.total_page_views or 0) if stats else 0
+    pending = page_view_counter.pending()  # this worker's views not flushed yet
+    tracked_views = ((stats.total_page_views or 0) if stats else 0) + sum(pending.values())
+    path_views = {row.path: row.views or 0 for row in PageViewCount.query.all()}
+    for path, n in pending.items():
+        path_views[path] = path_views.get(path, 0) + n
+    page_views_by_path = sorted(path_views.items(), key=lambda item: -item[1])
     display_views, tracked_only = _admin_page_views_for_display(tracked_views)
-    total_users = User.query.count()
-    total_saved = db.session.query(db.func.count(SavedPI.id)).scalar() or 0
-    total_resumes = db.session.query(db.func.count(Resume.id)).scalar() or 0
-    recent_users = User.query.order_by(User.created_at.desc()).limit(10).all()
+    summary = AdminSummary.query.get(1)
+    if summary is None or summary.refreshed_at <= ADMIN_SUMMARY_NEVER:
+        # First visit on a new database: build the tables once now
+        admin_summary_refresher.run_now()
+        summary = AdminSummary.query.get(1)
+    signups_by_day = DailySignupCount.query.order_by(DailySignupCount.day.desc()).limit(30).all()
+    pi_by_id = get_faculty_store().lookup().by_id
+    top_saved = [
+        {"pi_id": row.pi_id, "pi": pi_by_id.get(row.pi_id), "saves": row.saves}
+        for row in PISaveCount.query.order_by(PISaveCount.saves.desc(), PISaveCount.pi_id).limit(20)
+    ]
+    # Newest by primary key (signup order) rather than sorting on created_at
+    recent_users = User.query.order_by(User.id.desc()).limit(10).all()
     return render_template(
         "admin/dashboard.html",
         total_page_views=display_views,
         page_views_tracked=tracked_only,
-        total_users=total_users,
-        total_saved=total_saved,
-        total_resumes=total_resumes,
+        page_views_by_path=page_views_by_path,
+        total_users=summary.total_users if summary else 0,
+        total_saved=summary.total_saved if summary else 0,
+        total_resumes=summary.total_resumes if summary else 0,
+        summary_refreshed_at=summary.refreshed_at if summary else None,
+        signups_by_day=signups_by_day,
+        top_saved=top_saved,
         recent_users=recent_users,
+        llm_cache_stats=llm_cache.stats() if llm_cache else None,
     )
 
 
 @app.route("/admin/users")
 @admin_required
 def admin_users():
-    """Admin: list all users with saved-PI and resume counts."""
-    users = User.query.order_by(User.created_at.desc()).all()
-    rows = []
-    for u in users:
-        saved_count = SavedPI.query.filter_by(user_id=u.id).count()
-        resume_count = Resume.query.filter_by(user_id=u.id).count()
-        rows.append({
-            "user": u,
-            "saved_count": saved_count,
-            "resume_count": resume_count,
-        })
-    return render_template("admin/users.html", rows=rows)
+    """Admin: users with saved-PI and resume counts, newest first, ADMIN_USERS_PER_PAGE per page."""
+    page = max(1, request.args.get("page", 1, type=int))
+    saved = (
+        db.session.query(SavedPI.user_id, db.func.count(SavedPI.id).label("n")).group_by(SavedPI.user_id).subquery()
+    )
+    resumes = (
+        db.session.query(Resume.user_id, db.func.count(Resume.id).label("n")).group_by(Resume.user_id).subquery()
+    )
+    # One query for the page: per-user counts come from the grouped subqueries
+    results = (
+        db.session.query(User, db.func.coalesce(saved.c.n, 0), db.func.coalesce(resumes.c.n, 0))
+        .outerjoin(saved, saved.c.user_id == User.id)
+        .outerjoin(resumes, resumes.c.user_id == User.id)
+        .order_by(User.id.desc())
+        .offset((page - 1) * ADMIN_USERS_PER_PAGE)
+        .limit(ADMIN_USERS_PER_PAGE + 1)
+        .all()
+    )
+    rows = [
+        {"user": u, "saved_count": saved_count, "resume_count": resume_count}
+        for u, saved_count, resume_count in results[:ADMIN_USERS_PER_PAGE]
+    ]
+    return render_template(
+        "admin/users.html", rows=rows, page=page, has_next=len(results) > ADMIN_USERS_PER_PAGE
+    )
+
+
+@app.route("/admin/profiles")
+@admin_required
+def admin_profiles():
+    """Admin: stored ?__profile=1 captures, newest first."""
+    return render_template("admin/profiles.html", profiles=request_profiles.list())
 
 
-# Simple rate limit for login (prevent brute force): 10 attempts per minute per IP
-_login_attempts = {}  # ip -> list of timestamps
-LOGIN_RATE_LIMIT = 10
-LOGIN_RATE_WINDOW = 60  # seconds
+@app.route("/admin/profiles/<profile_id>")
+@admin_required
+def admin_profile_detail(profile_id):
+    """Admin: top-N functions of one capture, by cumulative (default), own time or calls."""
+    sort = request.args.get("sort", "cumulative")
+    if sort not in PROFILE_SORT_KEYS:
+        sort = "cumulative"
+    try:
+        limit = max(1, min(int(request.args.get("n", 40)), 500))
+    except ValueError:
+        limit = 40
+    meta = request_profiles.meta(profile_id)
+    top = request_profiles.top(profile_id, limit=limit, sort=sort)
+    if meta is None or top is None:
+        flash("Profile not found (old captures are pruned).", "error")
+        return redirect(url_for("admin_profiles"))
+    return render_template("admin/profile_detail.html", meta=meta, top=top, sort=sort, limit=limit)
+
+
+@app.route("/admin/profiles/<profile_id>/download")
+@admin_required
+def admin_profile_download(profile_id):
+    """Admin: the raw .pstats file (python -m pstats, snakeviz)."""
+    path = request_profiles.pstats_path(profile_id)
+    if path is None:
+        flash("Profile not found (old captures are pruned).", "error")
+        return redirect(url_for("admin_profiles"))
+    return send_file(path, as_attachment=True, download_name=f"{profile_id}.pstats", mimetype="application/octet-stream")
 
 
 @app.route("/login", methods=["GET", "POST"])
 def login():
     """Handle user login. Users can log in with either their email or username."""
     if request.method == "POST":
-        # Rate limit: 10 attempts per minute per IP
+        # Rate limit (brute force): LOGIN_RATE_LIMIT attempts per minute per IP
         ip = request.remote_addr or "unknown"
-        now = _time.time()
-        if ip not in _login_attempts:
-            _login_attempts[ip] = []
-        _login_attempts[ip] = [t for t in _login_attempts[ip] if now - t < LOGIN_RATE_WINDOW]
-        if len(_login_attempts[ip]) >= LOGIN_RATE_LIMIT:
+        if not login_limiter.hit(ip)[0]:
             return render_template("login.html", error="Too many login attempts. Try again in a minute.")
-        _login_attempts[ip].append(now)
 
         # The form field is named "email" but can contain either email or username
         login_input = request.form.get("email", "").strip()
@@ -2506,9 +3416,7 @@ def login():
             return render_template("login.html", error=error)
 
         # Login successful! Store the user info in the session so they stay logged in
-        session["user_id"] = user.id
-        session["username"] = user.username
-        session["is_admin"] = user.email.lower().strip() in ADMIN_EMAILS_SET
+        _remember_login(user)
 
         return redirect(url_for("account"))
 
@@ -2516,8 +3424,7 @@ def login():
 
 @app.route("/logout")
 def logout():
-    session.pop("user_id", None)
-    session.pop("is_admin", None)
+    _end_session()
     return redirect(url_for("index"))
 
 @app.route("/signup", methods=["GET", "POST"])
@@ -2592,9 +3499,7 @@ def signup():
             raise
 
         # Automatically log them in after signup
-        session["user_id"] = user.id
-        session["username"] = user.username
-        session["is_admin"] = user.email.lower().strip() in ADMIN_EMAILS_SET
+        _remember_login(user)
 
         flash("Account created successfully!", "success")
         # Send new users to onboarding to set up their profile
@@ -2648,8 +3553,8 @@ def forgot_password():
             base_url = request.url_root
             email_sent = send_password_reset_email(user.email, token, base_url)
             
-            # If email wasn't sent (SMTP not configured), show the link on the page
-            if not email_sent or not os.getenv("SMTP_USERNAME"):
+            # If email wasn't queued (SMTP not configured), show the link on the page
+            if not email_sent:
                 reset_link = f"{base_url}reset-password/{token}"
                 flash(f"Password reset link (email not configured - use this link): {reset_link}", "info")
                 # Store token in session temporarily so user can access it
@@ -2705,8 +3610,9 @@ def reset_password(token):
             error = "Password must be at least 8 characters long."
             return render_template("reset_password.html", token=token, error=error)
         
-        # Update the user's password
+        # Update the user's password, and log out sessions started with the old one
         user.set_password(new_password)
+        user.auth_version = (user.auth_version or 1) + 1
         
         # Mark the token as used so it can't be used again
         reset_token_obj.used = True
@@ -2722,6 +3628,49 @@ def reset_password(token):
     return render_template("reset_password.html", token=token)
 
 
+# Startup: schema migrations, then timings. Seconds since the module started importing.
+APP_FACTORY = os.getenv("APP_FACTORY", "").lower() in ("1", "true", "yes")
+# Warm-up of data and indexes after start-up: "background" (default), "sync" or "off"
+WARMUP_MODE = os.getenv("WARMUP", "background").lower()
+BOOT_TIMINGS = {}
+_boot_lock = threading.Lock()
+
+
+def create_app():
+    """Application factory: run one-time startup work and return the app.
+
+    Safe to call more than once. Importing this module calls it, unless
+    APP_FACTORY=1; then the server does, e.g. gunicorn "backend.app:create_app()",
+    and importing the module touches neither the database nor the OpenAI SDK.
+    """
+    with _boot_lock:
+        if "ready" in BOOT_TIMINGS:
+            return app
+        BOOT_TIMINGS.setdefault("import", round(_IMPORT_DONE - _IMPORT_STARTED, 3))
+        started = _time.perf_counter()
+        init_db()
+        BOOT_TIMINGS["migrations"] = round(_time.perf_counter() - started, 3)
+        BOOT_TIMINGS["ready"] = round(_time.perf_counter() - _IMPORT_STARTED, 3)
+        print(
+            f"Startup (pid {os.getpid()}): ready {BOOT_TIMINGS['ready']:.2f}s after import began "
+            f"(import {BOOT_TIMINGS['import']:.2f}s, migrations {BOOT_TIMINGS['migrations']:.2f}s)"
+        )
+        if WARMUP_MODE != "off":
+            # "sync" blocks until warm (e.g. gunicorn --preload builds once, workers inherit it)
+            warm_up.start(background=WARMUP_MODE != "sync")
+        if outbox_sender is not None:
+            # Picks up retries (and mail queued by a worker that has since exited)
+            outbox_sender.start()
+        job_queue.start()
+        admin_summary_refresher.start()
+    return app
+
+
+_IMPORT_DONE = _time.perf_counter()
+if not APP_FACTORY:
+    create_app()
+
+
 # This is the main entry point - it runs when you execute the file directly
 # In production, use Gunicorn instead: gunicorn backend.app:app --bind 0.0.0.0:$PORT
 if __name__ == "__main__":
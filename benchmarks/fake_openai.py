@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""Local stand-in for the OpenAI chat completions API, for offline benchmarks.
+
+Answers POST /v1/chat/completions (plain and stream=true) after a fixed delay
+with a canned email draft, or a JSON match list when the system prompt is the
+lab-matching one, so the whole request path (SDK, HTTP, parsing) runs without
+network access or API spend. Point the app at it with
+OPENAI_BASE_URL=http://127.0.0.1:<port>/v1 and any OPENAI_API_KEY.
+
+GET / returns the call counters as JSON.
+
+Usage:
+    python benchmarks/fake_openai.py [--port 8765] [--latency 0.3]
+"""
+
+import argparse
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DRAFT = (
+    "Subject: Research inquiry\n\nDear Professor,\n\nI am a student interested in your "
+    "lab's research and would welcome the chance to contribute.\n\nBest regards,\nStudent"
+)
+
+
+class FakeOpenAIHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    latency = 0.3
+    stats = {"calls": 0, "streamed": 0}
+    _lock = threading.Lock()
+
+    def log_message(self, *args):
+        pass
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        self._send_json(200, self.stats)
+
+    def do_POST(self):
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self._send_json(404, {"error": {"message": f"unknown path {self.path}"}})
+            return
+        req = json.loads(self.rfile.read(int(self.headers.get("Content-Length") or 0)) or b"{}")
+        messages = req.get("messages") or [{"content": ""}]
+        with self._lock:
+            self.stats["calls"] += 1
+            self.stats["streamed"] += bool(req.get("stream"))
+        text = DRAFT
+        if "lab matching" in (messages[0].get("content") or ""):
+            # Score every "Name (pi_id): ..." line of the batch prompt
+            ids = re.findall(r"^.*? \(([^()]+)\): ", messages[-1].get("content") or "", re.M)
+            text = json.dumps([{"pi_id": i, "score": 90 - k % 40, "reason": "fit"} for k, i in enumerate(ids)])
+        prompt_tokens = sum(len(m.get("content") or "") for m in messages) // 4
+        usage = {"prompt_tokens": prompt_tokens, "completion_tokens": len(text) // 4,
+                 "total_tokens": prompt_tokens + len(text) // 4}
+        model = req.get("model", "gpt-4o-mini")
+        if req.get("stream"):
+            self._stream(text, model, usage)
+            return
+        time.sleep(self.latency)
+        self._send_json(200, {
+            "id": "chatcmpl-fake", "object": "chat.completion", "created": int(time.time()), "model": model,
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": text}, "finish_reason": "stop"}],
+            "usage": usage,
+        })
+
+    def _stream(self, text, model, usage):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        def event(delta, finish=None, **extra):
+            payload = {"id": "chatcmpl-fake", "object": "chat.completion.chunk", "created": int(time.time()),
+                       "model": model, "choices": [{"index": 0, "delta": delta, "finish_reason": finish}], **extra}
+            chunk(f"data: {json.dumps(payload)}\n\n")
+
+        def chunk(data):
+            raw = data.encode()
+            self.wfile.write(b"%x\r\n%s\r\n" % (len(raw), raw))
+            self.wfile.flush()
+
+        words = text.split(" ")
+        for i, word in enumerate(words):
+            time.sleep(self.latency / len(words))
+            event({"content": word + (" " if i < len(words) - 1 else "")})
+        event({}, "stop", usage=usage)
+        chunk("data: [DONE]\n\n")
+        self.wfile.write(b"0\r\n\r\n")
+
+
+def serve(port=0, latency=0.3, background=True):
+    """Start the fake server; returns (server, base_url). port=0 picks a free port."""
+    handler = type("Handler", (FakeOpenAIHandler,), {"latency": latency, "stats": {"calls": 0, "streamed": 0}})
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    server.daemon_threads = True
+    url = f"http://127.0.0.1:{server.server_address[1]}/v1"
+    if background:
+        threading.Thread(target=server.serve_forever, name="fake-openai", daemon=True).start()
+    return server, url
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.3, help="seconds per completion (default 0.3)")
+    args = parser.parse_args()
+    server, url = serve(args.port, args.latency, background=False)
+    print(f"Fake OpenAI API on {url} ({args.latency}s per completion)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,483 @@
+#!/usr/bin/env python3
+"""Load-test the web app end to end, offline.
+
+Drives the real Flask app, either in process through the test client or as a
+local gunicorn server, with a scripted traffic mix from synthetic users:
+
+    browse     GET /general with random school / department / location filters and pages
+    typeahead  a burst of GET /api/search-pis as a name or topic is typed (2..6 chars)
+    match      POST /matches with random valid answers
+    save       POST /save-pi/<id>, then later POST /unsave-pi/<id> (and sometimes GET /saved)
+    draft      POST /draft-email, answered by a local fake OpenAI server (fake_openai.py)
+
+Everything runs against a throwaway SQLite database in a temp directory (the
+LLM response cache is off unless --llm-cache), and reports throughput plus
+p50/p95/p99 latency per route. --json saves the report (with the git commit)
+and --compare prints the change against a saved report, so runs can be
+compared across commits.
+
+Usage:
+    python benchmarks/load_app.py                                   # test client, 8 users, 30s
+    python benchmarks/load_app.py --server gunicorn --workers 4 --threads 4
+    python benchmarks/load_app.py --mix browse=60,typeahead=40 --duration 60
+    python benchmarks/load_app.py --json reports/bench_before.json
+    python benchmarks/load_app.py --compare reports/bench_before.json
+"""
+
+import argparse
+import http.client
+import json
+import os
+import random
+import re
+import secrets
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from urllib.parse import urlencode
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BASE_DIR not in sys.path:
+    sys.path.insert(0, BASE_DIR)
+
+from fake_openai import serve as serve_fake_openai  # noqa: E402
+
+DEFAULT_MIX = "browse=40,typeahead=25,match=15,save=15,draft=5"
+TOPIC_WORDS = ["neuro", "machine learning", "cancer", "climate", "robotics", "genetics", "quantum", "immunology"]
+
+
+def parse_mix(text):
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in ACTIONS:
+            raise SystemExit(f"Unknown action {name!r} in --mix (choose from {', '.join(ACTIONS)})")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    k = max(0, min(len(sorted_values) - 1, int(round(pct / 100 * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[k]
+
+
+def git_commit():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BASE_DIR,
+                                capture_output=True, text=True, check=True).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=BASE_DIR,
+                               capture_output=True, text=True).stdout.strip()
+        return commit + ("-dirty" if dirty else "")
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+# Transports: one per virtual user; request() returns (status, location header)
+
+class TestClientTransport:
+    def __init__(self, app, user_id):
+        self.client = app.test_client()
+        with self.client.session_transaction() as sess:
+            sess["user_id"] = user_id
+
+    def request(self, method, path, data=None, headers=None):
+        response = self.client.open(path, method=method, data=data, headers=headers)
+        response.get_data()
+        response.close()
+        return response.status_code, response.headers.get("Location", "")
+
+    def close(self):
+        pass
+
+
+class HTTPTransport:
+    def __init__(self, host, port, session_cookie):
+        self.host, self.port = host, port
+        self.cookie = session_cookie
+        self.conn = None
+
+    def request(self, method, path, data=None, headers=None):
+        body = urlencode(data) if data else None
+        headers = dict(headers or {}, Cookie=self.cookie)
+        if body is not None:
+            headers["Content-Type"] = "application/x-www-form-urlencoded"
+        for attempt in (0, 1):
+            if self.conn is None:
+                self.conn = http.client.HTTPConnection(self.host, self.port, timeout=120)
+            try:
+                self.conn.request(method, path, body=body, headers=headers)
+                response = self.conn.getresponse()
+                response.read()
+            except (http.client.HTTPException, ConnectionError):
+                # gunicorn sync workers close kept-alive connections; reconnect once
+                self.conn.close()
+                self.conn = None
+                if attempt:
+                    raise
+                continue
+            if response.getheader("Connection", "").lower() == "close":
+                self.conn.close()
+                self.conn = None
+            return response.status, response.getheader("Location") or ""
+
+    def close(self):
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+
+
+# Actions: each issues one or more requests through the user's transport
+
+def action_browse(user, data, rng):
+    params = {}
+    if rng.random() < 0.5:
+        params["school"] = rng.choice(data["schools"])
+    if rng.random() < 0.4:
+        params["dept_category"] = rng.choice(data["dept_categories"])
+    if rng.random() < 0.2:
+        params["location"] = rng.choice(data["locations"])
+    if rng.random() < 0.3:
+        params["page"] = rng.randint(2, 4)
+    user.call("GET /general", "GET", "/general" + ("?" + urlencode(params) if params else ""))
+
+
+def action_typeahead(user, data, rng):
+    word = rng.choice(data["search_words"])
+    for n in range(2, min(len(word), 6) + 1):
+        user.call("GET /api/search-pis", "GET", "/api/search-pis?" + urlencode({"q": word[:n]}))
+
+
+def action_match(user, data, rng):
+    options = data["match_options"]
+    user.call("POST /matches", "POST", "/matches", data={
+        "research_area": rng.choice(options["research_areas"]),
+        "work_type": rng.choice(options["work_types"]),
+        "involvement": rng.choice(options["involvement"]),
+        "year": rng.choice(options["years"]),
+    })
+
+
+def action_save(user, data, rng):
+    if user.saved and (len(user.saved) >= 5 or rng.random() < 0.4):
+        pi_id = user.saved.pop(rng.randrange(len(user.saved)))
+        user.call("POST /unsave-pi", "POST", f"/unsave-pi/{pi_id}")
+    else:
+        pi_id = rng.choice(data["pi_ids"])
+        user.call("POST /save-pi", "POST", f"/save-pi/{pi_id}", headers={"X-Requested-With": "XMLHttpRequest"})
+        if pi_id not in user.saved:
+            user.saved.append(pi_id)
+    if rng.random() < 0.3:
+        user.call("GET /saved", "GET", "/saved")
+
+
+def action_draft(user, data, rng):
+    user.call("POST /draft-email", "POST", "/draft-email", data={
+        "pi_id": rng.choice(data["pi_ids"]),
+        "student_name": f"Bench User {user.index}",
+        "student_email": f"bench{user.index}@example.edu",
+        "student_background": "Junior studying biology with two semesters of wet-lab experience.",
+        "research_interest": rng.choice(TOPIC_WORDS),
+    })
+
+
+ACTIONS = {
+    "browse": action_browse,
+    "typeahead": action_typeahead,
+    "match": action_match,
+    "save": action_save,
+    "draft": action_draft,
+}
+
+
+class VirtualUser:
+    def __init__(self, index, transport, samples):
+        self.index = index
+        self.transport = transport
+        self.samples = samples
+        self.saved = []
+        self.recording = False
+
+    def call(self, label, method, path, data=None, headers=None):
+        started = time.perf_counter()
+        try:
+            status, location = self.transport.request(method, path, data=data, headers=headers)
+            error = status >= 400 or "/login" in location
+        except Exception as e:
+            status, error = type(e).__name__, True
+        if self.recording:
+            self.samples.append((label, time.perf_counter() - started, status, error))
+
+
+def run_users(users, mix, data, seconds, think, seed, record):
+    names = list(mix)
+    weights = [mix[n] for n in names]
+    deadline = time.perf_counter() + seconds
+
+    def loop(user):
+        rng = random.Random(seed * 1000 + user.index)
+        user.recording = record
+        while time.perf_counter() < deadline:
+            ACTIONS[rng.choices(names, weights)[0]](user, data, rng)
+            if think:
+                time.sleep(rng.uniform(0, 2 * think))
+
+    threads = [threading.Thread(target=loop, args=(u,), daemon=True) for u in users]
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return time.perf_counter() - started
+
+
+def summarize(samples, elapsed):
+    by_route = {}
+    for label, seconds, status, error in samples:
+        by_route.setdefault(label, []).append((seconds, status, error))
+    routes = {}
+    for label, rows in sorted(by_route.items()):
+        latencies = sorted(s for s, _, _ in rows)
+        statuses = {}
+        for _, status, _ in rows:
+            statuses[str(status)] = statuses.get(str(status), 0) + 1
+        routes[label] = {
+            "requests": len(rows),
+            "errors": sum(1 for _, _, e in rows if e),
+            "rps": round(len(rows) / elapsed, 2),
+            "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+            "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+            "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+            "max_ms": round(latencies[-1] * 1000, 2),
+            "statuses": statuses,
+        }
+    latencies = sorted(s for _, s, _, _ in samples)
+    total = {
+        "requests": len(samples),
+        "errors": sum(1 for *_, e in samples if e),
+        "rps": round(len(samples) / elapsed, 2) if elapsed else 0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+        "max_ms": round(latencies[-1] * 1000, 2) if latencies else 0,
+    }
+    return routes, total
+
+
+def _delta(new, old):
+    if not old:
+        return ""
+    return f" ({(new - old) / old * 100:+.0f}%)"
+
+
+def print_report(report, baseline=None):
+    base_routes = (baseline or {}).get("routes", {})
+    print()
+    print(f"{report['server']} server, {report['users']} users, {report['seconds']:.1f}s, "
+          f"commit {report['commit'] or 'unknown'}"
+          + (f" vs {baseline.get('commit') or 'baseline'}" if baseline else ""))
+    header = f"{'route':<22} {'reqs':>7} {'errs':>5} {'req/s':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9}"
+    print(header)
+    print("-" * len(header))
+    rows = list(report["routes"].items()) + [("TOTAL", report["total"])]
+    for label, r in rows:
+        print(f"{label:<22} {r['requests']:>7} {r['errors']:>5} {r['rps']:>8.1f} {r['p50_ms']:>9.1f} "
+              f"{r['p95_ms']:>9.1f} {r['p99_ms']:>9.1f} {r['max_ms']:>9.1f}")
+        old = (baseline or {}).get("total") if label == "TOTAL" else base_routes.get(label)
+        if old:
+            print(f"{'':<22} {'':>7} {'':>5} {_delta(r['rps'], old['rps']):>8} {_delta(r['p50_ms'], old['p50_ms']):>9} "
+                  f"{_delta(r['p95_ms'], old['p95_ms']):>9} {_delta(r['p99_ms'], old['p99_ms']):>9}")
+    for label, r in report["routes"].items():
+        bad = {s: n for s, n in r["statuses"].items() if not re.match(r"^[23]\d\d$", s)}
+        if bad:
+            print(f"  {label}: {bad}")
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_gunicorn(args, env):
+    if shutil.which("gunicorn") is None:
+        raise SystemExit("gunicorn is not installed (pip install gunicorn), or use --server client")
+    port = free_port()
+    cmd = ["gunicorn", "backend.app:create_app()", "--bind", f"127.0.0.1:{port}",
+           "--workers", str(args.workers), "--threads", str(args.threads), "--graceful-timeout", "5",
+           "--log-level", "warning"]
+    proc = subprocess.Popen(cmd, cwd=BASE_DIR, env=env)
+    deadline = time.time() + args.ready_timeout
+    ready = 0
+    while time.time() < deadline:
+        if proc.poll() is not None:
+            raise SystemExit(f"gunicorn exited with {proc.returncode}")
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+            conn.request("GET", "/healthz/ready")
+            status = conn.getresponse().status
+            conn.close()
+        except OSError:
+            status = None
+        # A few consecutive 200s so most workers have warmed up, not just the first
+        ready = ready + 1 if status == 200 else 0
+        if ready >= args.workers * 2:
+            return proc, port
+        time.sleep(0.2)
+    proc.terminate()
+    raise SystemExit(f"gunicorn was not ready after {args.ready_timeout}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline load test of the web app")
+    parser.add_argument("--server", choices=["client", "gunicorn"], default="client",
+                        help="Flask test client in this process (default) or a local gunicorn")
+    parser.add_argument("--users", type=int, default=8, help="concurrent virtual users (default 8)")
+    parser.add_argument("--duration", type=float, default=30, help="measured seconds (default 30)")
+    parser.add_argument("--warmup", type=float, default=3, help="unmeasured seconds of traffic first (default 3)")
+    parser.add_argument("--think", type=float, default=0, help="mean pause between actions in seconds (default 0)")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help=f"action weights (default {DEFAULT_MIX})")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--openai-latency", type=float, default=0.3, help="fake OpenAI seconds per completion")
+    parser.add_argument("--llm-cache", action="store_true", help="keep the LLM response cache on")
+    parser.add_argument("--workers", type=int, default=2, help="gunicorn workers (default 2)")
+    parser.add_argument("--threads", type=int, default=4, help="gunicorn threads per worker (default 4)")
+    parser.add_argument("--ready-timeout", type=float, default=120)
+    parser.add_argument("--json", help="write the report to this file")
+    parser.add_argument("--compare", help="print changes against a report saved with --json")
+    parser.add_argument("--keep-db", action="store_true", help="keep the temp directory (database, caches)")
+    args = parser.parse_args()
+    mix = parse_mix(args.mix)
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+
+    workdir = tempfile.mkdtemp(prefix="riq-bench-")
+    fake_server, openai_url = serve_fake_openai(latency=args.openai_latency)
+    overrides = {
+        "DATABASE_URL": "sqlite:///" + os.path.join(workdir, "bench.db"),
+        "SECRET_KEY": secrets.token_hex(32),
+        "FLASK_ENV": "development",
+        "OPENAI_API_KEY": "sk-bench",
+        "OPENAI_BASE_URL": openai_url,
+        "ALLOWED_USERS": "",
+        "ADMIN_EMAILS": "",
+        "APP_FACTORY": "1",
+        "LLM_CACHE_PATH": os.path.join(workdir, "llm_cache.sqlite"),
+        "PROFILE_DIR": os.path.join(workdir, "profiles"),
+        "EMAIL_STREAMING": "false",
+        "JOB_QUEUE_PATH": os.path.join(workdir, "jobs.sqlite"),
+        # A few simulated users generate far more traffic than the per-user limits allow
+        "LOGIN_RATE_LIMIT": "0",
+        "SEARCH_RATE_LIMIT": "0",
+        "LLM_RATE_LIMIT": "0",
+    }
+    if not args.llm_cache:
+        overrides["LLM_CACHE_TTL"] = "0"
+    os.environ.update(overrides)
+    server_env = dict(os.environ)
+    if args.server == "gunicorn":
+        # This process only seeds the database; the workers warm up themselves
+        os.environ["WARMUP"] = "off"
+
+    import backend.app as A
+
+    app = A.create_app()
+    app.config["TESTING"] = True
+    with app.app_context():
+        # One hash for everyone: pbkdf2 per user would dominate set-up time
+        hashed = A.generate_password_hash("bench-password", method="pbkdf2:sha256", salt_length=16)
+        users = [A.User(username=f"bench{i}", email=f"bench{i}@example.edu", password_hash=hashed)
+                 for i in range(args.users)]
+        A.db.session.add_all(users)
+        A.db.session.commit()
+        user_ids = [u.id for u in users]
+        faculty = A.load_faculty()
+        choices = A.get_filter_choices()
+        options = A.get_tag_match_ui_options()
+    if not faculty:
+        raise SystemExit("No faculty data loaded; build data/v2 first (see scripts/README.md)")
+    rng = random.Random(args.seed)
+    sample = rng.sample(faculty, min(500, len(faculty)))
+    data = {
+        "pi_ids": [pi["id"] for pi in sample],
+        "schools": choices["schools"] or [""],
+        "dept_categories": choices["dept_categories"] or [""],
+        "locations": choices["locations"] or [""],
+        "search_words": [w.lower() for w in TOPIC_WORDS]
+        + [pi["name"].split()[-1].lower() for pi in sample[:100] if pi.get("name")],
+        "match_options": {
+            "research_areas": options["research_areas"],
+            "work_types": options["work_types"],
+            "involvement": [key for key, _ in options["involvement"]],
+            "years": list(A.STUDENT_YEAR_OPTIONS),
+        },
+    }
+
+    proc = None
+    transports = []
+    samples = []
+    try:
+        if args.server == "gunicorn":
+            proc, port = start_gunicorn(args, server_env)
+            serializer = app.session_interface.get_signing_serializer(app)
+            cookie_name = app.config.get("SESSION_COOKIE_NAME", "session")
+            transports = [HTTPTransport("127.0.0.1", port, f"{cookie_name}={serializer.dumps({'user_id': uid})}")
+                          for uid in user_ids]
+        else:
+            A.warm_up.wait(args.ready_timeout)
+            transports = [TestClientTransport(app, uid) for uid in user_ids]
+        vusers = [VirtualUser(i, t, samples) for i, t in enumerate(transports)]
+        if args.warmup:
+            run_users(vusers, mix, data, args.warmup, args.think, args.seed + 1, record=False)
+        print(f"Running {args.duration:.0f}s with {args.users} users, mix {args.mix} ...", flush=True)
+        elapsed = run_users(vusers, mix, data, args.duration, args.think, args.seed, record=True)
+    finally:
+        for transport in transports:
+            transport.close()
+        if proc is not None:
+            proc.terminate()
+            try:
+                proc.wait(15)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+        fake_server.shutdown()
+        # Write buffered page views now, while the temp database still exists
+        A.page_view_counter.stop()
+        if not args.keep_db:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    routes, total = summarize(samples, elapsed)
+    report = {
+        "commit": git_commit(),
+        "server": args.server,
+        "workers": args.workers if args.server == "gunicorn" else None,
+        "threads": args.threads if args.server == "gunicorn" else None,
+        "users": args.users,
+        "seconds": round(elapsed, 2),
+        "mix": mix,
+        "openai_latency": args.openai_latency,
+        "openai_calls": fake_server.RequestHandlerClass.stats["calls"],
+        "routes": routes,
+        "total": total,
+    }
+    print_report(report, baseline)
+    if args.keep_db:
+        print(f"\nKept {workdir}")
+    if args.json:
+        os.makedirs(os.path.dirname(os.path.abspath(args.json)), exist_ok=True)
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"Wrote {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""Compile data/v2/all_faculty.json into the pre-normalized serving dataset.
+
+Run after migrate_to_v2_schema.py. Does all per-record work the web app used
+to do at load time (school canonicalization, location normalization, name
+filtering, enabled-school filtering, (name, school) dedupe, department
+classification and matcher-only overrides) and writes:
+
+    data/v2/serving/faculty_serving.json
+    data/v2/serving/manifest.json   (content hashes + counts)
+
+With --fts it also writes data/v2/serving/faculty_fts.sqlite, an SQLite FTS5
+index used for search when the app runs with FACULTY_SEARCH_BACKEND=fts.
+
+The app loads the artifact as-is when it exists.
+
+Usage:
+    python scripts/migrate_to_v2_schema.py
+    python scripts/compile_serving_dataset.py [--fts]
+"""
+
+import argparse
+import os
+import sys
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BASE_DIR not in sys.path:
+    sys.path.insert(0, BASE_DIR)
+
+from services.faculty.fts import FTS_DB_NAME, has_fts5, write_fts_database  # noqa: E402
+from services.faculty.serving import load_serving_dataset, write_serving_dataset  # noqa: E402
+
+DATA_DIR = os.path.join(BASE_DIR, "data")
+V2_PATH = os.path.join(DATA_DIR, "v2", "all_faculty.json")
+SERVING_DIR = os.path.join(DATA_DIR, "v2", "serving")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compile the v2 faculty file into the serving dataset")
+    parser.add_argument("--input", default=V2_PATH, help="Path to v2 all_faculty.json")
+    parser.add_argument("--out-dir", default=SERVING_DIR, help="Output directory for artifact + manifest")
+    parser.add_argument("--fts", action="store_true", help=f"Also build the SQLite FTS5 index ({FTS_DB_NAME})")
+    args = parser.parse_args()
+
+    if args.fts and not has_fts5():
+        print("This Python's sqlite3 lacks FTS5 (trigram tokenizer); cannot build --fts index")
+        sys.exit(1)
+
+    if not os.path.exists(args.input):
+        print(f"Input not found: {args.input} (run scripts/migrate_to_v2_schema.py first)")
+        sys.exit(1)
+
+    print(f"Compiling {args.input} ...")
+    manifest = write_serving_dataset(args.input, args.out_dir)
+
+    print(f"\n{'='*60}")
+    print("Serving dataset compiled!")
+    print(f"  Source records: {manifest['source_count']}")
+    print(f"  Served PIs:     {manifest['faculty_count']}")
+    print(f"  Artifact:       {os.path.join(args.out_dir, manifest['artifact'])}")
+    print(f"  sha256:         {manifest['sha256']}")
+
+    if args.fts:
+        payload = load_serving_dataset(args.out_dir)
+        fts_path = os.path.join(args.out_dir, FTS_DB_NAME)
+        write_fts_database(payload["faculty"], fts_path, manifest["sha256"])
+        print(f"  FTS index:      {fts_path} ({os.path.getsize(fts_path) // 1024} KB)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""Faculty dataset: normalization, serving artifact and in-process store."""
+from .normalize import (
+    ENABLED_SCHOOLS,
+    SCHOOL_NAME_MAP,
+    is_valid_person_name,
+    iter_serving_entries,
+    matching_overrides,
+    normalize_faculty_entry,
+    normalize_location,
+    to_serving_record,
+)
+from .classify import DEPARTMENT_CLASSIFIER, DepartmentClassifier, dept_field_key
+from .serving import (
+    build_serving_payload,
+    load_serving_dataset,
+    read_serving_manifest,
+    source_matches,
+    write_serving_dataset,
+)
+from .fts import FTS_DB_NAME, FacultyFTS, open_fts_database, write_fts_database
+from .lookup import PILookup
+from .lru import LRUCache
+from .search_index import SEARCH_FIELDS, SubstringSearchIndex
+from .store import FacultyStore, MatchingView
+
+__all__ = [
+    "ENABLED_SCHOOLS",
+    "SCHOOL_NAME_MAP",
+    "dept_field_key",
+    "is_valid_person_name",
+    "iter_serving_entries",
+    "matching_overrides",
+    "normalize_faculty_entry",
+    "normalize_location",
+    "to_serving_record",
+    "DEPARTMENT_CLASSIFIER",
+    "DepartmentClassifier",
+    "build_serving_payload",
+    "load_serving_dataset",
+    "read_serving_manifest",
+    "source_matches",
+    "write_serving_dataset",
+    "FTS_DB_NAME",
+    "FacultyFTS",
+    "open_fts_database",
+    "write_fts_database",
+    "PILookup",
+    "LRUCache",
+    "SEARCH_FIELDS",
+    "SubstringSearchIndex",
+    "FacultyStore",
+    "MatchingView",
+]
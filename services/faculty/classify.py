@@ -0,0 +1,89 @@
+"""
+Memoized department -> category classification.
+
+dept_field_key() does keyword pattern matching on the department string; there
+are only a few hundred distinct departments, so the result is cached per string
+and stored on each record as "dept_category" at dataset load. Browse, Search,
+the tag matcher and templates share one DepartmentClassifier instance.
+"""
+from typing import Any, Callable, Dict, Mapping
+
+
+def dept_field_key(department):
+    """Map a department name to a broad field key for CSS color coding."""
+    if not department:
+        return "default"
+    d = department.lower()
+    if any(k in d for k in ["computer", "computing", "informatics", "data science"]):
+        return "cs"
+    if any(k in d for k in ["engineer", "mechanical", "aerospace", "aeronautic", "nuclear", "biomedical eng", "biological eng"]):
+        return "engineering"
+    if any(k in d for k in ["biology", "biological", "biochem", "genetic", "molecular", "microbio", "agricultural"]):
+        return "biology"
+    if any(k in d for k in ["chemistry", "chemical"]):
+        return "chemistry"
+    if any(k in d for k in ["physics", "astro", "quantum"]):
+        return "physics"
+    if any(k in d for k in ["math", "statistic"]):
+        return "math"
+    if any(k in d for k in ["medicine", "medical", "health", "pharma", "nursing", "immuno"]):
+        return "medicine"
+    if any(k in d for k in ["neuro", "brain", "cognitive"]):
+        return "neuro"
+    if any(k in d for k in ["social", "politic", "sociology", "anthropo", "linguist", "psycho"]):
+        return "social"
+    if any(k in d for k in ["econom", "finance"]):
+        return "economics"
+    if any(k in d for k in ["material"]):
+        return "materials"
+    if any(k in d for k in ["earth", "planet", "geo", "ocean", "atmospher"]):
+        return "earth"
+    if any(k in d for k in ["business", "management", "account"]):
+        return "business"
+    if any(k in d for k in ["art", "music", "theater", "literature", "humanit", "history", "philosoph"]):
+        return "arts"
+    if any(k in d for k in ["environment", "ecology", "climate", "sustainab"]):
+        return "env"
+    if any(k in d for k in ["energy"]):
+        return "energy"
+    return "default"
+
+
+class DepartmentClassifier:
+    """Callable classifier: classifier(department) -> category key, memoized by string."""
+
+    def __init__(self, classify: Callable[[str], str] = dept_field_key, max_entries: int = 10000):
+        self._classify = classify
+        self._max_entries = max_entries
+        self._memo: Dict[str, str] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def __call__(self, department: str) -> str:
+        department = department or ""
+        try:
+            key = self._memo[department]
+            self.hits += 1
+            return key
+        except KeyError:
+            pass
+        self.misses += 1
+        key = self._classify(department)
+        if len(self._memo) >= self._max_entries:
+            self._memo.clear()
+        self._memo[department] = key
+        return key
+
+    def category_for(self, pi: Mapping[str, Any]) -> str:
+        """Category of a record: the stored dept_category, else classify its department."""
+        key = pi.get("dept_category")
+        if key:
+            return key
+        return self(pi.get("department") or "")
+
+    def __len__(self) -> int:
+        return len(self._memo)
+
+
+# Process-wide instance shared by the store, the app and the tag matcher
+DEPARTMENT_CLASSIFIER = DepartmentClassifier()
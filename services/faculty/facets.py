@@ -0,0 +1,139 @@
+"""
+Faceted bitmap index for Browse Labs (/general).
+
+Records are sorted once by display priority; bit i of every bitmap refers to
+the i-th record in that order. Bitmaps are plain Python ints, so filtering is
+an AND over at most four ints, facet choices are one AND per facet value, and
+a page of results is read straight off the set bits (no per-request sort).
+"""
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+FACETS = ("school", "dept_category", "subfield", "location")
+
+
+def popcount(bits: int) -> int:
+    """Number of set bits (int.bit_count needs Python 3.10+)."""
+    return bin(bits).count("1")
+
+
+def iter_bits(bits: int):
+    """Yield set bit positions in ascending order."""
+    while bits:
+        low = bits & -bits
+        yield low.bit_length() - 1
+        bits ^= low
+
+
+class FacetIndex:
+    """One bitmap per school, dept_category, subfield and location value."""
+
+    def __init__(
+        self,
+        records: Sequence[Dict[str, Any]],
+        category_fn: Callable[[Dict[str, Any]], str],
+        priority_fn: Callable[[Dict[str, Any]], float],
+    ):
+        # Stable sort: ties keep load order, same as sorting each filtered list
+        self.records: List[Dict[str, Any]] = sorted(records, key=priority_fn, reverse=True)
+        self.all_bits = (1 << len(self.records)) - 1
+        self.bitmaps: Dict[str, Dict[str, int]] = {facet: {} for facet in FACETS}
+        self.subfield_category: Dict[str, str] = {}
+        self._location_cache: Dict[str, int] = {}
+
+        for i, pi in enumerate(self.records):
+            bit = 1 << i
+            school = pi.get("school") or pi.get("institution") or ""
+            dept = pi.get("department") or ""
+            category = category_fn(pi)
+            loc = pi.get("specific_location") or pi.get("location") or ""
+            self._add("school", school, bit)
+            self._add("dept_category", category, bit)
+            self._add("subfield", dept, bit)
+            self._add("location", loc, bit)
+            if dept:
+                self.subfield_category[dept] = category
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def _add(self, facet: str, value: str, bit: int) -> None:
+        table = self.bitmaps[facet]
+        table[value] = table.get(value, 0) | bit
+
+    def _location_bits(self, selected: str) -> int:
+        """Bitmap for a location filter (substring match, like the original scan)."""
+        bits = self._location_cache.get(selected)
+        if bits is None:
+            bits = 0
+            for loc, loc_bits in self.bitmaps["location"].items():
+                if selected in loc:
+                    bits |= loc_bits
+            if len(self._location_cache) > 1024:
+                self._location_cache.clear()
+            self._location_cache[selected] = bits
+        return bits
+
+    def _facet_bits(self, facet: str, value: str) -> int:
+        if facet == "location":
+            return self._location_bits(value)
+        return self.bitmaps[facet].get(value, 0)
+
+    def mask(self, selected: Dict[str, str], skip: Optional[str] = None) -> int:
+        """AND of every active filter except *skip*."""
+        bits = self.all_bits
+        for facet in FACETS:
+            value = selected.get(facet) or ""
+            if facet == skip or not value:
+                continue
+            bits &= self._facet_bits(facet, value)
+            if not bits:
+                break
+        return bits
+
+    def choices(self, selected: Dict[str, str]) -> Dict[str, Dict[str, int]]:
+        """Per facet: {value: count} of values that yield >=1 PI given the other active filters."""
+        out: Dict[str, Dict[str, int]] = {}
+        selected_category = selected.get("dept_category") or ""
+        for facet in FACETS:
+            counts: Dict[str, int] = {}
+            if facet == "subfield" and not selected_category:
+                # Subfields are only listed once a dept_category is chosen
+                out[facet] = counts
+                continue
+            mask = self.mask(selected, skip=facet)
+            if mask:
+                for value, bits in self.bitmaps[facet].items():
+                    if not value:
+                        continue
+                    if facet == "dept_category" and value == "default":
+                        continue
+                    if facet == "subfield" and value == "Various":
+                        continue
+                    if facet == "subfield" and self.subfield_category.get(value) != selected_category:
+                        continue
+                    hit = bits & mask
+                    if hit:
+                        counts[value] = popcount(hit)
+            out[facet] = counts
+        return out
+
+    def count(self, selected: Dict[str, str]) -> int:
+        """Number of records matching every active filter."""
+        return popcount(self.mask(selected))
+
+    def page(self, selected: Dict[str, str], start: int, count: int) -> Tuple[int, List[Dict[str, Any]]]:
+        """(total matches, records[start:start+count]) in display-priority order."""
+        bits = self.mask(selected)
+        if bits == self.all_bits:
+            return len(self.records), self.records[start:start + count]
+        total = popcount(bits)
+        out: List[Dict[str, Any]] = []
+        if start >= total or count <= 0:
+            return total, out
+        for n, i in enumerate(iter_bits(bits)):
+            if n < start:
+                continue
+            out.append(self.records[i])
+            if len(out) >= count:
+                break
+        return total, out
@@ -0,0 +1,169 @@
+"""
+Optional on-disk SQLite FTS5 index over the serving dataset.
+
+scripts/compile_serving_dataset.py --fts writes faculty_fts.sqlite next to the
+serving artifact. Workers open it read-only and share it through the OS page
+cache instead of each holding Python postings. Two FTS5 tables:
+
+    pi_search    name, department, research_areas, school, lab_techniques
+                 (trigram tokenizer: substring matches for the PI typeahead)
+    pi_research  research text fields the matcher indexes
+                 (unicode61 tokenizer: keyword candidates for MatchingServiceV2)
+
+rowid is the record's position in the serving artifact, so the database is
+only used with the artifact whose sha256 it was built from. Every query
+returns None on a problem so callers fall back to the in-memory indexes.
+"""
+import os
+import sqlite3
+import threading
+from typing import Any, Dict, Iterable, List, Optional
+
+from .search_index import SEARCH_FIELDS
+from .store import MatchingView
+
+FTS_SCHEMA_VERSION = "fts-1"
+FTS_DB_NAME = "faculty_fts.sqlite"
+
+# Matcher fields (same ones MatchingServiceV2 puts in its keyword index) -> bm25 weight
+RESEARCH_FIELDS = (
+    ("research_text", 1.0),
+    ("research_topics", 2.0),
+    ("research_keywords", 2.0),
+    ("research_areas", 1.5),
+    ("research_field", 1.0),
+)
+
+# The trigram tokenizer cannot match anything shorter than this
+MIN_TRIGRAM_TERM = 3
+
+
+def has_fts5() -> bool:
+    """True if this Python's sqlite3 supports FTS5 with the trigram tokenizer."""
+    try:
+        conn = sqlite3.connect(":memory:")
+        try:
+            conn.execute("CREATE VIRTUAL TABLE t USING fts5(a, tokenize='trigram')")
+        finally:
+            conn.close()
+        return True
+    except sqlite3.Error:
+        return False
+
+
+def _text(value: Any) -> str:
+    if isinstance(value, (list, tuple)):
+        return " ".join(str(v) for v in value if v)
+    return str(value or "")
+
+
+def _match_any(terms: Iterable[str]) -> str:
+    """FTS5 query matching any of *terms*, each quoted as a literal string."""
+    quoted = ['"' + t.replace('"', '""') + '"' for t in terms if t]
+    return " OR ".join(quoted)
+
+
+def write_fts_database(records: List[Dict[str, Any]], path: str, serving_sha256: str) -> Dict[str, Any]:
+    """Build the FTS database for *records* (serving order) at *path*; returns its meta."""
+    tmp_path = path + ".tmp"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+    search_cols = ", ".join(field for field, _w in SEARCH_FIELDS)
+    research_cols = ", ".join(field for field, _w in RESEARCH_FIELDS)
+
+    conn = sqlite3.connect(tmp_path)
+    try:
+        conn.execute("CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT)")
+        conn.execute(f"CREATE VIRTUAL TABLE pi_search USING fts5({search_cols}, tokenize='trigram')")
+        conn.execute(f"CREATE VIRTUAL TABLE pi_research USING fts5({research_cols}, tokenize='unicode61')")
+        conn.executemany(
+            f"INSERT INTO pi_search (rowid, {search_cols}) VALUES (?{', ?' * len(SEARCH_FIELDS)})",
+            (
+                [i] + [_text(rec.get(field)).lower() for field, _w in SEARCH_FIELDS]
+                for i, rec in enumerate(records)
+            ),
+        )
+        conn.executemany(
+            f"INSERT INTO pi_research (rowid, {research_cols}) VALUES (?{', ?' * len(RESEARCH_FIELDS)})",
+            (
+                [i] + [_text(view.get(field)) for field, _w in RESEARCH_FIELDS]
+                for i, view in enumerate(MatchingView(rec) for rec in records)
+            ),
+        )
+        meta = {
+            "schema_version": FTS_SCHEMA_VERSION,
+            "serving_sha256": serving_sha256,
+            "faculty_count": str(len(records)),
+        }
+        conn.executemany("INSERT INTO meta (key, value) VALUES (?, ?)", meta.items())
+        conn.execute("INSERT INTO pi_search (pi_search) VALUES ('optimize')")
+        conn.execute("INSERT INTO pi_research (pi_research) VALUES ('optimize')")
+        conn.commit()
+    finally:
+        conn.close()
+    os.replace(tmp_path, path)
+    return meta
+
+
+class FacultyFTS:
+    """Read-only access to faculty_fts.sqlite (one connection per thread)."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        self.meta = dict(self._conn().execute("SELECT key, value FROM meta").fetchall())
+        self.version = self.meta.get("serving_sha256")
+        self._search_weights = ", ".join(str(w) for _f, w in SEARCH_FIELDS)
+        self._research_weights = ", ".join(str(w) for _f, w in RESEARCH_FIELDS)
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True)
+            self._local.conn = conn
+        return conn
+
+    def _rowids(self, sql: str, params: tuple) -> Optional[List[int]]:
+        try:
+            return [row[0] for row in self._conn().execute(sql, params)]
+        except sqlite3.Error:
+            return None
+
+    def search_pis(self, query: str, limit: int = 20) -> Optional[List[int]]:
+        """Record positions for the typeahead, best BM25 first.
+
+        Returns None when a query term is too short for the trigram index, so
+        the caller answers from the in-memory index with identical semantics.
+        """
+        terms = query.lower().split()
+        if not terms or any(len(t) < MIN_TRIGRAM_TERM for t in terms):
+            return None
+        return self._rowids(
+            f"SELECT rowid FROM pi_search WHERE pi_search MATCH ? "
+            f"ORDER BY bm25(pi_search, {self._search_weights}), rowid LIMIT ?",
+            (_match_any(terms), limit),
+        )
+
+    def research_candidates(self, keywords: List[str], limit: int = -1) -> Optional[List[int]]:
+        """Record positions whose research fields mention any keyword, best BM25 first."""
+        expr = _match_any(k.lower() for k in keywords)
+        if not expr:
+            return []
+        return self._rowids(
+            f"SELECT rowid FROM pi_research WHERE pi_research MATCH ? "
+            f"ORDER BY bm25(pi_research, {self._research_weights}), rowid LIMIT ?",
+            (expr, limit),
+        )
+
+
+def open_fts_database(path: str, expected_version: Optional[str]) -> Optional[FacultyFTS]:
+    """Open *path* if it exists, supports FTS5 and was built from the expected serving artifact."""
+    if not expected_version or not os.path.exists(path) or not has_fts5():
+        return None
+    try:
+        fts = FacultyFTS(path)
+    except sqlite3.Error:
+        return None
+    if fts.meta.get("schema_version") != FTS_SCHEMA_VERSION or fts.version != expected_version:
+        return None
+    return fts
@@ -0,0 +1,66 @@
+"""
+Point lookups into one faculty generation: by id, case-folded name, name
+alternatives and email. Built once per store (FacultyStore.lookup()) so routes
+never rebuild {id: pi} / {name: pi} dicts per request.
+"""
+from typing import Any, Dict, Iterable, Optional
+
+
+def _fold(value: Any) -> str:
+    return str(value or "").strip().casefold()
+
+
+def _emails(pi: Dict[str, Any]) -> Iterable[str]:
+    email = pi.get("email")
+    if isinstance(email, list):
+        return email
+    return [email] if email else []
+
+
+class PILookup:
+    """Prebuilt id / name / alias / email indexes over a list of records."""
+
+    def __init__(self, records: Iterable[Dict[str, Any]]):
+        self.by_id: Dict[str, Dict[str, Any]] = {}
+        self.by_name: Dict[str, Dict[str, Any]] = {}
+        self.by_alias: Dict[str, Dict[str, Any]] = {}
+        self.by_email: Dict[str, Dict[str, Any]] = {}
+        for pi in records:
+            pi_id = pi.get("id")
+            if pi_id:
+                # First record wins, like the linear scans this replaces
+                self.by_id.setdefault(pi_id, pi)
+            name = _fold(pi.get("name"))
+            if name:
+                # Last record wins, like the {name.lower(): pi} dicts this replaces
+                self.by_name[name] = pi
+            for alias in pi.get("name_alternatives") or []:
+                alias = _fold(alias)
+                if alias:
+                    self.by_alias.setdefault(alias, pi)
+            for email in _emails(pi):
+                email = _fold(email)
+                if email:
+                    self.by_email.setdefault(email, pi)
+
+    def __len__(self) -> int:
+        return len(self.by_id)
+
+    def get_by_id(self, pi_id: str) -> Optional[Dict[str, Any]]:
+        return self.by_id.get(pi_id) if pi_id else None
+
+    def get_by_name(self, name: str) -> Optional[Dict[str, Any]]:
+        key = _fold(name)
+        if not key:
+            return None
+        return self.by_name.get(key) or self.by_alias.get(key)
+
+    def get_by_email(self, email: str) -> Optional[Dict[str, Any]]:
+        key = _fold(email)
+        return self.by_email.get(key) if key else None
+
+    def resolve(self, key: str) -> Optional[Dict[str, Any]]:
+        """Record for an id, name, name alternative or email (saved PIs may store any of them)."""
+        if not key:
+            return None
+        return self.get_by_id(key) or self.get_by_name(key) or self.get_by_email(key)
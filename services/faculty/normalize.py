@@ -0,0 +1,329 @@
+"""
+Per-record faculty normalization shared by the web app and offline build scripts.
+
+Everything here is pure (no Flask, no I/O) so the same code can run at app load
+time or once at build time in scripts/compile_serving_dataset.py.
+"""
+from typing import Any, Dict, Iterable, Iterator, Optional, Tuple
+
+from .classify import DEPARTMENT_CLASSIFIER
+
+# Canonical school names (used for display + logo lookup)
+SCHOOL_NAME_MAP: Dict[str, str] = {
+    "massachusetts institute of technology": "MIT",
+    "harvard university": "Harvard University",
+    "harvard": "Harvard University",
+    "harvard medical school": "Harvard University",
+    "broad institute": "Harvard University",
+    "broad institute of mit and harvard": "Harvard University",
+    "boston university": "Boston University",
+    "bu": "Boston University",
+    "northeastern university": "Northeastern University",
+    "northeastern": "Northeastern University",
+    "tufts university": "Tufts University",
+    "tufts": "Tufts University",
+    "stanford university": "Stanford University",
+    "stanford": "Stanford University",
+    "yale university": "Yale University",
+    "yale": "Yale University",
+    "princeton university": "Princeton University",
+    "princeton": "Princeton University",
+}
+
+# Schools shown in Browse Labs / matching (lowercased)
+ENABLED_SCHOOLS = {
+    "harvard university", "mit", "massachusetts institute of technology",
+    "boston university", "northeastern university", "tufts university",
+    "stanford university", "yale university", "princeton university",
+}
+
+# US state abbreviations for location normalization
+US_STATES = {
+    "al","ak","az","ar","ca","co","ct","de","fl","ga","hi","id","il","in","ia",
+    "ks","ky","la","me","md","ma","mi","mn","ms","mo","mt","ne","nv","nh","nj",
+    "nm","ny","nc","nd","oh","ok","or","pa","ri","sc","sd","tn","tx","ut","vt",
+    "va","wa","wv","wi","wy","dc","pr","vi",
+}
+
+
+def normalize_location(loc):
+    """Normalize a location string to canonical 'City Name, ST' format."""
+    if not loc or not loc.strip():
+        return loc
+    loc = loc.strip()
+    # Split on comma
+    parts = [p.strip() for p in loc.split(",")]
+    if len(parts) == 2:
+        city, state = parts
+        state_clean = state.strip().upper()
+        # If state portion is a valid 2-letter abbreviation, normalize to Title Case city + uppercase state
+        if state_clean.lower() in US_STATES or len(state_clean) == 2:
+            return city.strip().title() + ", " + state_clean
+        else:
+            return city.strip().title() + ", " + state.strip().title()
+    elif len(parts) > 2:
+        # Multi-part address — just title-case everything, keep last part uppercase if state
+        last = parts[-1].strip()
+        if last.lower() in US_STATES or len(last) <= 2:
+            return ", ".join(p.strip().title() for p in parts[:-1]) + ", " + last.upper()
+        return ", ".join(p.strip().title() for p in parts)
+    else:
+        # Single part — just title-case it
+        if loc == loc.upper() and len(loc) > 2:
+            return loc.title()
+        return loc
+
+
+def normalize_faculty_entry(pi):
+    """Normalize a faculty entry to consistent format (handles v2, old, and NSF formats)."""
+    if not isinstance(pi, dict):
+        return None
+
+    # ── v2 schema: flatten nested structure for template compatibility ──
+    if pi.get("schema_version") == "2.0":
+        aff = pi.get("affiliation", {})
+        con = pi.get("contact", {})
+        met = pi.get("metrics", {})
+        res = pi.get("research", {})
+        fund = pi.get("funding", {})
+
+        techniques = res.get("techniques", [])
+        topics = res.get("topics", [])
+
+        flat = {
+            "id": pi.get("id", ""),
+            "name": pi.get("name", ""),
+            "name_alternatives": pi.get("name_alternatives") or [],
+            "school": aff.get("school", ""),
+            "department": aff.get("department", ""),
+            "title": aff.get("title", ""),
+            "location": aff.get("location", ""),
+            "specific_location": aff.get("specific_location", "") or aff.get("location", ""),
+            "email": con.get("email", ""),
+            "website": con.get("website", ""),
+            "google_scholar": con.get("google_scholar_url", ""),
+            "h_index": met.get("h_index"),
+            "research_areas": res.get("areas", ""),
+            "research_topics": topics[:5] if topics else [],
+            "lab_techniques": ", ".join(techniques) if techniques else "",
+            "nsf_awards": fund.get("nsf_awards", []),
+            "_v2_data": pi,
+        }
+        # Normalize locations
+        for loc_field in ("location", "specific_location"):
+            loc_val = flat.get(loc_field, "")
+            if loc_val:
+                flat[loc_field] = normalize_location(loc_val)
+        return flat
+
+    # ── Legacy / NSF format handling ──
+    if "id" not in pi:
+        pi["id"] = pi.get("name", "")
+
+    # NSF data uses "institution"; normalize so "school" always exists
+    if "school" not in pi and pi.get("institution"):
+        pi["school"] = pi.get("institution", "")
+
+    # Normalize school names to canonical forms (used for display + logo lookup)
+    school_raw = (pi.get("school") or "").strip()
+    canonical = SCHOOL_NAME_MAP.get(school_raw.lower())
+    if canonical:
+        pi["school"] = canonical
+
+    # Handle email as list (NSF format) or string (old format)
+    email = pi.get("email", "")
+    if isinstance(email, list):
+        pi["email"] = email[0] if email else ""
+
+    # Handle research_areas as list (NSF format) or string (old format)
+    research_areas = pi.get("research_areas", "")
+    if isinstance(research_areas, list):
+        pi["research_areas"] = ", ".join(str(r) for r in research_areas[:5])
+
+    # Handle lab_techniques as list (NSF format) or string (old format)
+    lab_techniques = pi.get("lab_techniques", "")
+    if isinstance(lab_techniques, list):
+        pi["lab_techniques"] = ", ".join(str(t) for t in lab_techniques)
+
+    # Set defaults for missing fields
+    pi.setdefault("school", "")
+    pi.setdefault("department", "")
+    pi.setdefault("location", "")
+    pi.setdefault("lab_techniques", "")
+    pi.setdefault("title", "")
+    pi.setdefault("research_areas", "")
+
+    # Normalize locations to canonical "City Name, ST" format
+    for loc_field in ("location", "specific_location"):
+        loc_val = pi.get(loc_field, "")
+        if loc_val:
+            pi[loc_field] = normalize_location(loc_val)
+
+    # Normalize department name (strip whitespace, consistent casing)
+    dept = pi.get("department", "")
+    if dept:
+        pi["department"] = dept.strip()
+
+    # Normalize technique names (strip whitespace per technique)
+    techs = pi.get("lab_techniques", "")
+    if techs and isinstance(techs, str):
+        cleaned = ", ".join(t.strip() for t in techs.split(",") if t.strip())
+        pi["lab_techniques"] = cleaned
+
+    if not pi.get("research_areas") and pi.get("research_topics"):
+        topics = pi["research_topics"]
+        if isinstance(topics, list):
+            pi["research_areas"] = ", ".join(str(t) for t in topics[:5])
+
+    return pi
+
+
+def is_valid_person_name(name: str) -> bool:
+    """Runtime guard: skip obvious non-person rows (headers, UI chrome, etc.)."""
+    if not name or not name.strip():
+        return False
+    name = name.strip()
+    # Must have at least first and last name
+    if " " not in name:
+        return False
+    # Too long to be a real name
+    if len(name) > 60:
+        return False
+    # Starts with institutional/non-person words
+    non_person_prefixes = [
+        "department",
+        "division",
+        "school",
+        "center",
+        "institute",
+        "program",
+        "office",
+        "faculty",
+        "administration",
+        "clinical",
+        "students",
+        "technology",
+        "principal",
+        "research",
+        "application",
+        "deadlines",
+        "about",
+        "contact",
+        "news",
+        "events",
+        "curriculum",
+        "admission",
+        "staff",
+        "committee",
+        "board",
+        "council",
+        "library",
+        "services",
+        "resources",
+        "the ",
+        "a ",
+        "an ",
+        "affiliated",
+        "emeritus",
+        "visiting",
+    ]
+    lower = name.lower()
+    if any(lower.startswith(p) for p in non_person_prefixes):
+        return False
+    # Contains junk substrings
+    if any(
+        s in lower
+        for s in [
+            "expand_more",
+            "expand_less",
+            "read more",
+            "learn more",
+            "view all",
+            "load more",
+            "show more",
+            "see all",
+            "click here",
+            "privacy",
+            "more about",
+            "database list",
+            "timeline & faq",
+            "policy award",
+            "follow us",
+            "health law",
+            "http",
+            ".edu",
+            ".com",
+            ".org",
+        ]
+    ):
+        return False
+    # Contains digits
+    if any(c.isdigit() for c in name):
+        return False
+    return True
+
+
+def matching_overrides(raw):
+    """
+    Matcher fields that differ from the browse record, for a raw v2 entry.
+
+    Everything else the matcher reads is shared with the browse record, so only
+    these values are stored per PI (see services/faculty/store.py).
+    """
+    if not isinstance(raw, dict) or raw.get("schema_version") != "2.0":
+        return {}
+    contact = raw.get("contact", {})
+    research = raw.get("research", {})
+    pubs = raw.get("publications", {})
+    funding = raw.get("funding", {})
+    return {
+        "primary_email_quality": "verified" if contact.get("email_confidence", "") == "HIGH" else "uncertain",
+        "research_topics": research.get("topics", []),
+        "pub_titles_recent": pubs.get("recent_papers", []),
+        "nsf_awards": funding.get("nsf_grants_count", 0),
+    }
+
+
+def to_serving_record(raw, normalized):
+    """Shared store record: browse fields + dept_category + matcher overrides (no raw copy)."""
+    record = {k: v for k, v in normalized.items() if k != "_v2_data"}
+    record["dept_category"] = DEPARTMENT_CLASSIFIER(record.get("department") or "")
+    record["_match"] = matching_overrides(raw)
+    return record
+
+
+def iter_serving_entries(
+    raw_entries: Iterable[Any],
+    enabled_schools: Optional[set] = ENABLED_SCHOOLS,
+) -> Iterator[Tuple[Dict[str, Any], Dict[str, Any]]]:
+    """
+    Yield (raw, normalized) pairs for every record that should be served.
+
+    Applies normalization, the person-name guard, the enabled-school filter,
+    the low-quality filter and (name, school) dedupe, in that order.
+    """
+    seen_name_school = set()
+    for raw in raw_entries:
+        normalized = normalize_faculty_entry(raw)
+        if not normalized:
+            continue
+        if not is_valid_person_name(normalized.get("name", "")):
+            continue
+        school = normalized.get("school", "").lower()
+        if enabled_schools is not None and school not in enabled_schools:
+            continue
+        if normalized.get("department", "") == "Various":
+            continue
+        # Filter low-quality entries: no department, no research areas, no h_index
+        if (not normalized.get("department", "").strip()
+                and not normalized.get("research_areas", "").strip()
+                and normalized.get("h_index") is None):
+            continue
+        name_lower = normalized.get("name", "").lower()
+        if not name_lower:
+            continue
+        dedupe_key = (name_lower, school)
+        if dedupe_key in seen_name_school:
+            continue
+        seen_name_school.add(dedupe_key)
+        yield raw, normalized
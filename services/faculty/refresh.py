@@ -0,0 +1,116 @@
+"""
+Stale-while-revalidate holder for the current faculty generation.
+
+Readers always get the current generation immediately. Once it is older than
+the TTL, exactly one background thread builds (and warms) the next generation
+and then swaps the reference; concurrent readers keep serving the old one.
+If an `unchanged` check says the source has not changed since the current
+generation was built, that refresh keeps it instead of rebuilding.
+"""
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+
+class StaleWhileRevalidate:
+    """Single-flight, background-refreshing holder for one value."""
+
+    def __init__(
+        self,
+        build: Callable[[], Any],
+        ttl: float,
+        warmers: Optional[List[Callable[[Any], Any]]] = None,
+        on_swap: Optional[Callable[[Any], None]] = None,
+        logger: Any = None,
+        name: str = "value",
+        unchanged: Optional[Callable[[Any], bool]] = None,
+    ):
+        self._build = build
+        self.ttl = ttl
+        self.warmers = list(warmers or [])
+        self._on_swap = on_swap
+        self._logger = logger
+        self.name = name
+        self._unchanged = unchanged
+
+        self._current: Any = None
+        self._built_at = 0.0
+        self._lock = threading.Lock()
+        self._refreshing = False
+        self.stats: Dict[str, Any] = {
+            "refresh_count": 0,
+            "refresh_errors": 0,
+            "refresh_skipped": 0,
+            "last_refresh_seconds": None,
+            "last_refresh_at": None,
+            "last_error": None,
+        }
+
+    def peek(self) -> Any:
+        """Current value without triggering a build or refresh (may be None)."""
+        return self._current
+
+    def get(self) -> Any:
+        """Return the current value; build synchronously only if there is none yet."""
+        current = self._current
+        if current is None:
+            with self._lock:
+                if self._current is None:
+                    # Cold start: the first caller builds, the rest wait on the lock
+                    self._swap(self._timed_build())
+                return self._current
+        if time.time() - self._built_at >= self.ttl:
+            self.refresh_async()
+        return current
+
+    def refresh_async(self) -> bool:
+        """Start a background rebuild unless one is already running. Returns True if started."""
+        with self._lock:
+            if self._refreshing:
+                return False
+            self._refreshing = True
+        thread = threading.Thread(target=self._refresh_worker, name=f"{self.name}-refresh", daemon=True)
+        thread.start()
+        return True
+
+    def _refresh_worker(self) -> None:
+        try:
+            if self._unchanged and self._current is not None and self._unchanged(self._current):
+                # Same source as the current generation: keep it for another TTL
+                self.stats["refresh_skipped"] += 1
+                self._built_at = time.time()
+                return
+            value = self._timed_build()
+            with self._lock:
+                self._swap(value)
+        except Exception as e:
+            self.stats["refresh_errors"] += 1
+            self.stats["last_error"] = str(e)
+            # Keep serving the old generation; retry after another TTL
+            self._built_at = time.time()
+            if self._logger:
+                self._logger.error(f"Background refresh of {self.name} failed: {e}")
+        finally:
+            with self._lock:
+                self._refreshing = False
+
+    def _timed_build(self) -> Any:
+        start = time.perf_counter()
+        value = self._build()
+        for warm in self.warmers:
+            warm(value)
+        elapsed = time.perf_counter() - start
+        self.stats["refresh_count"] += 1
+        self.stats["last_refresh_seconds"] = round(elapsed, 4)
+        self.stats["last_refresh_at"] = time.time()
+        self.stats["last_error"] = None
+        if self._logger:
+            self._logger.info(f"Built {self.name} generation in {elapsed:.3f}s")
+        return value
+
+    def _swap(self, value: Any) -> None:
+        # Single reference assignment: readers see either the old or the new generation
+        self._current = value
+        self._built_at = time.time()
+        if self._on_swap:
+            self._on_swap(value)
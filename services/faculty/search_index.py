@@ -0,0 +1,198 @@
+"""
+Substring search index for the /api/search-pis typeahead.
+
+Semantics are exactly the old linear scan: the query is lowercased and split on
+whitespace, and every term scores a field's weight when it is a substring of
+that (lowercased) field. Because a term never contains whitespace, it is a
+substring of a field iff it is a substring of one of the field's whitespace
+tokens. So each field keeps a vocabulary of distinct tokens, a trigram index
+over the vocabulary to find matching tokens without scanning it, and per-token
+doc postings (a bitmap for frequent tokens, a list for rare ones).
+
+Scores are kept bit-sliced (one bitmap per bit of the score, like facets.py),
+so a query is a handful of big-int ORs/adds and the top results are read off
+in descending score order without visiting every matching record.
+"""
+from typing import Any, Dict, Iterator, List, Sequence, Set, Tuple
+
+from .facets import iter_bits
+
+# (field, weight) in the order the typeahead scores them
+SEARCH_FIELDS: Tuple[Tuple[str, int], ...] = (
+    ("name", 5),
+    ("department", 4),
+    ("research_areas", 3),
+    ("school", 2),
+    ("lab_techniques", 1),
+)
+
+GRAM = 3
+
+# Tokens in at least 1/BITMAP_DENSITY of records store a bitmap instead of a
+# doc list; at that density the bitmap is no larger than the list it replaces.
+BITMAP_DENSITY = 32
+
+# Terms shorter than a trigram match many rare tokens; their bitmaps are cached
+SHORT_TERM_CACHE_SIZE = 256
+
+
+def _field_text(pi: Dict[str, Any], field: str) -> str:
+    value = pi.get(field) or ""
+    if isinstance(value, list):
+        value = ", ".join(str(v) for v in value)
+    return str(value).lower()
+
+
+def _grams(token: str) -> Set[str]:
+    return {token[i:i + GRAM] for i in range(len(token) - GRAM + 1)}
+
+
+class _FieldIndex:
+    """Token vocabulary with doc postings and a trigram -> token index for one field."""
+
+    __slots__ = ("n_docs", "tokens", "postings", "bitmaps", "gram_tokens", "_short_cache")
+
+    def __init__(self, texts: Sequence[str]):
+        self.n_docs = len(texts)
+        self.tokens: List[str] = []
+        self.postings: List[List[int]] = []
+        self.bitmaps: Dict[int, int] = {}
+        self.gram_tokens: Dict[str, Set[int]] = {}
+        self._short_cache: Dict[str, int] = {}
+
+        token_ids: Dict[str, int] = {}
+        for doc_id, text in enumerate(texts):
+            for token in set(text.split()):
+                tid = token_ids.get(token)
+                if tid is None:
+                    tid = len(self.tokens)
+                    token_ids[token] = tid
+                    self.tokens.append(token)
+                    self.postings.append([])
+                    for gram in _grams(token):
+                        self.gram_tokens.setdefault(gram, set()).add(tid)
+                self.postings[tid].append(doc_id)
+
+        dense = max(1, self.n_docs // BITMAP_DENSITY)
+        for tid, docs in enumerate(self.postings):
+            if len(docs) >= dense:
+                self.bitmaps[tid] = self._to_bits(docs)
+                self.postings[tid] = []
+
+    def _to_bits(self, docs) -> int:
+        buf = bytearray((self.n_docs + 7) // 8)
+        for d in docs:
+            buf[d >> 3] |= 1 << (d & 7)
+        return int.from_bytes(buf, "little")
+
+    def matching_tokens(self, term: str) -> List[int]:
+        """Ids of vocabulary tokens that contain *term*."""
+        if len(term) < GRAM:
+            # Short terms: scan the vocabulary, not the documents
+            return [tid for tid, token in enumerate(self.tokens) if term in token]
+        candidates = None
+        for gram in sorted(_grams(term), key=lambda g: len(self.gram_tokens.get(g, ()))):
+            tids = self.gram_tokens.get(gram)
+            if not tids:
+                return []
+            candidates = set(tids) if candidates is None else candidates & tids
+            if not candidates:
+                return []
+        return [tid for tid in candidates if term in self.tokens[tid]]
+
+    def bits_containing(self, term: str) -> int:
+        """Bitmap of records whose field contains *term*."""
+        short = len(term) < GRAM
+        if short:
+            bits = self._short_cache.get(term)
+            if bits is not None:
+                return bits
+        bits = 0
+        rare: List[int] = []
+        for tid in self.matching_tokens(term):
+            dense = self.bitmaps.get(tid)
+            if dense is not None:
+                bits |= dense
+            else:
+                rare.extend(self.postings[tid])
+        if rare:
+            bits |= self._to_bits(rare)
+        if short:
+            if len(self._short_cache) >= SHORT_TERM_CACHE_SIZE:
+                self._short_cache.clear()
+            self._short_cache[term] = bits
+        return bits
+
+
+def _add_weighted(planes: List[int], bits: int, weight: int) -> None:
+    """Add weight * bits into the bit-sliced counter *planes* (planes[k] = bit k of each score)."""
+    k = 0
+    while weight:
+        if weight & 1:
+            carry, j = bits, k
+            while carry:
+                while j >= len(planes):
+                    planes.append(0)
+                plane = planes[j]
+                planes[j] = plane ^ carry
+                carry &= plane
+                j += 1
+        weight >>= 1
+        k += 1
+
+
+def _groups_by_score(planes: List[int], mask: int, k: int) -> Iterator[int]:
+    """Yield bitmaps of records with equal score, highest score first."""
+    if k < 0:
+        yield mask
+        return
+    high = mask & planes[k]
+    if high:
+        yield from _groups_by_score(planes, high, k - 1)
+    low = mask & ~planes[k]
+    if low:
+        yield from _groups_by_score(planes, low, k - 1)
+
+
+class SubstringSearchIndex:
+    """Weighted multi-field substring search over a fixed list of records."""
+
+    def __init__(self, records: Sequence[Dict[str, Any]], fields: Sequence[Tuple[str, int]] = SEARCH_FIELDS):
+        self.records = records
+        self.fields = tuple(fields)
+        self._indexes = [
+            _FieldIndex([_field_text(pi, field) for pi in records])
+            for field, _weight in self.fields
+        ]
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def _score_planes(self, query: str) -> List[int]:
+        planes: List[int] = []
+        for term in query.lower().split():
+            for (_field, weight), idx in zip(self.fields, self._indexes):
+                bits = idx.bits_containing(term)
+                if bits:
+                    _add_weighted(planes, bits, weight)
+        return planes
+
+    def search_ids(self, query: str, limit: int = 20) -> List[int]:
+        """Top *limit* record positions by score; ties keep dataset order."""
+        planes = self._score_planes(query)
+        matched = 0
+        for plane in planes:
+            matched |= plane
+        out: List[int] = []
+        if not matched or limit <= 0:
+            return out
+        for group in _groups_by_score(planes, matched, len(planes) - 1):
+            for doc_id in iter_bits(group):
+                out.append(doc_id)
+                if len(out) >= limit:
+                    return out
+        return out
+
+    def search(self, query: str, limit: int = 20) -> List[Dict[str, Any]]:
+        """Top *limit* records by score; ties keep dataset order."""
+        return [self.records[doc_id] for doc_id in self.search_ids(query, limit)]
@@ -0,0 +1,119 @@
+"""
+Precompiled "serving dataset" for the web process.
+
+scripts/compile_serving_dataset.py runs every per-record transformation once at
+build time (normalization, filtering, dedupe, classification, matcher
+overrides) and writes the result next to a manifest carrying content hashes.
+The app then loads the artifact as-is, as long as the manifest still matches
+the v2 source file it was compiled from.
+"""
+import hashlib
+import json
+import os
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from .normalize import iter_serving_entries, to_serving_record
+
+SERVING_SCHEMA_VERSION = "serving-3"
+SERVING_ARTIFACT_NAME = "faculty_serving.json"
+SERVING_MANIFEST_NAME = "manifest.json"
+
+
+def sha256_file(path: str) -> str:
+    """Hex SHA-256 of a file, read in chunks."""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def build_serving_payload(v2_data: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Turn raw v2 records into the serving payload (one shared record per PI)."""
+    faculty = [to_serving_record(raw, normalized) for raw, normalized in iter_serving_entries(v2_data)]
+    return {
+        "schema_version": SERVING_SCHEMA_VERSION,
+        "faculty": faculty,
+    }
+
+
+def write_serving_dataset(v2_path: str, out_dir: str) -> Dict[str, Any]:
+    """Compile v2_path into out_dir and return the manifest that was written."""
+    with open(v2_path, "r", encoding="utf-8") as f:
+        v2_data = json.load(f)
+    if not isinstance(v2_data, list):
+        raise ValueError(f"Unexpected v2 faculty format in {v2_path}: expected list, got {type(v2_data)}")
+
+    payload = build_serving_payload(v2_data)
+
+    os.makedirs(out_dir, exist_ok=True)
+    artifact_path = os.path.join(out_dir, SERVING_ARTIFACT_NAME)
+    tmp_path = artifact_path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(payload, f, ensure_ascii=False, separators=(",", ":"))
+    os.replace(tmp_path, artifact_path)
+
+    manifest = {
+        "schema_version": SERVING_SCHEMA_VERSION,
+        "artifact": SERVING_ARTIFACT_NAME,
+        "sha256": sha256_file(artifact_path),
+        "source": os.path.basename(v2_path),
+        "source_sha256": sha256_file(v2_path),
+        "source_size": os.path.getsize(v2_path),
+        "source_mtime": os.path.getmtime(v2_path),
+        "source_count": len(v2_data),
+        "faculty_count": len(payload["faculty"]),
+        "generated_at": datetime.now(timezone.utc).isoformat(),
+    }
+    manifest_path = os.path.join(out_dir, SERVING_MANIFEST_NAME)
+    with open(manifest_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+def read_serving_manifest(out_dir: str) -> Optional[Dict[str, Any]]:
+    """The manifest of a compiled serving dataset, or None if there is none for this schema."""
+    manifest_path = os.path.join(out_dir, SERVING_MANIFEST_NAME)
+    if not os.path.exists(manifest_path):
+        return None
+    with open(manifest_path, "r", encoding="utf-8") as f:
+        manifest = json.load(f)
+    if manifest.get("schema_version") != SERVING_SCHEMA_VERSION:
+        return None
+    return manifest
+
+
+def source_matches(manifest: Dict[str, Any], source_path: str) -> bool:
+    """True if source_path is the file the artifact was compiled from.
+
+    Same size and mtime as recorded is taken as unchanged; otherwise (e.g. after a
+    fresh checkout) the file is hashed and compared with source_sha256.
+    """
+    stat = os.stat(source_path)
+    if stat.st_size == manifest.get("source_size") and stat.st_mtime == manifest.get("source_mtime"):
+        return True
+    return sha256_file(source_path) == manifest.get("source_sha256")
+
+
+def load_serving_dataset(out_dir: str, source_path: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """
+    Load a compiled serving dataset, or None if there is no usable one.
+
+    Returns the payload with its manifest attached under "manifest". The
+    artifact is rejected if its schema version does not match, or if
+    source_path exists and is not the file it was compiled from (the caller
+    then falls back to the raw v2 file instead of serving stale data).
+    """
+    manifest = read_serving_manifest(out_dir)
+    if manifest is None:
+        return None
+    if source_path and os.path.exists(source_path) and not source_matches(manifest, source_path):
+        return None
+    artifact_path = os.path.join(out_dir, manifest.get("artifact") or SERVING_ARTIFACT_NAME)
+    with open(artifact_path, "r", encoding="utf-8") as f:
+        payload = json.load(f)
+    if payload.get("schema_version") != SERVING_SCHEMA_VERSION:
+        return None
+    payload["manifest"] = manifest
+    return payload
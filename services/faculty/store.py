@@ -0,0 +1,127 @@
+"""
+Single in-process faculty store shared by Browse, Search and Matching.
+
+One list of flat records is parsed per worker. The matching service consumes
+lightweight read-only views over those same dicts instead of a second copy
+of the dataset, so Browse and Matching can no longer disagree on fields.
+"""
+import threading
+import time
+from collections.abc import Mapping
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from .lookup import PILookup
+from .normalize import iter_serving_entries, to_serving_record
+
+# Matcher key -> browse key it reads from
+_MATCH_ALIASES = {
+    "institution": "school",
+    "primary_email": "email",
+}
+
+
+class MatchingView(Mapping):
+    """Read-only matcher projection of a shared store record.
+
+    Lookups check the record's matcher overrides ("_match"), then aliases,
+    then the browse fields. Nothing is copied.
+    """
+
+    __slots__ = ("_rec", "_over")
+
+    def __init__(self, record: Dict[str, Any]):
+        self._rec = record
+        self._over = record.get("_match") or {}
+
+    def __getitem__(self, key: str) -> Any:
+        if key in self._over:
+            return self._over[key]
+        return self._rec[_MATCH_ALIASES.get(key, key)]
+
+    def get(self, key: str, default: Any = None) -> Any:
+        if key in self._over:
+            return self._over[key]
+        return self._rec.get(_MATCH_ALIASES.get(key, key), default)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._over or _MATCH_ALIASES.get(key, key) in self._rec
+
+    def __iter__(self) -> Iterator[str]:
+        seen = set()
+        for key in list(self._rec) + list(_MATCH_ALIASES) + list(self._over):
+            if key.startswith("_") or key in seen or key not in self:
+                continue
+            seen.add(key)
+            yield key
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    @property
+    def record(self) -> Dict[str, Any]:
+        """The shared browse record this view reads from."""
+        return self._rec
+
+
+class FacultyStore:
+    """One generation of faculty data plus projections derived from it."""
+
+    def __init__(self, records: List[Dict[str, Any]], version: Optional[str] = None, source: str = ""):
+        self.records = records
+        self.version = version
+        self.source = source
+        self.loaded_at = time.time()
+        self._matching_records: Optional[List[MatchingView]] = None
+        self._derived: Dict[str, Any] = {}
+        self._derived_lock = threading.RLock()
+
+    @classmethod
+    def from_v2(cls, v2_data: List[Any], source: str = "") -> "FacultyStore":
+        """Build a store from raw v2 entries (runtime fallback when no serving artifact exists)."""
+        records = [to_serving_record(raw, normalized) for raw, normalized in iter_serving_entries(v2_data)]
+        return cls(records, version=None, source=source)
+
+    @classmethod
+    def from_serving(cls, payload: Dict[str, Any], source: str = "") -> "FacultyStore":
+        """Wrap a loaded serving payload (see services/faculty/serving.py) without copying records."""
+        manifest = payload.get("manifest") or {}
+        return cls(payload.get("faculty") or [], version=manifest.get("sha256"), source=source)
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    @property
+    def data_version(self) -> str:
+        """Cache/ETag key for this generation: the artifact sha256, else a per-load token."""
+        if self.version:
+            return self.version
+        return f"{self.source}@{self.loaded_at:.6f}"
+
+    def matching_records(self) -> List[MatchingView]:
+        """Matcher projection of every record (built once per generation)."""
+        if self._matching_records is None:
+            self._matching_records = [MatchingView(rec) for rec in self.records]
+        return self._matching_records
+
+    def lookup(self) -> PILookup:
+        """id / name / alias / email indexes for this generation (built once)."""
+        return self.derived("pi_lookup", lambda: PILookup(self.records))
+
+    def derived(self, key: str, build: Callable[[], Any]) -> Any:
+        """Memoize a structure derived from this generation (matcher, dropdown options, ...).
+
+        Derived values live and die with the store, so a refreshed generation
+        never serves an index built from the previous one.
+        """
+        try:
+            return self._derived[key]
+        except KeyError:
+            pass
+        with self._derived_lock:
+            if key not in self._derived:
+                self._derived[key] = build()
+            return self._derived[key]
+
+    def derived_keys(self) -> List[str]:
+        """Keys of the derived structures built so far for this generation."""
+        return list(self._derived)
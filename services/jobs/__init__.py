@@ -0,0 +1,4 @@
+"""Durable background jobs (SQLite queue, worker threads)."""
+from .queue import Job, JobQueue
+
+__all__ = ["Job", "JobQueue"]
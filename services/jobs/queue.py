@@ -0,0 +1,292 @@
+"""
+Durable job queue in an SQLite file, for work that should not hold a web worker.
+
+A route submits a job (kind + JSON payload) and returns its id at once; worker
+threads, in the web processes or in a separate `flask run-jobs` process, claim
+queued jobs, run the handler registered for the kind and store its JSON result
+(or error). Handlers may store partial results while they run, so a page
+polling the job can show progress. Jobs survive restarts: one left running by
+a worker that died is queued again (up to max_attempts) once its heartbeat is
+stale, and finished jobs are deleted after `retention` seconds.
+
+The file is shared by the processes on one host (like the LLM response cache).
+"""
+import json
+import os
+import secrets
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    owner TEXT,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL,
+    result TEXT,
+    error TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    heartbeat REAL,
+    worker TEXT
+)
+"""
+_INDEX = "CREATE INDEX IF NOT EXISTS jobs_status_created ON jobs (status, created_at)"
+
+# queued -> running -> done | failed (running -> queued again if its worker died)
+STATUSES = ("queued", "running", "done", "failed")
+
+
+class Job:
+    """A claimed job as seen by its handler."""
+
+    def __init__(self, queue: "JobQueue", id: str, kind: str, owner: Optional[str], payload: Any, attempts: int):
+        self._queue = queue
+        self.id = id
+        self.kind = kind
+        self.owner = owner
+        self.payload = payload
+        self.attempts = attempts
+
+    def update(self, result: Any) -> None:
+        """Store a partial result (visible to get() while the job runs)."""
+        self._queue._execute(
+            "UPDATE jobs SET result = ?, heartbeat = ? WHERE id = ? AND status = 'running'",
+            (json.dumps(result), time.time(), self.id),
+        )
+
+
+class JobQueue:
+    """SQLite-backed job queue with per-process worker threads."""
+
+    def __init__(
+        self,
+        path: str,
+        workers: int = 2,
+        poll_interval: float = 1.0,
+        stale_after: float = 300.0,
+        max_attempts: int = 2,
+        retention: float = 86400.0,
+        logger=None,
+        name: str = "jobs",
+    ):
+        self.path = path
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self.stale_after = stale_after
+        self.max_attempts = max_attempts
+        self.retention = retention
+        self._logger = logger
+        self.name = name
+        self._handlers: Dict[str, Callable[[Job], Any]] = {}
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._pid: Optional[int] = None
+        self._threads = 0
+        self._running: Dict[str, float] = {}  # job id -> start, for this process's heartbeats
+        self.counts = {"done": 0, "failed": 0, "requeued": 0}
+        conn = self._conn()
+        conn.execute(_SCHEMA)
+        conn.execute(_INDEX)
+
+    def _conn(self) -> sqlite3.Connection:
+        # One connection per thread, and new ones after fork
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+    def _execute(self, sql: str, params=()) -> sqlite3.Cursor:
+        return self._conn().execute(sql, params)
+
+    def handler(self, kind: str) -> Callable[[Callable[[Job], Any]], Callable[[Job], Any]]:
+        """Decorator: fn(job) -> JSON-serializable result runs every job of this kind."""
+        def register(fn):
+            self._handlers[kind] = fn
+            return fn
+        return register
+
+    def submit(self, kind: str, payload: Any, owner: Optional[str] = None) -> str:
+        """Queue a job; returns its id. Wakes this process's workers (starting them after a fork)."""
+        if kind not in self._handlers:
+            raise ValueError(f"no handler for job kind {kind!r}")
+        job_id = secrets.token_urlsafe(12)
+        self._execute(
+            "INSERT INTO jobs (id, kind, owner, payload, status, created_at) VALUES (?, ?, ?, ?, 'queued', ?)",
+            (job_id, kind, None if owner is None else str(owner), json.dumps(payload), time.time()),
+        )
+        self.start()
+        self._wake.set()
+        return job_id
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        row = self._execute(
+            "SELECT id, kind, owner, status, result, error, attempts, created_at, started_at, finished_at "
+            "FROM jobs WHERE id = ?",
+            (job_id,),
+        ).fetchone()
+        if row is None:
+            return None
+        job = dict(zip(
+            ("id", "kind", "owner", "status", "result", "error", "attempts", "created_at", "started_at", "finished_at"),
+            row,
+        ))
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        if job["status"] == "queued":
+            job["ahead"] = self._execute(
+                "SELECT COUNT(*) FROM jobs WHERE status = 'queued' AND created_at < ?", (job["created_at"],)
+            ).fetchone()[0]
+        return job
+
+    def _claim(self) -> Optional[Job]:
+        kinds = list(self._handlers)
+        if not kinds:
+            return None
+        conn = self._conn()
+        now = time.time()
+        # IMMEDIATE takes the write lock first, so two workers cannot pick the same row
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                f"SELECT id, kind, owner, payload, attempts FROM jobs WHERE status = 'queued' "
+                f"AND kind IN ({','.join('?' * len(kinds))}) ORDER BY created_at LIMIT 1",
+                kinds,
+            ).fetchone()
+            if row is not None:
+                conn.execute(
+                    "UPDATE jobs SET status = 'running', attempts = attempts + 1, started_at = ?, heartbeat = ?, "
+                    "worker = ? WHERE id = ?",
+                    (now, now, f"{os.getpid()}/{threading.current_thread().name}", row[0]),
+                )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        if row is None:
+            return None
+        return Job(self, row[0], row[1], row[2], json.loads(row[3]), row[4] + 1)
+
+    def _finish(self, job: Job, status: str, result: Any = None, error: Optional[str] = None) -> None:
+        sql = "UPDATE jobs SET status = ?, error = ?, finished_at = ?"
+        params = [status, error, time.time()]
+        if result is not None:
+            # A failed job keeps its last partial result
+            sql += ", result = ?"
+            params.append(json.dumps(result))
+        self._execute(sql + " WHERE id = ?", params + [job.id])
+        self.counts[status] += 1
+
+    def run_one(self) -> bool:
+        """Claim and run one queued job; False when there was none."""
+        job = self._claim()
+        if job is None:
+            return False
+        with self._lock:
+            self._running[job.id] = time.time()
+        try:
+            result = self._handlers[job.kind](job)
+        except Exception as e:
+            if self._logger:
+                self._logger.warning(f"{self.name}: {job.kind} job {job.id} failed: {e}")
+            self._finish(job, "failed", error=str(e) or e.__class__.__name__)
+        else:
+            self._finish(job, "done", result=result)
+        finally:
+            with self._lock:
+                self._running.pop(job.id, None)
+        return True
+
+    def _work(self) -> None:
+        while not self._stop.is_set():
+            try:
+                if self.run_one():
+                    continue
+            except sqlite3.Error as e:
+                if self._logger:
+                    self._logger.error(f"{self.name}: queue error: {e}")
+            self._wake.wait(self.poll_interval)
+            self._wake.clear()
+
+    def maintain(self) -> None:
+        """Heartbeat this process's running jobs, requeue abandoned ones, delete old finished ones."""
+        now = time.time()
+        with self._lock:
+            running = list(self._running)
+        if running:
+            self._execute(
+                f"UPDATE jobs SET heartbeat = ? WHERE id IN ({','.join('?' * len(running))})", [now] + running
+            )
+        stale = now - self.stale_after
+        requeued = self._execute(
+            "UPDATE jobs SET status = 'queued', worker = NULL WHERE status = 'running' AND heartbeat < ? "
+            "AND attempts < ?",
+            (stale, self.max_attempts),
+        ).rowcount
+        self._execute(
+            "UPDATE jobs SET status = 'failed', error = 'worker stopped while running the job', finished_at = ? "
+            "WHERE status = 'running' AND heartbeat < ?",
+            (now, stale),
+        )
+        self._execute("DELETE FROM jobs WHERE status IN ('done', 'failed') AND finished_at < ?", (now - self.retention,))
+        if requeued:
+            self.counts["requeued"] += requeued
+            self._wake.set()
+
+    def _maintain_loop(self) -> None:
+        while not self._stop.wait(min(30.0, self.stale_after / 4)):
+            try:
+                self.maintain()
+            except sqlite3.Error as e:
+                if self._logger:
+                    self._logger.error(f"{self.name}: maintenance failed: {e}")
+
+    def start(self, workers: Optional[int] = None) -> None:
+        """Run `workers` threads in this process (again after fork; adds threads if asked for more).
+
+        workers=0 only enqueues, leaving the jobs to another process.
+        """
+        workers = self.workers if workers is None else workers
+        pid = os.getpid()
+        with self._lock:
+            if self._pid != pid:
+                self._pid, self._threads = pid, 0
+            first, self._threads = self._threads, max(self._threads, workers)
+        if first >= workers:
+            return
+        if first == 0:
+            self.maintain()
+            threading.Thread(target=self._maintain_loop, name=f"{self.name}-maintenance", daemon=True).start()
+        for i in range(first, workers):
+            threading.Thread(target=self._work, name=f"{self.name}-worker-{i}", daemon=True).start()
+
+    def run_forever(self, workers: Optional[int] = None) -> None:
+        """Dedicated worker process: start the threads and block until interrupted."""
+        self.start(workers)
+        try:
+            while not self._stop.wait(1.0):
+                pass
+        except KeyboardInterrupt:
+            self.stop()
+
+    def stats(self) -> Dict[str, int]:
+        """Jobs by status (all processes) and this process's completed/failed/requeued counts."""
+        counts = {status: 0 for status in STATUSES}
+        try:
+            counts.update(dict(self._execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()))
+        except sqlite3.Error:
+            pass
+        counts.update({f"local_{k}": v for k, v in self.counts.items()})
+        return counts
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._wake.set()
@@ -0,0 +1,4 @@
+"""Helpers around OpenAI chat completions (response caching, ...)."""
+from .response_cache import LLMResponseCache, cache_key
+
+__all__ = ["LLMResponseCache", "cache_key"]
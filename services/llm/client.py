@@ -0,0 +1,36 @@
+"""
+Lazily constructed OpenAI client.
+
+Importing the openai SDK takes about half a second (its generated types), which
+every gunicorn worker used to pay at import even when no request needed it.
+LazyOpenAI stands in for openai.OpenAI: the SDK is imported and the real client
+built on first attribute access (client.chat.completions.create(...)).
+"""
+import threading
+from typing import Any, Optional
+
+
+class LazyOpenAI:
+    """Proxy for openai.OpenAI(api_key=..., **kwargs), built on first use."""
+
+    def __init__(self, api_key: str, **kwargs: Any):
+        self._api_key = api_key
+        self._kwargs = kwargs
+        self._client: Optional[Any] = None
+        self._lock = threading.Lock()
+
+    def _get(self) -> Any:
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    from openai import OpenAI
+
+                    self._client = OpenAI(api_key=self._api_key, **self._kwargs)
+        return self._client
+
+    @property
+    def loaded(self) -> bool:
+        return self._client is not None
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._get(), name)
@@ -0,0 +1,175 @@
+"""
+Content-addressed cache of chat completion responses.
+
+Email drafts and AI matching send the same prompt again whenever a user
+regenerates or reruns something with unchanged inputs. Responses are kept in an
+SQLite file shared by all workers on the host, keyed by a hash of
+(model, messages, temperature, max_tokens). Entries expire after a TTL, and the
+least recently used ones are evicted once the stored responses exceed max_bytes.
+Callers that want a fresh answer skip get() and put() the new one over the old.
+
+Each row counts its own hits, so saved tokens survive restarts and add up across
+workers. Any SQLite problem degrades to a miss.
+"""
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS llm_responses (
+    key TEXT PRIMARY KEY,
+    model TEXT,
+    response TEXT NOT NULL,
+    prompt_tokens INTEGER NOT NULL DEFAULT 0,
+    completion_tokens INTEGER NOT NULL DEFAULT 0,
+    size INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    last_used REAL NOT NULL,
+    hits INTEGER NOT NULL DEFAULT 0
+)
+"""
+_INDEX = "CREATE INDEX IF NOT EXISTS llm_responses_last_used ON llm_responses (last_used)"
+
+# After an eviction the cache is brought down to this fraction of max_bytes
+EVICT_TO = 0.9
+
+
+def cache_key(model: str, messages: List[Dict[str, Any]], temperature: Optional[float], max_tokens: Optional[int]) -> str:
+    """sha256 over a canonical JSON encoding of everything that shapes the response."""
+    payload = json.dumps(
+        {"model": model, "messages": messages, "temperature": temperature, "max_tokens": max_tokens},
+        sort_keys=True,
+        separators=(",", ":"),
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _usage_tokens(usage: Any) -> tuple:
+    if usage is None:
+        return 0, 0
+    if isinstance(usage, dict):
+        return int(usage.get("prompt_tokens") or 0), int(usage.get("completion_tokens") or 0)
+    return int(getattr(usage, "prompt_tokens", 0) or 0), int(getattr(usage, "completion_tokens", 0) or 0)
+
+
+class LLMResponseCache:
+    """SQLite-backed {key: response} with TTL, LRU size bound and hit/saved-token accounting."""
+
+    def __init__(self, path: str, ttl: float = 7 * 86400, max_bytes: int = 64 * 1024 * 1024):
+        self.path = path
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.saved_tokens = 0
+        self.evictions = 0
+        self.errors = 0
+        conn = self._conn()
+        conn.execute(_SCHEMA)
+        conn.execute(_INDEX)
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=2, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def _count(self, attr: str, n: int = 1) -> None:
+        with self._lock:
+            setattr(self, attr, getattr(self, attr) + n)
+
+    key = staticmethod(cache_key)
+
+    def get(self, key: str) -> Optional[str]:
+        """Cached response for key, or None (missing, expired or unreadable)."""
+        now = time.time()
+        try:
+            conn = self._conn()
+            row = conn.execute(
+                "SELECT response, prompt_tokens, completion_tokens, created_at FROM llm_responses WHERE key = ?",
+                (key,),
+            ).fetchone()
+            if row is not None and row[3] + self.ttl <= now:
+                conn.execute("DELETE FROM llm_responses WHERE key = ?", (key,))
+                row = None
+            if row is None:
+                self._count("misses")
+                return None
+            conn.execute(
+                "UPDATE llm_responses SET last_used = ?, hits = hits + 1 WHERE key = ?", (now, key)
+            )
+        except sqlite3.Error:
+            self._count("errors")
+            self._count("misses")
+            return None
+        self._count("hits")
+        self._count("saved_tokens", row[1] + row[2])
+        return row[0]
+
+    def put(self, key: str, response: str, model: str = "", usage: Any = None) -> None:
+        """Store a response (replacing any previous one for key). usage: the completion's token counts."""
+        if not response:
+            return
+        prompt_tokens, completion_tokens = _usage_tokens(usage)
+        now = time.time()
+        try:
+            conn = self._conn()
+            conn.execute(
+                "INSERT OR REPLACE INTO llm_responses "
+                "(key, model, response, prompt_tokens, completion_tokens, size, created_at, last_used, hits) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, 0)",
+                (key, model, response, prompt_tokens, completion_tokens, len(response.encode("utf-8")), now, now),
+            )
+            self._evict(conn, now)
+        except sqlite3.Error:
+            self._count("errors")
+
+    def _evict(self, conn: sqlite3.Connection, now: float) -> None:
+        conn.execute("DELETE FROM llm_responses WHERE created_at <= ?", (now - self.ttl,))
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM llm_responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        excess = total - int(self.max_bytes * EVICT_TO)
+        doomed = []
+        for key, size in conn.execute("SELECT key, size FROM llm_responses ORDER BY last_used"):
+            if excess <= 0:
+                break
+            doomed.append((key,))
+            excess -= size
+        conn.executemany("DELETE FROM llm_responses WHERE key = ?", doomed)
+        self._count("evictions", len(doomed))
+
+    def clear(self) -> None:
+        try:
+            self._conn().execute("DELETE FROM llm_responses")
+        except sqlite3.Error:
+            self._count("errors")
+
+    def stats(self) -> Dict[str, object]:
+        """This process's hit ratio and saved tokens, plus totals stored in the file."""
+        lookups = self.hits + self.misses
+        out: Dict[str, object] = {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "saved_tokens": self.saved_tokens,
+            "evictions": self.evictions,
+            "errors": self.errors,
+        }
+        try:
+            entries, size, total_hits, total_saved = self._conn().execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0), COALESCE(SUM(hits), 0), "
+                "COALESCE(SUM(hits * (prompt_tokens + completion_tokens)), 0) FROM llm_responses"
+            ).fetchone()
+            out.update(entries=entries, bytes=size, stored_hits=total_hits, stored_saved_tokens=total_saved)
+        except sqlite3.Error:
+            pass
+        return out
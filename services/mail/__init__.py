@@ -0,0 +1,4 @@
+"""Outgoing email: outbox sender with a reused SMTP connection."""
+from .outbox import OutboxMessage, OutboxSender, SMTPConnection
+
+__all__ = ["OutboxMessage", "OutboxSender", "SMTPConnection"]
@@ -0,0 +1,221 @@
+"""
+Background delivery of queued email over one reused SMTP connection.
+
+Request handlers only add a row to the outbox table; an OutboxSender thread
+per process claims pending rows in batches and sends them over a single
+authenticated connection that stays open while there is mail and is closed
+after a short idle period. Failures are retried with exponential backoff up to
+max_attempts, and every attempt's outcome is recorded on the row. Storage is
+left to the caller (claim / record callables), like BufferedCounter's flush.
+"""
+import os
+import random
+import smtplib
+import threading
+import time
+from dataclasses import dataclass
+from email.message import EmailMessage
+from typing import Callable, Dict, List, Optional
+
+
+def is_permanent(error: Exception) -> bool:
+    """A 5xx rejection of the recipient, sender or message: retrying will not help.
+
+    4xx replies are temporary, and a failed login is a configuration problem
+    that may be fixed before the next attempt.
+    """
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return all(code >= 500 for code, _ in error.recipients.values())
+    if isinstance(error, smtplib.SMTPAuthenticationError):
+        return False
+    return isinstance(error, smtplib.SMTPResponseException) and error.smtp_code >= 500
+
+
+@dataclass
+class OutboxMessage:
+    id: int
+    to: str
+    subject: str
+    body: str
+    attempts: int = 0
+
+
+class SMTPConnection:
+    """One SMTP session, opened on first send and reopened after a disconnect."""
+
+    def __init__(
+        self,
+        host: str,
+        port: int = 587,
+        username: str = "",
+        password: str = "",
+        from_addr: str = "",
+        starttls: bool = True,
+        timeout: float = 20.0,
+        idle_timeout: float = 30.0,
+    ):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.from_addr = from_addr or username
+        self.starttls = starttls
+        self.timeout = timeout
+        self.idle_timeout = idle_timeout
+        self._smtp: Optional[smtplib.SMTP] = None
+        self._last_used = 0.0
+        self.connects = 0
+
+    def _connect(self) -> smtplib.SMTP:
+        if self.port == 465:
+            smtp = smtplib.SMTP_SSL(self.host, self.port, timeout=self.timeout)
+        else:
+            smtp = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+            if self.starttls:
+                smtp.starttls()
+        if self.username:
+            smtp.login(self.username, self.password)
+        self.connects += 1
+        return smtp
+
+    def send(self, message: OutboxMessage) -> None:
+        msg = EmailMessage()
+        msg["From"] = self.from_addr
+        msg["To"] = message.to
+        msg["Subject"] = message.subject
+        msg.set_content(message.body)
+        for attempt in (0, 1):
+            if self._smtp is None:
+                self._smtp = self._connect()
+            try:
+                self._smtp.send_message(msg)
+                self._last_used = time.monotonic()
+                return
+            except smtplib.SMTPServerDisconnected:
+                # The server dropped an idle session; reconnect once
+                self._smtp = None
+                if attempt:
+                    raise
+
+    def close_if_idle(self) -> None:
+        if self._smtp is not None and time.monotonic() - self._last_used >= self.idle_timeout:
+            self.close()
+
+    def close(self) -> None:
+        smtp, self._smtp = self._smtp, None
+        if smtp is not None:
+            try:
+                smtp.quit()
+            except (smtplib.SMTPException, OSError):
+                smtp.close()
+
+
+class OutboxSender:
+    """Per-process thread that drains the outbox through one SMTPConnection.
+
+    claim(limit) marks up to `limit` due messages as in flight and returns them;
+    record(message, status, error, retry_in) stores an attempt's outcome, status
+    being "sent", "pending" (retry in `retry_in` seconds) or "failed".
+    """
+
+    def __init__(
+        self,
+        claim: Callable[[int], List[OutboxMessage]],
+        record: Callable[[OutboxMessage, str, Optional[str], Optional[float]], None],
+        transport: SMTPConnection,
+        interval: float = 15.0,
+        batch_size: int = 20,
+        max_attempts: int = 6,
+        backoff: float = 30.0,
+        max_backoff: float = 3600.0,
+        logger=None,
+        name: str = "outbox",
+    ):
+        self._claim = claim
+        self._record = record
+        self.transport = transport
+        self.interval = interval
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self._logger = logger
+        self.name = name
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._pid: Optional[int] = None
+        self.counts: Dict[str, int] = {"sent": 0, "retried": 0, "failed": 0, "errors": 0}
+
+    def start(self) -> None:
+        """Start the thread (again in a forked worker: threads do not survive fork)."""
+        pid = os.getpid()
+        if self._pid == pid and self._thread is not None:
+            return
+        with self._lock:
+            if self._pid == pid and self._thread is not None:
+                return
+            self._pid = pid
+            self._thread = threading.Thread(target=self._run, name=f"{self.name}-sender", daemon=True)
+            self._thread.start()
+
+    def notify(self) -> None:
+        """New mail was queued: send it now instead of at the next poll."""
+        self.start()
+        self._wake.set()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            try:
+                self.drain()
+            except Exception as e:
+                self.counts["errors"] += 1
+                if self._logger:
+                    self._logger.error(f"{self.name}: drain failed: {e}")
+            self.transport.close_if_idle()
+
+    def retry_delay(self, attempts: int) -> float:
+        # Jittered so messages that failed together do not retry together
+        return min(self.max_backoff, self.backoff * 2 ** (attempts - 1)) * random.uniform(0.5, 1.0)
+
+    def drain(self) -> int:
+        """Send every due message now; returns how many were delivered."""
+        sent = 0
+        while True:
+            batch = self._claim(self.batch_size)
+            if not batch:
+                return sent
+            for message in batch:
+                message.attempts += 1
+                try:
+                    self.transport.send(message)
+                except Exception as e:
+                    error = f"{e.__class__.__name__}: {e}"[:500]
+                    if not isinstance(e, smtplib.SMTPException):
+                        # Connection-level trouble: start the next message on a fresh session
+                        self.transport.close()
+                    if is_permanent(e) or message.attempts >= self.max_attempts:
+                        self.counts["failed"] += 1
+                        self._record(message, "failed", error, None)
+                        if self._logger:
+                            self._logger.error(f"{self.name}: giving up on message {message.id}: {error}")
+                    else:
+                        self.counts["retried"] += 1
+                        self._record(message, "pending", error, self.retry_delay(message.attempts))
+                        if self._logger:
+                            self._logger.warning(f"{self.name}: message {message.id} failed, will retry: {error}")
+                    continue
+                sent += 1
+                self.counts["sent"] += 1
+                self._record(message, "sent", None, None)
+
+    def stats(self) -> Dict[str, int]:
+        return dict(self.counts, connects=self.transport.connects)
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._wake.set()
+        self.transport.close()
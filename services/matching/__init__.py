@@ -2,8 +2,21 @@
 
 v1: Simple keyword-based matching (MatchingService)
 v2: 7-parameter semantic-lite matching with MMR reranking (MatchingServiceV2)
+
+The services are imported on first access, so importing a sibling module
+(tag_match, llm_batching) does not load them.
 """
-from .simple_matching import MatchingService
-from .matching_v2 import MatchingServiceV2
+import importlib
 
 __all__ = ["MatchingService", "MatchingServiceV2"]
+
+_LAZY = {
+    "MatchingService": ".simple_matching",
+    "MatchingServiceV2": ".matching_v2",
+}
+
+
+def __getattr__(name):
+    if name in _LAZY:
+        return getattr(importlib.import_module(_LAZY[name], __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,92 @@
+"""
+Token-budget batching for LLM lab matching.
+
+Faculty summaries vary a lot in length, so batches are packed up to a token
+budget instead of a fixed count, and the batches are sent concurrently with
+retry and exponential backoff. Token counts are estimated from characters (no
+tokenizer dependency); the estimate only has to be good enough to keep every
+request near the budget.
+"""
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, List, Optional, Sequence, Tuple, TypeVar
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+# Rough average for English text with the OpenAI tokenizers
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    return (len(text or "") + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def pack_by_budget(
+    items: Sequence[T],
+    cost: Callable[[T], int],
+    budget: int,
+    max_items: Optional[int] = None,
+) -> List[List[T]]:
+    """Split items, in order, into batches whose total cost stays within budget.
+
+    An item that alone exceeds the budget gets a batch of its own. max_items caps
+    a batch's length (e.g. so the model's answer fits its max_tokens).
+    """
+    batches: List[List[T]] = []
+    current: List[T] = []
+    used = 0
+    for item in items:
+        c = cost(item)
+        if current and (used + c > budget or (max_items and len(current) >= max_items)):
+            batches.append(current)
+            current, used = [], 0
+        current.append(item)
+        used += c
+    if current:
+        batches.append(current)
+    return batches
+
+
+def call_with_retry(
+    fn: Callable[[], R],
+    retries: int = 3,
+    backoff: float = 1.0,
+    max_backoff: float = 20.0,
+    retryable: Callable[[Exception], bool] = lambda e: True,
+    sleep: Callable[[float], None] = time.sleep,
+) -> R:
+    """fn(), retried up to `retries` times on retryable errors with jittered exponential backoff."""
+    attempt = 0
+    while True:
+        try:
+            return fn()
+        except Exception as e:
+            if attempt >= retries or not retryable(e):
+                raise
+            # Full jitter: concurrent batches hitting a rate limit do not retry in lockstep
+            sleep(random.uniform(0, min(max_backoff, backoff * (2 ** attempt))))
+            attempt += 1
+
+
+def map_with_retry(
+    fn: Callable[[T], R],
+    items: Sequence[T],
+    max_workers: int = 4,
+    **retry_kwargs: Any,
+) -> List[Tuple[Optional[R], Optional[Exception]]]:
+    """[(result, error)] for fn over items in input order, at most max_workers at once.
+
+    Each call goes through call_with_retry; one failed item does not affect the others.
+    """
+    def run(item: T) -> Tuple[Optional[R], Optional[Exception]]:
+        try:
+            return call_with_retry(lambda: fn(item), **retry_kwargs), None
+        except Exception as e:
+            return None, e
+
+    if not items:
+        return []
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(items)))) as executor:
+        return list(executor.map(run, items))
@@ -974,8 +974,14 @@ class MatchingServiceV2:
     Drop-in replacement for MatchingService with v2 algorithm.
     """
     
-    def __init__(self, faculty_json_path_or_list):
-        """Initialize with faculty JSON file path or pre-loaded list of dicts."""
+    def __init__(self, faculty_json_path_or_list, candidate_index=None):
+        """Initialize with faculty JSON file path or pre-loaded list of dicts.
+
+        candidate_index: optional on-disk index (services.faculty.fts.FacultyFTS)
+        whose row ids are positions in the faculty list. When given, candidate
+        retrieval and keyword search use it and the in-memory keyword index is
+        only built if it cannot answer.
+        """
         if isinstance(faculty_json_path_or_list, list):
             self.faculty_list = faculty_json_path_or_list
             self.metadata = {}
@@ -994,8 +1000,17 @@ class MatchingServiceV2:
         self.ontology = get_ontology()
         self.phrases = get_phrases()
         
-        # Build inverted index for fast candidate retrieval
-        self.keyword_index = self._build_keyword_index()
+        # Inverted index for fast candidate retrieval (built on first use)
+        self.candidate_index = candidate_index
+        self._keyword_index: Optional[Dict[str, List[int]]] = None
+        if candidate_index is None:
+            self._keyword_index = self._build_keyword_index()
+
+    @property
+    def keyword_index(self) -> Dict[str, List[int]]:
+        if self._keyword_index is None:
+            self._keyword_index = self._build_keyword_index()
+        return self._keyword_index
     
     def _build_keyword_index(self) -> Dict[str, List[int]]:
         """Build inverted index from faculty keywords."""
@@ -1025,6 +1040,17 @@ class MatchingServiceV2:
         if not keywords:
             return list(range(len(self.faculty_list)))
         
+        # If no matches, return all
+        return self._ranked_candidates(keywords) or list(range(len(self.faculty_list)))
+
+    def _ranked_candidates(self, keywords: List[str]) -> List[int]:
+        """Indices of faculty matching any keyword, most relevant first ([] if none)."""
+        if self.candidate_index is not None:
+            ranked = self.candidate_index.research_candidates(keywords)
+            if ranked is not None:
+                # BM25 order
+                return ranked
+        
         candidate_counts: Counter = Counter()
         for kw in keywords:
             kw_lower = kw.lower()
@@ -1032,12 +1058,54 @@ class MatchingServiceV2:
                 for idx in self.keyword_index[kw_lower]:
                     candidate_counts[idx] += 1
         
-        # If no matches, return all
-        if not candidate_counts:
-            return list(range(len(self.faculty_list)))
-        
-        # Return indices sorted by match count (descending)
+        # Sorted by match count (descending)
         return [idx for idx, _ in candidate_counts.most_common()]
+
+    @staticmethod
+    def _keywords(text_parts: List[str]) -> List[str]:
+        keywords = []
+        for part in text_parts:
+            if part:
+                tokens = TOKEN_RE.findall(part.lower())
+                keywords.extend([t for t in tokens if len(t) >= 3 and t not in STOPWORDS])
+        return list(set(keywords))
+
+    def prefilter(self, text: str, limit: int = 200, pool: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Faculty records most relevant to free text (e.g. a resume), best first.
+
+        Cheap first stage for LLM matching: up to `pool` (default 4 * limit)
+        keyword candidates are scored with compute_total_score, without MMR,
+        and the top `limit` records are returned. Returns [] if no keyword matches.
+        """
+        keywords = self._keywords([text])
+        if not keywords or limit <= 0:
+            return []
+        candidates = self._ranked_candidates(keywords)[:pool or limit * 4]
+        student = {
+            "research_field": "",
+            "research_topics": text,
+            "topics": [],
+            "level": "undergrad",
+            "academic_level": "undergrad",
+            "intent": "join_now",
+            "needs_funding": False,
+            "skills": [],
+            "techniques": [],
+            "remote_ok": None,
+            "location_pref": "",
+            "work_style": "",
+        }
+        scored = []
+        for rank, i in enumerate(candidates):
+            fac = self.faculty_list[i]
+            total, breakdown, _ = compute_total_score(student, fac, self.ontology, self.phrases)
+            if breakdown.get("blocked"):
+                continue
+            # Ties keep retrieval order
+            scored.append((-total, rank, fac))
+        scored.sort(key=lambda x: (x[0], x[1]))
+        return [fac for _, _, fac in scored[:limit]]
     
     def match_student(
         self,
@@ -1084,12 +1152,7 @@ class MatchingServiceV2:
         text_parts = [research_field, research_topics]
         if research_interests:
             text_parts.extend(research_interests)
-        keywords = []
-        for part in text_parts:
-            if part:
-                tokens = TOKEN_RE.findall(part.lower())
-                keywords.extend([t for t in tokens if len(t) >= 3 and t not in STOPWORDS])
-        keywords = list(set(keywords))
+        keywords = self._keywords(text_parts)
         
         # Get candidates (uses inverted index for speed)
         candidate_indices = self._get_candidates(keywords)
@@ -1211,14 +1274,17 @@ class MatchingServiceV2:
     def search_keywords(self, keywords: List[str], top_k: int = 20) -> List[Dict]:
         """Quick keyword search (backward compatible)."""
         keywords = [k.lower().strip() for k in keywords if len(k) > 2]
-        scores: Counter = Counter()
-        
-        for kw in keywords:
-            if kw in self.keyword_index:
-                for idx in self.keyword_index[kw]:
-                    scores[idx] += 1
+        top_indices = None
+        if self.candidate_index is not None:
+            top_indices = self.candidate_index.research_candidates(keywords, limit=top_k)
         
-        top_indices = [idx for idx, _ in scores.most_common(top_k)]
+        if top_indices is None:
+            scores: Counter = Counter()
+            for kw in keywords:
+                if kw in self.keyword_index:
+                    for idx in self.keyword_index[kw]:
+                        scores[idx] += 1
+            top_indices = [idx for idx, _ in scores.most_common(top_k)]
         
         results = []
         for i in top_indices:
@@ -63,6 +63,11 @@ def _normalize_haystack(pi: Dict[str, Any]) -> str:
     return " ".join(parts).lower()
 
 
+def _category_key(pi: Dict[str, Any], dept_field_key_fn: Callable[[str], str]) -> str:
+    """Department category: precomputed "dept_category" on the record when present."""
+    return pi.get("dept_category") or dept_field_key_fn((pi.get("department") or ""))
+
+
 def faculty_involvement_bucket(title: str) -> str:
     """Map faculty title to a coarse bucket comparable to student involvement choice."""
     t = (title or "").lower()
@@ -81,7 +86,7 @@ def build_research_area_labels(
     """Sorted human-readable research area labels that appear in the faculty dataset."""
     keys = set()
     for pi in faculty:
-        keys.add(dept_field_key_fn((pi.get("department") or "")))
+        keys.add(_category_key(pi, dept_field_key_fn))
     labels = [category_display[k] for k in sorted(keys) if k in category_display]
     if not labels:
         return [category_display[k] for k in sorted(category_display.keys())]
@@ -141,7 +146,7 @@ def _score_one(
     category_display: Dict[str, str],
 ) -> int:
     hay = _normalize_haystack(pi)
-    dk = dept_field_key_fn((pi.get("department") or ""))
+    dk = _category_key(pi, dept_field_key_fn)
     rk = _display_to_category_key(research_display, category_display)
     score = 0
 
@@ -0,0 +1,4 @@
+"""Per-user state caches (saved PIs, ...)."""
+from .saved_cache import SavedPICache
+
+__all__ = ["SavedPICache"]
@@ -0,0 +1,173 @@
+"""
+Per-user cache of saved PI ids.
+
+Nearly every page needs the user's saved pi_ids (is_saved flags, /saved,
+bulk email, reports). They are cached in process with a TTL and invalidated
+by save/unsave. A per-user generation, bumped by invalidate(), keeps a read
+that loaded before an invalidation from storing its (stale) result.
+
+With shared_path set, an SQLite file shared by all workers on the host keeps a
+per-user version and the last loaded id list. invalidate() bumps the version,
+so another worker's in-process copy is reloaded on its next read instead of
+living out its TTL, and a worker that missed can take the list from the file
+instead of the database. Any SQLite problem degrades to the in-process tier.
+"""
+import json
+import sqlite3
+import threading
+import time
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS saved_pi_sets (
+    user_id INTEGER PRIMARY KEY,
+    version INTEGER NOT NULL DEFAULT 0,
+    pi_ids TEXT,
+    updated_at REAL
+)
+"""
+
+
+class _Entry:
+    __slots__ = ("expires_at", "version", "ordered", "ids")
+
+    def __init__(self, expires_at: float, version: int, ordered: Tuple[str, ...]):
+        self.expires_at = expires_at
+        self.version = version
+        self.ordered = ordered
+        self.ids = frozenset(ordered)
+
+
+class SavedPICache:
+    """saved pi_ids per user: in-process TTL tier plus an optional shared SQLite tier."""
+
+    def __init__(
+        self,
+        load: Callable[[int], Iterable[str]],
+        ttl: float = 300,
+        max_users: int = 10000,
+        shared_path: Optional[str] = None,
+    ):
+        self._load = load
+        self.ttl = ttl
+        self.max_users = max_users
+        self.shared_path = shared_path
+        self._entries: Dict[int, _Entry] = {}
+        self._generations: Dict[int, int] = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.hits = 0
+        self.misses = 0
+        self.shared_hits = 0
+        if shared_path:
+            try:
+                self._shared().execute(_SCHEMA)
+            except sqlite3.Error:
+                self.shared_path = None
+
+    # --- shared tier -----------------------------------------------------
+
+    def _shared(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.shared_path, timeout=2, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def _shared_row(self, user_id: int) -> Tuple[int, Optional[str]]:
+        row = self._shared().execute(
+            "SELECT version, pi_ids FROM saved_pi_sets WHERE user_id = ?", (user_id,)
+        ).fetchone()
+        return (row[0], row[1]) if row else (0, None)
+
+    def _shared_store(self, user_id: int, version: int, ordered: Tuple[str, ...]) -> None:
+        # Only fill in the list if nobody invalidated since we read the version
+        self._shared().execute(
+            "INSERT INTO saved_pi_sets (user_id, version, pi_ids, updated_at) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT(user_id) DO UPDATE SET pi_ids = excluded.pi_ids, updated_at = excluded.updated_at "
+            "WHERE saved_pi_sets.version = excluded.version",
+            (user_id, version, json.dumps(list(ordered)), time.time()),
+        )
+
+    # --- public API ------------------------------------------------------
+
+    def _entry(self, user_id: int) -> _Entry:
+        now = time.time()
+        generation = self._generations.get(user_id, 0)
+        entry = self._entries.get(user_id)
+        shared_version = None
+        shared_ids = None
+        if self.shared_path:
+            try:
+                shared_version, shared_ids = self._shared_row(user_id)
+            except sqlite3.Error:
+                shared_version = None
+
+        if entry is not None and entry.expires_at > now and (
+            shared_version is None or shared_version == entry.version
+        ):
+            self.hits += 1
+            return entry
+
+        if shared_ids is not None:
+            self.shared_hits += 1
+            ordered = tuple(json.loads(shared_ids))
+        else:
+            self.misses += 1
+            ordered = tuple(self._load(user_id))
+            if shared_version is not None:
+                try:
+                    self._shared_store(user_id, shared_version, ordered)
+                except sqlite3.Error:
+                    pass
+
+        entry = _Entry(now + self.ttl, shared_version or 0, ordered)
+        with self._lock:
+            if self._generations.get(user_id, 0) != generation:
+                # Invalidated while we loaded: answer this read, but do not cache what it saw
+                return entry
+            if user_id not in self._entries and len(self._entries) >= self.max_users:
+                # Drop the oldest-inserted user
+                self._entries.pop(next(iter(self._entries)), None)
+            self._entries[user_id] = entry
+        return entry
+
+    def get(self, user_id) -> frozenset:
+        """Saved pi_id values for a user (empty for anonymous)."""
+        if not user_id:
+            return frozenset()
+        return self._entry(user_id).ids
+
+    def ordered(self, user_id) -> Tuple[str, ...]:
+        """Saved pi_id values in the order they were saved."""
+        if not user_id:
+            return ()
+        return self._entry(user_id).ordered
+
+    def invalidate(self, user_id) -> None:
+        """Forget a user's saved set here and (if shared) in every other worker."""
+        with self._lock:
+            self._generations[user_id] = self._generations.get(user_id, 0) + 1
+            if len(self._generations) > self.max_users:
+                self._generations.pop(next(iter(self._generations)), None)
+            self._entries.pop(user_id, None)
+        if self.shared_path:
+            try:
+                self._shared().execute(
+                    "INSERT INTO saved_pi_sets (user_id, version, pi_ids, updated_at) VALUES (?, 1, NULL, ?) "
+                    "ON CONFLICT(user_id) DO UPDATE SET version = version + 1, pi_ids = NULL, "
+                    "updated_at = excluded.updated_at",
+                    (user_id, time.time()),
+                )
+            except sqlite3.Error:
+                pass
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "users": len(self._entries),
+            "hits": self.hits,
+            "shared_hits": self.shared_hits,
+            "misses": self.misses,
+            "shared": bool(self.shared_path),
+        }
@@ -0,0 +1,8 @@
+"""Web-process helpers (request accounting, readiness, rate limits, periodic tasks, ...)."""
+from .counters import BufferedCounter
+from .periodic import PeriodicTask
+from .profiler import ProfileStore
+from .rate_limit import RateLimiter
+from .readiness import WarmUp
+
+__all__ = ["BufferedCounter", "PeriodicTask", "ProfileStore", "RateLimiter", "WarmUp"]
@@ -0,0 +1,87 @@
+"""
+In-process counters that are flushed to storage in batches.
+
+Request handlers call incr(); a daemon thread hands the accumulated deltas to
+flush() every few seconds (and once more at interpreter exit), so the hot path
+never touches the database. If a flush fails the deltas are merged back and
+retried on the next interval.
+"""
+import atexit
+import os
+import threading
+from typing import Callable, Dict, Optional
+
+
+class BufferedCounter:
+    """Per-process {key: delta} buffer with a periodic background flush."""
+
+    def __init__(
+        self,
+        flush: Callable[[Dict[str, int]], None],
+        interval: float = 5.0,
+        logger=None,
+        name: str = "counter",
+    ):
+        self._flush = flush
+        self.interval = interval
+        self._logger = logger
+        self.name = name
+        self._pending: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._pid: Optional[int] = None
+        self.flush_count = 0
+        self.flush_errors = 0
+        atexit.register(self.flush)
+
+    def incr(self, key: str, n: int = 1) -> None:
+        with self._lock:
+            self._pending[key] = self._pending.get(key, 0) + n
+        self._ensure_thread()
+
+    def pending(self) -> Dict[str, int]:
+        """Copy of the not-yet-flushed deltas."""
+        with self._lock:
+            return dict(self._pending)
+
+    def flush(self) -> bool:
+        """Write pending deltas now. Returns False if the flush failed (deltas are kept)."""
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, {}
+            if not batch:
+                return True
+            try:
+                self._flush(batch)
+                self.flush_count += 1
+                return True
+            except Exception as e:
+                self.flush_errors += 1
+                with self._lock:
+                    for key, n in batch.items():
+                        self._pending[key] = self._pending.get(key, 0) + n
+                if self._logger:
+                    self._logger.warning(f"Flushing {self.name} failed, will retry: {e}")
+                return False
+
+    def _ensure_thread(self) -> None:
+        # Start lazily, and again in a forked worker (threads do not survive fork)
+        pid = os.getpid()
+        if self._pid == pid and self._thread is not None:
+            return
+        with self._lock:
+            if self._pid == pid and self._thread is not None:
+                return
+            self._pid = pid
+            self._thread = threading.Thread(target=self._run, name=f"{self.name}-flush", daemon=True)
+            self._thread.start()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.flush()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self.flush()
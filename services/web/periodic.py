@@ -0,0 +1,68 @@
+"""
+A function run every few seconds on a daemon thread, per process.
+
+For maintenance work that should not run inside a request, such as refreshing
+summary tables. The thread is started again in a forked worker (threads do not
+survive fork). A run that raises is logged and counted; the next one happens at
+the following interval as usual.
+"""
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+
+class PeriodicTask:
+    """Calls fn() every `interval` seconds once started."""
+
+    def __init__(self, fn: Callable[[], Any], interval: float, logger=None, name: str = "task"):
+        self._fn = fn
+        self.interval = interval
+        self._logger = logger
+        self.name = name
+        self._lock = threading.Lock()
+        self._run_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._pid: Optional[int] = None
+        self.runs = 0
+        self.errors = 0
+        self.last_duration = 0.0
+
+    def start(self) -> None:
+        """Start the thread (again in a forked worker); the first run is one interval from now."""
+        pid = os.getpid()
+        if self.interval <= 0 or (self._pid == pid and self._thread is not None):
+            return
+        with self._lock:
+            if self._pid == pid and self._thread is not None:
+                return
+            self._pid = pid
+            self._thread = threading.Thread(target=self._run, name=f"{self.name}-periodic", daemon=True)
+            self._thread.start()
+
+    def run_now(self) -> bool:
+        """Run fn() in this thread; False if it raised."""
+        with self._run_lock:
+            started = time.perf_counter()
+            try:
+                self._fn()
+            except Exception as e:
+                self.errors += 1
+                if self._logger:
+                    self._logger.warning(f"{self.name} failed: {e}")
+                return False
+            finally:
+                self.last_duration = time.perf_counter() - started
+            self.runs += 1
+            return True
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.run_now()
+
+    def stats(self) -> Dict[str, float]:
+        return {"runs": self.runs, "errors": self.errors, "last_duration_seconds": round(self.last_duration, 4)}
+
+    def stop(self) -> None:
+        self._stop.set()
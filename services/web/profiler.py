@@ -0,0 +1,140 @@
+"""
+On-demand cProfile captures of single requests.
+
+An admin appends ?__profile=1 to a URL; the app profiles that one request and
+saves the raw pstats file plus a small JSON sidecar (method, path, status,
+duration) in a directory, keeping the newest `keep` captures. The admin pages
+read them back as top-N function tables, and the .pstats file can be downloaded
+for snakeviz / `python -m pstats`.
+
+cProfile only sees the thread that handled the request: work handed to a
+thread pool (batched AI matching, bulk email drafts) shows up as time spent
+waiting on the pool.
+"""
+import cProfile
+import json
+import os
+import pstats
+import re
+import secrets
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+# <date>-<time>-<microseconds>-<random>: ids sort in capture order
+_ID_RE = re.compile(r"^[0-9]{8}-[0-9]{6}-[0-9]{6}-[0-9a-f]{4}$")
+
+# Sort key -> index into a pstats entry (primitive calls, calls, tottime, cumtime, callers)
+SORT_KEYS = {"cumulative": 3, "tottime": 2, "calls": 1}
+
+_REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def _short_path(filename: str) -> str:
+    """Trim a frame's filename to the part after site-packages or the repo root."""
+    marker = "site-packages" + os.sep
+    i = filename.rfind(marker)
+    if i >= 0:
+        return filename[i + len(marker):]
+    if filename.startswith(_REPO_ROOT + os.sep):
+        return filename[len(_REPO_ROOT) + 1:]
+    return filename
+
+
+class ProfileStore:
+    """A directory of <id>.pstats captures with <id>.json metadata."""
+
+    def __init__(self, directory: str, keep: int = 50):
+        self.directory = directory
+        self.keep = max(1, keep)
+        self._lock = threading.Lock()
+
+    def start(self) -> Optional[cProfile.Profile]:
+        """A running profiler, or None when another profiler is active in this thread."""
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            return None
+        return profiler
+
+    def save(self, profiler: cProfile.Profile, **meta: Any) -> str:
+        """Stop profiler, write it and meta to disk, prune old captures; returns the id."""
+        profiler.disable()
+        now = time.time()
+        profile_id = "{}-{:06d}-{}".format(
+            time.strftime("%Y%m%d-%H%M%S", time.localtime(now)), int(now % 1 * 1e6), secrets.token_hex(2)
+        )
+        os.makedirs(self.directory, exist_ok=True)
+        profiler.dump_stats(self._path(profile_id, "pstats"))
+        meta = dict(meta, id=profile_id, captured=time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(now)))
+        with open(self._path(profile_id, "json"), "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        self._prune()
+        return profile_id
+
+    def _path(self, profile_id: str, ext: str) -> str:
+        return os.path.join(self.directory, f"{profile_id}.{ext}")
+
+    def _ids(self) -> List[str]:
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return []
+        ids = [n[:-7] for n in names if n.endswith(".pstats") and _ID_RE.match(n[:-7])]
+        return sorted(ids, reverse=True)
+
+    def _prune(self) -> None:
+        with self._lock:
+            for profile_id in self._ids()[self.keep:]:
+                for ext in ("pstats", "json"):
+                    try:
+                        os.remove(self._path(profile_id, ext))
+                    except FileNotFoundError:
+                        pass
+
+    def list(self) -> List[Dict[str, Any]]:
+        """Metadata of the stored captures, newest first."""
+        out = []
+        for profile_id in self._ids():
+            meta = self.meta(profile_id)
+            if meta is not None:
+                out.append(meta)
+        return out
+
+    def meta(self, profile_id: str) -> Optional[Dict[str, Any]]:
+        path = self.pstats_path(profile_id)
+        if path is None:
+            return None
+        try:
+            with open(self._path(profile_id, "json"), encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {"id": profile_id, "captured": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(os.path.getmtime(path)))}
+
+    def pstats_path(self, profile_id: str) -> Optional[str]:
+        """Path of the capture's .pstats file, or None for an unknown / malformed id."""
+        if not _ID_RE.match(profile_id or ""):
+            return None
+        path = self._path(profile_id, "pstats")
+        return path if os.path.exists(path) else None
+
+    def top(self, profile_id: str, limit: int = 40, sort: str = "cumulative") -> Optional[Dict[str, Any]]:
+        """{"total_calls", "total_seconds", "rows"}: the top `limit` functions by sort key."""
+        path = self.pstats_path(profile_id)
+        if path is None:
+            return None
+        stats = pstats.Stats(path)
+        index = SORT_KEYS.get(sort, SORT_KEYS["cumulative"])
+        entries = sorted(stats.stats.items(), key=lambda item: -item[1][index])[:limit]
+        rows = []
+        for (filename, line, func), (cc, nc, tt, ct, _callers) in entries:
+            where = func if filename == "~" else f"{_short_path(filename)}:{line}({func})"
+            rows.append({
+                "function": where,
+                "calls": nc if nc == cc else f"{nc}/{cc}",
+                "tottime": tt,
+                "cumtime": ct,
+                "percall": ct / cc if cc else 0.0,
+            })
+        return {"total_calls": stats.total_calls, "total_seconds": stats.total_tt, "rows": rows}
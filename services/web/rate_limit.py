@@ -0,0 +1,146 @@
+"""
+Token-bucket rate limits per key (client IP, user id).
+
+Each key has a bucket of `limit` tokens that refills at limit/window per
+second; a request takes one token and is refused while the bucket is empty, so
+a client gets a burst of `limit` and then `limit` per `window` on average. A
+check is O(1): buckets are kept in least-recently-used order, and one idle
+for a whole window is full again (the same as no bucket), so idle keys are
+evicted from the front as new requests arrive.
+
+With shared_path set, buckets live in an SQLite file shared by all workers on
+the host, so the limit holds across gunicorn workers instead of multiplying by
+their number. Any SQLite problem degrades to the in-process buckets.
+"""
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS rate_buckets (
+    name TEXT NOT NULL,
+    key TEXT NOT NULL,
+    tokens REAL NOT NULL,
+    updated REAL NOT NULL,
+    PRIMARY KEY (name, key)
+)
+"""
+
+
+class RateLimiter:
+    """`limit` requests per `window` seconds per key; limit <= 0 allows everything."""
+
+    def __init__(
+        self,
+        limit: int,
+        window: float = 60.0,
+        name: str = "rate",
+        max_keys: int = 100000,
+        shared_path: Optional[str] = None,
+    ):
+        self.limit = limit
+        self.window = window
+        self.name = name
+        self.max_keys = max_keys
+        self.shared_path = shared_path
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()  # key -> (tokens, updated)
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._last_prune = time.time()
+        self.allowed = 0
+        self.rejected = 0
+        self.shared_errors = 0
+        if shared_path:
+            try:
+                self._shared().execute(_SCHEMA)
+            except sqlite3.Error:
+                self.shared_path = None
+
+    @property
+    def rate(self) -> float:
+        return self.limit / self.window
+
+    def _take(self, tokens: float, updated: float, now: float) -> Tuple[bool, float, float]:
+        """(allowed, tokens left, seconds until a token is available) for a bucket read at `now`."""
+        tokens = min(float(self.limit), tokens + (now - updated) * self.rate)
+        if tokens >= 1.0:
+            return True, tokens - 1.0, 0.0
+        return False, tokens, (1.0 - tokens) / self.rate
+
+    # --- shared tier -----------------------------------------------------
+
+    def _shared(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.shared_path, timeout=2, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def _shared_hit(self, key: str, now: float) -> Tuple[bool, float]:
+        conn = self._shared()
+        # IMMEDIATE takes the write lock first, so two workers cannot spend the same token
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT tokens, updated FROM rate_buckets WHERE name = ? AND key = ?", (self.name, key)
+            ).fetchone()
+            allowed, tokens, retry_after = self._take(*(row or (self.limit, now)), now)
+            conn.execute(
+                "INSERT INTO rate_buckets (name, key, tokens, updated) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(name, key) DO UPDATE SET tokens = excluded.tokens, updated = excluded.updated",
+                (self.name, key, tokens, now),
+            )
+            if now - self._last_prune >= self.window:
+                self._last_prune = now
+                conn.execute(
+                    "DELETE FROM rate_buckets WHERE name = ? AND updated < ?", (self.name, now - self.window)
+                )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return allowed, retry_after
+
+    # --- public API ------------------------------------------------------
+
+    def hit(self, key: str) -> Tuple[bool, float]:
+        """Spend a token for key: (allowed, seconds to wait before retrying when refused)."""
+        if self.limit <= 0:
+            return True, 0.0
+        now = time.time()
+        result = None
+        if self.shared_path:
+            try:
+                result = self._shared_hit(key, now)
+            except sqlite3.Error:
+                self.shared_errors += 1
+        if result is None:
+            with self._lock:
+                bucket = self._buckets.pop(key, None)
+                allowed, tokens, retry_after = self._take(*(bucket or (self.limit, now)), now)
+                self._buckets[key] = (tokens, now)
+                # Idle for a window means full again: drop those (oldest first), and keep under max_keys
+                idle_before = now - self.window
+                while self._buckets:
+                    oldest, (_, updated) = next(iter(self._buckets.items()))
+                    if updated >= idle_before and len(self._buckets) <= self.max_keys:
+                        break
+                    del self._buckets[oldest]
+            result = (allowed, retry_after)
+        if result[0]:
+            self.allowed += 1
+        else:
+            self.rejected += 1
+        return result
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "keys": len(self._buckets),
+            "allowed": self.allowed,
+            "rejected": self.rejected,
+            "shared": bool(self.shared_path),
+            "shared_errors": self.shared_errors,
+        }
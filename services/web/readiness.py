@@ -0,0 +1,86 @@
+"""
+Start-up warm-up with per-step timings, for a readiness probe.
+
+A worker builds its in-memory structures (faculty store, indexes, matchers,
+...) in a background thread right after start-up, and reports ready only once
+every step has run, so the load balancer never routes a user to a cold worker.
+A step that raises is recorded and does not block readiness; a worker with a
+broken index still serves everything else.
+"""
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+
+class WarmUp:
+    """Runs named steps once per process and records how long each took."""
+
+    def __init__(self, steps: List[Tuple[str, Callable[[], Any]]], logger=None, name: str = "warm-up"):
+        self.steps = list(steps)
+        self._logger = logger
+        self.name = name
+        self._lock = threading.Lock()
+        self._pid: Optional[int] = None
+        self._done = threading.Event()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.timings: Dict[str, Dict[str, Any]] = {}
+
+    def start(self, background: bool = True) -> None:
+        """Run the steps unless this process already did (or is doing) so."""
+        pid = os.getpid()
+        with self._lock:
+            if self._pid == pid:
+                return
+            # First call here, or a forked worker whose parent had not finished:
+            # threads do not survive fork, so warm up again in this process
+            if self._pid is not None and self._done.is_set():
+                self._pid = pid
+                return
+            self._pid = pid
+            self._done = threading.Event()
+            self.timings = {}
+            self.started_at = time.time()
+            self.finished_at = None
+        if background:
+            threading.Thread(target=self._run, name=self.name, daemon=True).start()
+        else:
+            self._run()
+
+    def _run(self) -> None:
+        for name, step in self.steps:
+            started = time.perf_counter()
+            entry: Dict[str, Any] = {"ok": True}
+            try:
+                step()
+            except Exception as e:
+                entry = {"ok": False, "error": str(e) or e.__class__.__name__}
+                if self._logger:
+                    self._logger.error(f"{self.name}: {name} failed: {e}")
+            entry["seconds"] = round(time.perf_counter() - started, 4)
+            self.timings[name] = entry
+        self.finished_at = time.time()
+        self._done.set()
+        if self._logger:
+            self._logger.info(f"{self.name}: ready in {self.finished_at - self.started_at:.2f}s")
+
+    @property
+    def ready(self) -> bool:
+        return self._done.is_set()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        return self._done.wait(timeout)
+
+    def status(self) -> Dict[str, Any]:
+        done = self.ready
+        elapsed = None
+        if self.started_at is not None:
+            elapsed = round((self.finished_at if done else time.time()) - self.started_at, 4)
+        return {
+            "ready": done,
+            "seconds": elapsed,
+            "steps": dict(self.timings),
+            "pending": [name for name, _ in self.steps if name not in self.timings],
+            "errors": [name for name, entry in self.timings.items() if not entry.get("ok")],
+        }